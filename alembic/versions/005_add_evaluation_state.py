@@ -0,0 +1,29 @@
+"""add evaluation_state for sharded evaluation bookkeeping
+
+Revision ID: 005
+Revises: 70deda7a44ad
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "005"
+down_revision = "70deda7a44ad"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "evaluation_state",
+        sa.Column("scope", sa.String(100), primary_key=True),
+        sa.Column("node_id", sa.String(255), nullable=True),
+        sa.Column("last_started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_completed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("evaluation_state")
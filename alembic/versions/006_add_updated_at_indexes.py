@@ -0,0 +1,24 @@
+"""add updated_at indexes for incremental evaluation
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from alembic import op
+
+revision = "006"
+down_revision = "005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Incremental evaluator filters on updated_at > watermark
+    op.create_index("ix_weather_updated_at", "weather_data", ["updated_at"])
+    op.create_index("ix_alert_updated_at", "alert_configs", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_alert_updated_at", "alert_configs")
+    op.drop_index("ix_weather_updated_at", "weather_data")
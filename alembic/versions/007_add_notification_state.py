@@ -0,0 +1,63 @@
+"""add notification_state (latest notification per pair) with backfill
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from alembic import op
+
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_state",
+        sa.Column(
+            "alert_config_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("alert_configs.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "weather_data_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("weather_data.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "notification_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("notifications.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("notification_type", sa.String(50), nullable=False),
+        sa.Column("probability_at_notification", sa.Numeric(3, 2), nullable=False),
+        sa.Column("triggered_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+    # Backfill: latest notification per pair (same ordering the evaluator CTE used)
+    op.execute(
+        """
+        INSERT INTO notification_state (
+            alert_config_id, weather_data_id, notification_id,
+            notification_type, probability_at_notification, triggered_at
+        )
+        SELECT DISTINCT ON (alert_config_id, weather_data_id)
+            alert_config_id, weather_data_id, id,
+            notification_type, probability_at_notification, triggered_at
+        FROM notifications
+        WHERE alert_config_id IS NOT NULL
+        ORDER BY alert_config_id, weather_data_id, triggered_at DESC
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("notification_state")
@@ -0,0 +1,36 @@
+"""add checkpoint columns to evaluation_state
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from alembic import op
+
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "evaluation_state", sa.Column("run_started_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.add_column(
+        "evaluation_state",
+        sa.Column("checkpoint_alert_config_id", UUID(as_uuid=True), nullable=True),
+    )
+    op.add_column(
+        "evaluation_state",
+        sa.Column("checkpoint_weather_data_id", UUID(as_uuid=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("evaluation_state", "checkpoint_weather_data_id")
+    op.drop_column("evaluation_state", "checkpoint_alert_config_id")
+    op.drop_column("evaluation_state", "run_started_at")
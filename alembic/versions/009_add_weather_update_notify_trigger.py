@@ -0,0 +1,51 @@
+"""notify weather_updates channel on weather_data changes
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from alembic import op
+
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Payload is the field id; NOTIFY collapses identical payloads within a
+    # transaction, so a bulk upsert emits one event per field, not per row.
+    op.execute(
+        """
+        CREATE FUNCTION notify_weather_update() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('weather_updates', NEW.field_id::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_weather_data_insert_notify
+        AFTER INSERT ON weather_data
+        FOR EACH ROW EXECUTE FUNCTION notify_weather_update()
+        """
+    )
+    # Upserts that rewrite the same probability (e.g. re-seeding) stay silent
+    op.execute(
+        """
+        CREATE TRIGGER trg_weather_data_update_notify
+        AFTER UPDATE OF probability ON weather_data
+        FOR EACH ROW
+        WHEN (OLD.probability IS DISTINCT FROM NEW.probability)
+        EXECUTE FUNCTION notify_weather_update()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER trg_weather_data_update_notify ON weather_data")
+    op.execute("DROP TRIGGER trg_weather_data_insert_notify ON weather_data")
+    op.execute("DROP FUNCTION notify_weather_update()")
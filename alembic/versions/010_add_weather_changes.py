@@ -0,0 +1,35 @@
+"""add weather_changes change feed
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from alembic import op
+
+revision = "010"
+down_revision = "009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "weather_changes",
+        sa.Column(
+            "field_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("fields.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("event_date", sa.Date(), primary_key=True),
+        sa.Column("event_type", sa.String(50), primary_key=True),
+        sa.Column("changed_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("weather_changes")
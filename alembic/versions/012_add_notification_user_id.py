@@ -0,0 +1,94 @@
+"""denormalize user_id and field_id onto notifications with a batched backfill
+
+Revision ID: 012
+Revises: 010
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from alembic import op
+
+revision = "012"
+down_revision = "010"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 10_000
+
+
+def upgrade() -> None:
+    op.add_column("notifications", sa.Column("field_id", UUID(as_uuid=True), nullable=True))
+    op.add_column("notifications", sa.Column("user_id", UUID(as_uuid=True), nullable=True))
+
+    # Backfill through weather_data (weather_data_id is never NULL, unlike
+    # alert_config_id), committing each batch so row locks and WAL stay bounded.
+    # Keyset batches by id: each one starts after the previous one's last id
+    # instead of rescanning the rows already visited.
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        last_id = "00000000-0000-0000-0000-000000000000"
+        while True:
+            last_id = conn.scalar(
+                sa.text(
+                    """
+                    WITH batch AS (
+                        SELECT id FROM notifications
+                        WHERE id > CAST(:last_id AS uuid)
+                        ORDER BY id
+                        LIMIT :batch
+                    ), filled AS (
+                        UPDATE notifications n
+                        SET field_id = w.field_id, user_id = f.user_id
+                        FROM batch b, weather_data w
+                        JOIN fields f ON f.id = w.field_id
+                        WHERE n.id = b.id
+                          AND w.id = n.weather_data_id
+                          AND n.user_id IS NULL
+                    )
+                    SELECT id FROM batch ORDER BY id DESC LIMIT 1
+                    """
+                ),
+                {"last_id": last_id, "batch": BACKFILL_BATCH},
+            )
+            if last_id is None:
+                break
+
+    # Rows inserted by the old code during the loop (uuid4 ids can sort before
+    # last_id) were never visited.  Block writes and fill them in the same
+    # transaction as SET NOT NULL, so none can slip in between.
+    op.execute("LOCK TABLE notifications IN EXCLUSIVE MODE")
+    op.execute(
+        """
+        UPDATE notifications n
+        SET field_id = w.field_id, user_id = f.user_id
+        FROM weather_data w
+        JOIN fields f ON f.id = w.field_id
+        WHERE w.id = n.weather_data_id
+          AND n.user_id IS NULL
+        """
+    )
+    op.alter_column("notifications", "field_id", nullable=False)
+    op.alter_column("notifications", "user_id", nullable=False)
+    op.create_foreign_key(
+        "notifications_field_id_fkey", "notifications", "fields", ["field_id"], ["id"]
+    )
+    op.create_foreign_key(
+        "notifications_user_id_fkey", "notifications", "users", ["user_id"], ["id"]
+    )
+
+    # The user feed: one range scan per page, newest first
+    op.create_index(
+        "ix_notification_user_feed",
+        "notifications",
+        ["user_id", sa.text("triggered_at DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notification_user_feed", "notifications")
+    op.drop_constraint("notifications_user_id_fkey", "notifications", type_="foreignkey")
+    op.drop_constraint("notifications_field_id_fkey", "notifications", type_="foreignkey")
+    op.drop_column("notifications", "user_id")
+    op.drop_column("notifications", "field_id")
@@ -0,0 +1,29 @@
+"""add partial index on pending notifications for the outbox dispatcher
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "013"
+down_revision = "012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Only the (small) pending backlog is indexed: claim order and queue depth
+    op.create_index(
+        "ix_notification_pending",
+        "notifications",
+        ["triggered_at"],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notification_pending", "notifications")
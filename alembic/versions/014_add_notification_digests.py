@@ -0,0 +1,61 @@
+"""add notification_digests and notifications.digest_id
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from alembic import op
+
+revision = "014"
+down_revision = "013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_digests",
+        sa.Column("id", UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("notification_count", sa.Integer(), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("delivered_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_notification_digests_user_id", "notification_digests", ["user_id"])
+    # The dispatcher claims pending digests like pending notifications
+    op.create_index(
+        "ix_notification_digest_pending",
+        "notification_digests",
+        ["created_at"],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+    op.add_column(
+        "notifications",
+        sa.Column(
+            "digest_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("notification_digests.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+    )
+    op.create_index("ix_notifications_digest_id", "notifications", ["digest_id"])
+    op.create_index(
+        "ix_notification_undigested",
+        "notifications",
+        ["user_id", "triggered_at"],
+        postgresql_where=sa.text("status = 'digested' AND digest_id IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notification_undigested", "notifications")
+    op.drop_index("ix_notifications_digest_id", "notifications")
+    op.drop_column("notifications", "digest_id")
+    op.drop_table("notification_digests")
@@ -0,0 +1,48 @@
+"""add notification_counters for /jobs/stats
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "015"
+down_revision = "014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_counters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("total", sa.BigInteger(), nullable=False),
+        sa.Column("pending", sa.BigInteger(), nullable=False),
+        sa.Column("delivered", sa.BigInteger(), nullable=False),
+        sa.Column("failed", sa.BigInteger(), nullable=False),
+        sa.Column("digested", sa.BigInteger(), nullable=False),
+        sa.Column("last_triggered_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("reconciled_at", sa.DateTime(timezone=True), nullable=True),
+        sa.CheckConstraint("id = 1", name="ck_notification_counters_single_row"),
+    )
+    # Seed the single row from the current table; writers keep it up to date from here
+    op.execute(
+        """
+        INSERT INTO notification_counters
+            (id, total, pending, delivered, failed, digested, last_triggered_at, reconciled_at)
+        SELECT 1, count(*),
+               count(*) FILTER (WHERE status = 'pending'),
+               count(*) FILTER (WHERE status = 'delivered'),
+               count(*) FILTER (WHERE status = 'failed'),
+               count(*) FILTER (WHERE status = 'digested'),
+               max(triggered_at), now()
+        FROM notifications
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("notification_counters")
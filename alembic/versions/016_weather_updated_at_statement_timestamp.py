@@ -0,0 +1,25 @@
+"""stamp weather_data.updated_at with statement_timestamp()
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "016"
+down_revision = "015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # now() is the transaction start: rows merged at the end of a long ingest
+    # would be stamped before the incremental watermark and never re-evaluated
+    op.alter_column("weather_data", "updated_at", server_default=sa.text("statement_timestamp()"))
+
+
+def downgrade() -> None:
+    op.alter_column("weather_data", "updated_at", server_default=sa.text("now()"))
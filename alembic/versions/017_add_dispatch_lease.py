@@ -0,0 +1,27 @@
+"""add claimed_at leases for the outbox dispatcher
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "017"
+down_revision = "016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The dispatcher commits its claim before sending instead of holding row
+    # locks through the provider calls; the lease keeps other replicas off
+    op.add_column("notifications", sa.Column("claimed_at", sa.DateTime(timezone=True)))
+    op.add_column("notification_digests", sa.Column("claimed_at", sa.DateTime(timezone=True)))
+
+
+def downgrade() -> None:
+    op.drop_column("notification_digests", "claimed_at")
+    op.drop_column("notifications", "claimed_at")
@@ -1,3 +1,7 @@
+import os
+import socket
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -6,6 +10,63 @@ class Settings(BaseSettings):
     EVAL_INTERVAL_MINUTES: int = 15
     DELTA_THRESHOLD: float = 0.10
     COOLDOWN_HOURS: int = 6
+    # Split evaluation by hash(field_id) into N shards, each with its own advisory lock
+    EVAL_SHARD_COUNT: int = 1
+    # Only re-evaluate pairs changed since the last run's watermark
+    EVAL_INCREMENTAL: bool = False
+    EVAL_WATERMARK_OVERLAP_SECONDS: int = 300
+    # Rows fetched per server-side cursor round trip during evaluation
+    EVAL_CHUNK_SIZE: int = 1000
+    # "python" (reference, row by row) or "numpy" (vectorized, needs the numpy extra)
+    EVAL_DECISION_ENGINE: Literal["python", "numpy"] = "python"
+    # "python" (reference) or "sql" (set-based INSERT ... SELECT inside PostgreSQL)
+    EVAL_STRATEGY: Literal["python", "sql"] = "python"
+    # Commit every chunk with a resumable checkpoint (python strategy only)
+    EVAL_CHECKPOINT: bool = False
+    # Urgent tier (event dates up to D+EVAL_URGENT_HORIZON_DAYS) runs on its own
+    # shorter interval; EVAL_INTERVAL_MINUTES then sweeps only the far horizon.
+    # 0 disables tiering.
+    EVAL_URGENT_INTERVAL_MINUTES: int = 0
+    EVAL_URGENT_HORIZON_DAYS: int = 1
+    # LISTEN for weather_data changes and evaluate the touched fields right away
+    EVAL_LISTEN_ENABLED: bool = False
+    # Window collecting field ids before one targeted evaluation runs
+    EVAL_DEBOUNCE_SECONDS: float = 2.0
+    # Every N seconds, drain the weather_changes feed and evaluate those fields; 0 disables
+    EVAL_CHANGE_FEED_SECONDS: int = 0
+    # Fields drained and evaluated per transaction by the change-feed job
+    EVAL_CHANGE_FEED_BATCH_FIELDS: int = 1000
+    # Group each run's notifications into one digest message per user
+    EVAL_DIGEST: bool = False
+    # Notifications listed in a digest message before "... y N más"
+    EVAL_DIGEST_MAX_LINES: int = 10
+    # Recount notifications into the /jobs/stats counters every N minutes; 0 disables
+    STATS_RECONCILE_MINUTES: int = 60
+    # Rows staged per COPY/INSERT round trip by POST /weather/batch
+    WEATHER_INGEST_CHUNK_SIZE: int = 10000
+    # Rows per server-side cursor fetch (and body chunk) of the notifications export
+    EXPORT_CHUNK_SIZE: int = 1000
+    # Read-through cache of GET /fields/{field_id}/alerts; TTL 0 disables it
+    ALERT_CACHE_TTL_SECONDS: float = 30.0
+    ALERT_CACHE_MAX_FIELDS: int = 10000
+    # "local" (this process only) or "postgres" (NOTIFY invalidations to every replica)
+    ALERT_CACHE_BACKEND: Literal["local", "postgres"] = "local"
+    # Items accepted by POST/PATCH /alerts/bulk in one request
+    ALERT_BULK_MAX_ITEMS: int = 20000
+    # Acknowledgements accepted by POST /notifications/deliver in one request
+    DELIVERY_ACK_MAX_ITEMS: int = 10000
+    # Outbox dispatcher: send pending notifications from this process
+    DISPATCH_ENABLED: bool = False
+    # "package.module:Class" implementing NotificationSender
+    DISPATCH_SENDER: str = "app.services.notification_delivery:LoggingSender"
+    DISPATCH_BATCH_SIZE: int = 500
+    # Messages in flight at once per dispatcher
+    DISPATCH_CONCURRENCY: int = 20
+    DISPATCH_SEND_TIMEOUT_SECONDS: float = 10.0
+    # Sleep between polls once the pending queue is drained
+    DISPATCH_POLL_SECONDS: float = 5.0
+    # Identifies this replica in shard ownership reports
+    NODE_ID: str = f"{socket.gethostname()}-{os.getpid()}"
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 
@@ -1,3 +1,4 @@
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.config import settings
@@ -11,3 +12,8 @@ engine = create_async_engine(
     pool_recycle=3600,
 )
 async_session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def asyncpg_dsn(database_url: str) -> str:
+    """Plain libpq DSN for raw asyncpg connections from a ``postgresql+asyncpg`` URL."""
+    return make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
@@ -22,8 +22,21 @@ class JSONFormatter(logging.Formatter):
         if hasattr(record, "elapsed_s"):
             log_entry["elapsed_s"] = round(record.elapsed_s, 3)
 
-        # Include extra numeric fields from evaluation results
-        for key in ("evaluated", "notifications_created", "skipped"):
+        # Include extra fields from evaluation results
+        for key in (
+            "evaluated",
+            "notifications_created",
+            "skipped",
+            "write_s",
+            "node_id",
+            "shards",
+            "tier",
+            "lag_s",
+            "run_s",
+            "tiers",
+            "phases",
+            "actions",
+        ):
             if hasattr(record, key):
                 log_entry[key] = getattr(record, key)
 
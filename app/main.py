@@ -7,14 +7,20 @@ from contextvars import ContextVar
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy import text
 
+from app import metrics
 from app.config import settings
-from app.database import async_session_factory, engine
+from app.database import async_session_factory, asyncpg_dsn, engine
 from app.logging_config import setup_logging
-from app.routers import alert_configs, jobs, notifications
-from app.services.alert_evaluator import evaluate_alerts
+from app.routers import alert_configs, jobs, notifications, weather
+from app.services.alert_config_cache import AlertCacheInvalidationListener, alert_config_cache
+from app.services.alert_evaluator import Tier, evaluate_alerts
+from app.services.notification_counters import reconcile_counters
+from app.services.notification_delivery import NotificationDispatcher, load_sender
+from app.services.weather_changes import drain_changed_fields
+from app.services.weather_listener import WeatherUpdateListener
 from app.services.weather_seeder import seed_if_empty
 
 correlation_id_var: ContextVar[str] = ContextVar("correlation_id", default="")
@@ -25,14 +31,23 @@ logger = logging.getLogger(__name__)
 scheduler = AsyncIOScheduler()
 
 
-async def run_evaluation():
+async def run_evaluation(tier: Tier | None = None):
     request_id = str(uuid_mod.uuid4())[:8]
     correlation_id_var.set(request_id)
-    logger.info("Scheduled evaluation starting", extra={"correlation_id": request_id})
+    interval_minutes = (
+        settings.EVAL_URGENT_INTERVAL_MINUTES
+        if tier is Tier.URGENT
+        else settings.EVAL_INTERVAL_MINUTES
+    )
+    logger.info(
+        "Scheduled evaluation starting (tier=%s)",
+        tier or "all",
+        extra={"correlation_id": request_id},
+    )
     start = time.monotonic()
     try:
         async with async_session_factory() as session:
-            result = await evaluate_alerts(session)
+            result = await evaluate_alerts(session, tier=tier)
         elapsed = time.monotonic() - start
         logger.info(
             "Scheduled evaluation completed in %.2fs: %s",
@@ -40,11 +55,11 @@ async def run_evaluation():
             result,
             extra={"correlation_id": request_id, "elapsed_s": elapsed, **result},
         )
-        if elapsed > settings.EVAL_INTERVAL_MINUTES * 60 * 0.8:
+        if elapsed > interval_minutes * 60 * 0.8:
             logger.warning(
                 "Evaluation took %.1fs — approaching interval limit of %ds",
                 elapsed,
-                settings.EVAL_INTERVAL_MINUTES * 60,
+                interval_minutes * 60,
                 extra={"correlation_id": request_id},
             )
     except Exception:
@@ -56,6 +71,83 @@ async def run_evaluation():
         )
 
 
+async def run_field_evaluation(field_ids: set[uuid_mod.UUID]) -> dict:
+    """Targeted evaluation triggered by weather updates (see ``weather_listener``)."""
+    request_id = str(uuid_mod.uuid4())[:8]
+    correlation_id_var.set(request_id)
+    start = time.monotonic()
+    async with async_session_factory() as session:
+        result = await evaluate_alerts(session, field_ids=field_ids)
+    elapsed = time.monotonic() - start
+    logger.info(
+        "Event-driven evaluation of %d fields completed in %.2fs: %s",
+        len(field_ids),
+        elapsed,
+        result,
+        extra={"correlation_id": request_id, "elapsed_s": elapsed, **result},
+    )
+    return result
+
+
+async def run_change_feed_evaluation():
+    """Drain ``weather_changes`` and evaluate the touched fields, batch by batch.
+
+    Each batch of ``EVAL_CHANGE_FEED_BATCH_FIELDS`` fields is drained and
+    evaluated in one transaction, committed before the next one.  A deferred
+    (``locked``) evaluation rolls back, which leaves that batch in the feed
+    for the next run.
+    """
+    request_id = str(uuid_mod.uuid4())[:8]
+    correlation_id_var.set(request_id)
+    start = time.monotonic()
+    batch_size = settings.EVAL_CHANGE_FEED_BATCH_FIELDS
+    evaluated_fields = 0
+    results = []
+    try:
+        async with async_session_factory() as session:
+            while True:
+                field_ids = await drain_changed_fields(session, batch_size)
+                if not field_ids:
+                    break
+                result = await evaluate_alerts(session, field_ids=field_ids)
+                results.append(result)
+                if result.get("locked"):
+                    break
+                evaluated_fields += len(field_ids)
+                if len(field_ids) < batch_size:
+                    break
+        if not results:
+            return
+        summary = {
+            "batches": len(results),
+            "fields": evaluated_fields,
+            "notifications_created": sum(r["notifications_created"] for r in results),
+            "locked": bool(results[-1].get("locked")),
+        }
+        elapsed = time.monotonic() - start
+        logger.info(
+            "Change-feed evaluation completed in %.2fs: %s",
+            elapsed,
+            summary,
+            extra={"correlation_id": request_id, "elapsed_s": elapsed, **summary},
+        )
+    except Exception:
+        logger.exception(
+            "Change-feed evaluation failed",
+            extra={"correlation_id": request_id, "elapsed_s": time.monotonic() - start},
+        )
+
+
+async def run_stats_reconciliation():
+    """Correct drift of the ``/jobs/stats`` counters by recounting notifications."""
+    try:
+        async with async_session_factory() as session:
+            drift = await reconcile_counters(session)
+        logger.info("Notification counters reconciled: %s", drift)
+    except Exception:
+        logger.exception("Notification counter reconciliation failed")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Auto-seed on startup
@@ -67,19 +159,88 @@ async def lifespan(app: FastAPI):
     except Exception:
         logger.exception("Failed to seed database on startup")
 
-    # Start scheduler
+    # Start scheduler; with tiers the main interval only sweeps the far horizon
+    tiered = settings.EVAL_URGENT_INTERVAL_MINUTES > 0
     scheduler.add_job(
         run_evaluation,
         trigger=IntervalTrigger(minutes=settings.EVAL_INTERVAL_MINUTES),
+        args=[Tier.FAR if tiered else None],
         id="evaluate_alerts",
         max_instances=1,
         replace_existing=True,
     )
+    if tiered:
+        scheduler.add_job(
+            run_evaluation,
+            trigger=IntervalTrigger(minutes=settings.EVAL_URGENT_INTERVAL_MINUTES),
+            args=[Tier.URGENT],
+            id="evaluate_alerts_urgent",
+            max_instances=1,
+            replace_existing=True,
+        )
+    if settings.EVAL_CHANGE_FEED_SECONDS > 0:
+        scheduler.add_job(
+            run_change_feed_evaluation,
+            trigger=IntervalTrigger(seconds=settings.EVAL_CHANGE_FEED_SECONDS),
+            id="evaluate_weather_changes",
+            max_instances=1,
+            replace_existing=True,
+        )
+    if settings.STATS_RECONCILE_MINUTES > 0:
+        scheduler.add_job(
+            run_stats_reconciliation,
+            trigger=IntervalTrigger(minutes=settings.STATS_RECONCILE_MINUTES),
+            id="reconcile_notification_counters",
+            max_instances=1,
+            replace_existing=True,
+        )
     scheduler.start()
     logger.info("Scheduler started (interval=%dm)", settings.EVAL_INTERVAL_MINUTES)
+    if tiered:
+        logger.info(
+            "Urgent tier D+0..D+%d every %dm",
+            settings.EVAL_URGENT_HORIZON_DAYS,
+            settings.EVAL_URGENT_INTERVAL_MINUTES,
+        )
+
+    # Event-driven mode: the interval job above stays as a safety-net sweep
+    listener = None
+    if settings.EVAL_LISTEN_ENABLED:
+        listener = WeatherUpdateListener(
+            asyncpg_dsn(settings.DATABASE_URL),
+            run_field_evaluation,
+            settings.EVAL_DEBOUNCE_SECONDS,
+        )
+        listener.start()
+
+    # Shared invalidations: evict fields written through any replica
+    cache_listener = None
+    if settings.ALERT_CACHE_BACKEND == "postgres":
+        cache_listener = AlertCacheInvalidationListener(
+            asyncpg_dsn(settings.DATABASE_URL), alert_config_cache
+        )
+        cache_listener.start()
+
+    dispatcher = None
+    if settings.DISPATCH_ENABLED:
+        dispatcher = NotificationDispatcher(
+            async_session_factory,
+            load_sender(settings.DISPATCH_SENDER),
+            batch_size=settings.DISPATCH_BATCH_SIZE,
+            concurrency=settings.DISPATCH_CONCURRENCY,
+            send_timeout=settings.DISPATCH_SEND_TIMEOUT_SECONDS,
+            poll_seconds=settings.DISPATCH_POLL_SECONDS,
+        )
+        dispatcher.start()
 
     yield
 
+    if dispatcher is not None:
+        await dispatcher.stop()
+    if cache_listener is not None:
+        await cache_listener.stop()
+    if listener is not None:
+        await listener.stop()
     scheduler.shutdown()
     await engine.dispose()
 
@@ -95,6 +256,14 @@ async def correlation_id_middleware(request: Request, call_next):
     response = await call_next(request)
     elapsed = time.monotonic() - start
     response.headers["X-Request-ID"] = request_id
+    # Label by route template, not raw path, to keep cardinality bounded
+    route = request.scope.get("route")
+    metrics.observe_http_request(
+        request.method,
+        getattr(route, "path", "unmatched"),
+        response.status_code,
+        elapsed,
+    )
     logger.info(
         "%s %s %d %.3fs",
         request.method,
@@ -120,6 +289,13 @@ async def health():
         )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: evaluation phases, action counts, HTTP latency."""
+    return Response(metrics.render_latest(), media_type=metrics.METRICS_CONTENT_TYPE)
+
+
 app.include_router(alert_configs.router)
 app.include_router(notifications.router)
 app.include_router(jobs.router)
+app.include_router(weather.router)
@@ -0,0 +1,76 @@
+"""Prometheus metrics, exposed in text format on ``/metrics``.
+
+Metrics live in the default registry of the process; with several uvicorn
+workers each one reports its own series (scrape them per pod/worker).
+"""
+
+from collections.abc import Mapping
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+EVALUATION_PHASE_SECONDS = Histogram(
+    "agrobot_evaluation_phase_seconds",
+    "Time spent per phase (query, decide, render, flush, commit) in one evaluation run",
+    ["phase"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300),
+)
+EVALUATION_ROWS = Counter(
+    "agrobot_evaluation_rows_total",
+    "Evaluated (alert_config, weather_data) pairs by resulting action",
+    ["action"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "agrobot_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+ALERT_CONFIG_CACHE_REQUESTS = Counter(
+    "agrobot_alert_config_cache_requests_total",
+    "Alert config listing cache lookups by result (hit, miss)",
+    ["result"],
+)
+DISPATCH_NOTIFICATIONS = Counter(
+    "agrobot_dispatch_notifications_total",
+    "Notifications sent by the outbox dispatcher by final status (delivered, failed)",
+    ["status"],
+)
+DISPATCH_BATCH_SECONDS = Histogram(
+    "agrobot_dispatch_batch_seconds",
+    "Time to claim, send and mark one dispatcher batch",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60),
+)
+DISPATCH_QUEUE_DEPTH = Gauge(
+    "agrobot_dispatch_queue_depth",
+    "Pending notifications seen by the dispatcher at its last idle check",
+)
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+def observe_evaluation(phases: Mapping[str, float], actions: Mapping[str, int]) -> None:
+    for phase, seconds in phases.items():
+        EVALUATION_PHASE_SECONDS.labels(phase=phase).observe(seconds)
+    for action, rows in actions.items():
+        EVALUATION_ROWS.labels(action=action).inc(rows)
+
+
+def observe_http_request(method: str, route: str, status: int, seconds: float) -> None:
+    HTTP_REQUEST_SECONDS.labels(method=method, route=route, status=str(status)).observe(seconds)
+
+
+def observe_alert_cache(result: str) -> None:
+    ALERT_CONFIG_CACHE_REQUESTS.labels(result=result).inc()
+
+
+def observe_dispatch(counts: Mapping[str, int], seconds: float) -> None:
+    for status, sent in counts.items():
+        DISPATCH_NOTIFICATIONS.labels(status=status).inc(sent)
+    DISPATCH_BATCH_SECONDS.observe(seconds)
+
+
+def observe_dispatch_queue(depth: int) -> None:
+    DISPATCH_QUEUE_DEPTH.set(depth)
+
+
+def render_latest() -> bytes:
+    return generate_latest()
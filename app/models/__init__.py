@@ -6,11 +6,16 @@ class Base(DeclarativeBase):
 
 
 from app.models.alert_config import AlertConfig  # noqa: E402, F401
+from app.models.evaluation_state import EvaluationState  # noqa: E402, F401
 from app.models.field import Field  # noqa: E402, F401
 from app.models.notification import (  # noqa: E402, F401
     Notification,
     NotificationStatus,
     NotificationType,
 )
+from app.models.notification_counters import NotificationCounters  # noqa: E402, F401
+from app.models.notification_digest import NotificationDigest  # noqa: E402, F401
+from app.models.notification_state import NotificationState  # noqa: E402, F401
 from app.models.user import User  # noqa: E402, F401
+from app.models.weather_change import WeatherChange  # noqa: E402, F401
 from app.models.weather_data import ClimateEventType, WeatherData  # noqa: E402, F401
@@ -7,6 +7,7 @@ from sqlalchemy import (
     CheckConstraint,
     DateTime,
     ForeignKey,
+    Index,
     Numeric,
     String,
     UniqueConstraint,
@@ -27,6 +28,7 @@ class AlertConfig(Base):
     __table_args__ = (
         UniqueConstraint("field_id", "event_type", name="uq_alert_field_event"),
         CheckConstraint("threshold >= 0 AND threshold <= 1", name="chk_alert_threshold"),
+        Index("ix_alert_updated_at", "updated_at"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -0,0 +1,29 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models import Base
+
+
+class EvaluationState(Base):
+    """Bookkeeping for one evaluation scope (``"all"`` or ``"shard:<i>/<n>"``)."""
+
+    __tablename__ = "evaluation_state"
+
+    scope: Mapped[str] = mapped_column(String(100), primary_key=True)
+    node_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    last_started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_completed_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    # In-progress run (EVAL_CHECKPOINT): start time and last committed key
+    run_started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    checkpoint_alert_config_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True
+    )
+    checkpoint_weather_data_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), nullable=True
+    )
@@ -2,7 +2,17 @@ import enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import CheckConstraint, DateTime, ForeignKey, Index, Numeric, String, Text, func
+from sqlalchemy import (
+    CheckConstraint,
+    DateTime,
+    ForeignKey,
+    Index,
+    Numeric,
+    String,
+    Text,
+    func,
+    text,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -21,12 +31,36 @@ class NotificationStatus(enum.StrEnum):
     PENDING = "pending"
     DELIVERED = "delivered"
     FAILED = "failed"
+    # Sent as part of a NotificationDigest (EVAL_DIGEST); not dispatched on its own
+    DIGESTED = "digested"
 
 
 class Notification(Base):
     __tablename__ = "notifications"
     __table_args__ = (
         Index("ix_notification_lookup", "alert_config_id", "weather_data_id", "triggered_at"),
+        # User feed (ORDER BY triggered_at DESC, id DESC) as one index range scan
+        Index(
+            "ix_notification_user_feed",
+            "user_id",
+            text("triggered_at DESC"),
+            text("id DESC"),
+        ),
+        # Outbox queue: the dispatcher claims pending rows oldest first
+        Index(
+            "ix_notification_pending",
+            "triggered_at",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+        # Rows of a digest run not yet grouped into their user's digest
+        Index(
+            "ix_notification_undigested",
+            "user_id",
+            "triggered_at",
+            postgresql_where=text("status = 'digested' AND digest_id IS NULL"),
+            sqlite_where=text("status = 'digested' AND digest_id IS NULL"),
+        ),
         CheckConstraint(
             "probability_at_notification >= 0 AND probability_at_notification <= 1",
             name="chk_notification_probability",
@@ -40,6 +74,13 @@ class Notification(Base):
     weather_data_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("weather_data.id"), nullable=False
     )
+    # Denormalized at write time so the feed survives alert deletion and needs no join
+    field_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("fields.id"), nullable=False
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
+    )
     notification_type: Mapped[str] = mapped_column(String(50), nullable=False)
     probability_at_notification: Mapped[float] = mapped_column(Numeric(3, 2), nullable=False)
     previous_notification_id: Mapped[uuid.UUID | None] = mapped_column(
@@ -53,3 +94,11 @@ class Notification(Base):
         DateTime(timezone=True), server_default=func.now()
     )
     delivered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Dispatcher lease: pending rows claimed since then are being sent
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    digest_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("notification_digests.id", ondelete="SET NULL"),
+        index=True,
+        nullable=True,
+    )
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, CheckConstraint, DateTime, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models import Base
+
+
+class NotificationCounters(Base):
+    """Running notification totals behind ``GET /jobs/stats`` (a single row, ``id = 1``).
+
+    Kept up to date by every write that creates notifications or changes
+    their status, in the same transaction; see
+    :mod:`app.services.notification_counters`.
+    """
+
+    __tablename__ = "notification_counters"
+    __table_args__ = (CheckConstraint("id = 1", name="ck_notification_counters_single_row"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, default=1)
+    total: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    pending: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    delivered: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    failed: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    digested: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    last_triggered_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    reconciled_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
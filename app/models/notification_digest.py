@@ -0,0 +1,44 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models import Base
+from app.models.notification import NotificationStatus
+
+
+class NotificationDigest(Base):
+    """One consolidated message for a user's notifications of an evaluation run.
+
+    Written with ``EVAL_DIGEST`` enabled by
+    :func:`app.services.notification_digest.build_digests`; the member
+    notifications point at it through ``digest_id`` and follow its delivery
+    status.
+    """
+
+    __tablename__ = "notification_digests"
+    __table_args__ = (
+        # The dispatcher claims pending digests like pending notifications
+        Index(
+            "ix_notification_digest_pending",
+            "created_at",
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'"),
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), index=True, nullable=False
+    )
+    notification_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    message: Mapped[str] = mapped_column(Text, nullable=False)
+    status: Mapped[str] = mapped_column(
+        String(20), nullable=False, default=NotificationStatus.PENDING.value
+    )
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    delivered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Dispatcher lease, as on Notification
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,32 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Numeric, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models import Base
+
+
+class NotificationState(Base):
+    """Latest notification per (alert_config, weather_data) pair.
+
+    Maintained by the evaluator in the same transaction as the notifications
+    it writes, so evaluation joins one row per active pair instead of ranking
+    the full notification history.
+    """
+
+    __tablename__ = "notification_state"
+
+    alert_config_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("alert_configs.id", ondelete="CASCADE"), primary_key=True
+    )
+    weather_data_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("weather_data.id", ondelete="CASCADE"), primary_key=True
+    )
+    notification_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("notifications.id", ondelete="SET NULL"), nullable=True
+    )
+    notification_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    probability_at_notification: Mapped[float] = mapped_column(Numeric(3, 2), nullable=False)
+    triggered_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,26 @@
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, ForeignKey, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models import Base
+
+
+class WeatherChange(Base):
+    """Change feed: one row per forecast inserted or re-priced since the last drain.
+
+    Written by :func:`app.services.weather_changes.upsert_weather` in the same
+    statement/transaction as the upsert; repeated changes to a key collapse
+    into one row.  Consumers delete what they processed.
+    """
+
+    __tablename__ = "weather_changes"
+
+    field_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("fields.id", ondelete="CASCADE"), primary_key=True
+    )
+    event_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    event_type: Mapped[str] = mapped_column(String(50), primary_key=True)
+    changed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -17,6 +17,7 @@ from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models import Base
+from app.sql_functions import statement_now
 
 
 class ClimateEventType(enum.StrEnum):
@@ -34,6 +35,7 @@ class WeatherData(Base):
         UniqueConstraint("field_id", "event_date", "event_type", name="uq_weather_field_date_type"),
         CheckConstraint("probability >= 0 AND probability <= 1", name="chk_weather_probability"),
         Index("ix_weather_event_date", "event_date"),
+        Index("ix_weather_updated_at", "updated_at"),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -44,6 +46,8 @@ class WeatherData(Base):
     event_type: Mapped[str] = mapped_column(String(50), nullable=False)
     probability: Mapped[float] = mapped_column(Numeric(3, 2), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # Compared against the incremental watermark: stamped when the row is
+    # written, not when a long-running ingest transaction began
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+        DateTime(timezone=True), server_default=statement_now(), onupdate=statement_now()
     )
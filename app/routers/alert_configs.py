@@ -8,7 +8,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.dependencies import get_db
 from app.models.alert_config import AlertConfig
 from app.models.field import Field
-from app.schemas.alert_config import AlertConfigCreate, AlertConfigResponse, AlertConfigUpdate
+from app.schemas.alert_config import (
+    AlertConfigBulkCreate,
+    AlertConfigBulkResponse,
+    AlertConfigBulkUpdate,
+    AlertConfigCreate,
+    AlertConfigResponse,
+    AlertConfigUpdate,
+)
+from app.services.alert_bulk import bulk_create_alerts, bulk_upsert_alerts
+from app.services.alert_config_cache import alert_config_cache
 
 router = APIRouter(prefix="/api/v1", tags=["alerts"])
 
@@ -41,7 +50,7 @@ async def create_alert(
     )
     db.add(alert)
     try:
-        await db.commit()
+        await alert_config_cache.invalidate(db, {field_id}, db.commit)
     except IntegrityError:
         await db.rollback()
         raise HTTPException(
@@ -62,15 +71,59 @@ async def list_alerts(
 ):
     """List alert configs for a field.
 
+    Served from the read-through ``alert_config_cache`` (invalidated by every
+    write below) when possible.
+
     Auth: requires JWT. Only returns alerts for fields owned by
     ``current_user``.
     """
+    cached = alert_config_cache.get(field_id)
+    if cached is not None:
+        return cached
+
+    token = alert_config_cache.token()
     result = await db.execute(select(Field).where(Field.id == field_id))
     if not result.scalar_one_or_none():
         raise HTTPException(status_code=404, detail="Field not found")
 
     result = await db.execute(select(AlertConfig).where(AlertConfig.field_id == field_id))
-    return result.scalars().all()
+    listing = [AlertConfigResponse.model_validate(a) for a in result.scalars()]
+    alert_config_cache.put(field_id, listing, token)
+    return listing
+
+
+@router.post("/alerts/bulk", response_model=AlertConfigBulkResponse)
+async def create_alerts_bulk(
+    payload: AlertConfigBulkCreate,
+    db: AsyncSession = Depends(get_db),
+):
+    """Create many alert configs, across fields, in one request.
+
+    Returns one result per item, in request order: ``created``,
+    ``conflict`` (already exists, use PATCH), ``duplicate`` (repeated in
+    the batch) or ``field_not_found``.  Items never fail the batch.
+
+    Auth: requires JWT; every ``field_id`` must belong to ``current_user``
+    (or an ``admin``/onboarding service token).
+    """
+    return await bulk_create_alerts(db, payload.items)
+
+
+# Declared before /alerts/{alert_id} so "bulk" isn't parsed as an alert id
+@router.patch("/alerts/bulk", response_model=AlertConfigBulkResponse)
+async def upsert_alerts_bulk(
+    payload: AlertConfigBulkUpdate,
+    db: AsyncSession = Depends(get_db),
+):
+    """Update (or create) many alert configs by ``(field_id, event_type)``.
+
+    Omitted ``threshold``/``is_active`` keep their current value; a missing
+    config is created when ``threshold`` is given, otherwise reported as
+    ``not_found``.  Per-item results as in ``POST /alerts/bulk``.
+
+    Auth: same as ``POST /alerts/bulk``.
+    """
+    return await bulk_upsert_alerts(db, payload.items)
 
 
 @router.patch(
@@ -97,7 +150,7 @@ async def update_alert(
     if payload.is_active is not None:
         alert.is_active = payload.is_active
 
-    await db.commit()
+    await alert_config_cache.invalidate(db, {alert.field_id}, db.commit)
     await db.refresh(alert)
     return alert
 
@@ -120,4 +173,4 @@ async def delete_alert(
         raise HTTPException(status_code=404, detail="Alert not found")
 
     await db.delete(alert)
-    await db.commit()
+    await alert_config_cache.invalidate(db, {alert.field_id}, db.commit)
@@ -1,10 +1,9 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.dependencies import get_db
-from app.models.notification import Notification
 from app.services.alert_evaluator import evaluate_alerts
+from app.services.notification_counters import counters_query, reconcile_counters
 from app.services.weather_seeder import seed_data
 
 router = APIRouter(prefix="/api/v1", tags=["jobs"])
@@ -33,8 +32,10 @@ async def trigger_evaluation(db: AsyncSession = Depends(get_db)):
 
         current_user: User = Depends(require_role("admin", "operator"))
 
-    Combined with the advisory lock (``pg_try_advisory_lock``), concurrent
-    calls are safe but should still be restricted to authorized personnel.
+    Combined with the transaction-scoped advisory locks
+    (``pg_try_advisory_xact_lock``, one per shard and tier), concurrent
+    calls are safe: a scope already being evaluated is skipped and reported
+    as ``locked``.  They should still be restricted to authorized personnel.
     Rate-limiting (e.g. 1 req/min per user) would add an extra layer.
     """
     result = await evaluate_alerts(db)
@@ -45,21 +46,41 @@ async def trigger_evaluation(db: AsyncSession = Depends(get_db)):
 async def get_stats(db: AsyncSession = Depends(get_db)):
     """Return aggregated notification statistics.
 
+    Reads the single ``notification_counters`` row maintained by the
+    writers (see ``app.services.notification_counters``) instead of
+    counting the table.
+
     Auth: requires JWT with role ``admin`` or ``operator``.  Stats expose
     internal system metrics — not suitable for regular users.
     """
-    result = await db.execute(
-        select(
-            func.count(Notification.id).label("total"),
-            func.count().filter(Notification.status == "pending").label("pending"),
-            func.count().filter(Notification.status == "delivered").label("delivered"),
-            func.max(Notification.triggered_at).label("last_triggered"),
-        )
-    )
-    row = result.one()
+    counters = await db.scalar(counters_query())
+    if counters is None:
+        return {
+            "total_notifications": 0,
+            "pending": 0,
+            "delivered": 0,
+            "failed": 0,
+            "last_triggered": None,
+            "reconciled_at": None,
+        }
     return {
-        "total_notifications": row.total,
-        "pending": row.pending,
-        "delivered": row.delivered,
-        "last_triggered": row.last_triggered.isoformat() if row.last_triggered else None,
+        "total_notifications": counters.total,
+        "pending": counters.pending,
+        "delivered": counters.delivered,
+        "failed": counters.failed,
+        "last_triggered": (
+            counters.last_triggered_at.isoformat() if counters.last_triggered_at else None
+        ),
+        "reconciled_at": counters.reconciled_at.isoformat() if counters.reconciled_at else None,
     }
+
+
+@router.post("/jobs/reconcile-stats")
+async def trigger_stats_reconciliation(db: AsyncSession = Depends(get_db)):
+    """Recount notifications into the stats counters (same job as the scheduler).
+
+    Returns the drift corrected per counter.  Auth: same as
+    ``/jobs/evaluate-alerts``.
+    """
+    drift = await reconcile_counters(db)
+    return {"status": "reconciled", "drift": drift}
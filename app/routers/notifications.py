@@ -1,19 +1,80 @@
+import base64
+import binascii
 import uuid
 from datetime import UTC, datetime
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.dependencies import get_db
-from app.models.alert_config import AlertConfig
-from app.models.field import Field
 from app.models.notification import Notification, NotificationStatus, NotificationType
 from app.models.user import User
-from app.schemas.notification import NotificationResponse
+from app.schemas.notification import (
+    DeliveryAckBatch,
+    DeliveryAckResponse,
+    NotificationResponse,
+)
+from app.services.notification_counters import apply_counters, status_changes
+from app.services.notification_delivery import mark_deliveries
+from app.services.notification_export import (
+    EXPORT_MEDIA_TYPES,
+    ExportFormat,
+    export_notifications,
+    export_query,
+)
 
 router = APIRouter(prefix="/api/v1", tags=["notifications"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+FeedCursor = tuple[datetime, uuid.UUID]
+
+
+def encode_cursor(triggered_at: datetime, notification_id: uuid.UUID) -> str:
+    """Opaque cursor pointing just after ``(triggered_at, id)`` in the feed order."""
+    raw = f"{triggered_at.isoformat()}|{notification_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> FeedCursor:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        triggered_at, notification_id = raw.split("|")
+        return datetime.fromisoformat(triggered_at), uuid.UUID(notification_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+def user_notifications_query(
+    user_id: uuid.UUID,
+    type: NotificationType | None = None,
+    limit: int = 20,
+    offset: int = 0,
+    after: FeedCursor | None = None,
+) -> Select:
+    """Newest-first notifications of a user's fields (also used by the plan checks).
+
+    Filters on the denormalized ``user_id``, so it is a single range scan of
+    ``ix_notification_user_feed`` and keeps notifications whose alert config
+    was deleted.  ``after`` continues from a cursor (keyset pagination on
+    ``(triggered_at, id)``) instead of skipping ``offset`` rows.
+    """
+    stmt = select(Notification).where(Notification.user_id == user_id)
+
+    if type is not None:
+        stmt = stmt.where(Notification.notification_type == type.value)
+
+    if after is not None:
+        stmt = stmt.where(tuple_(Notification.triggered_at, Notification.id) < after)
+
+    return (
+        stmt.order_by(Notification.triggered_at.desc(), Notification.id.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+
 
 @router.get(
     "/users/{user_id}/notifications",
@@ -21,13 +82,21 @@ router = APIRouter(prefix="/api/v1", tags=["notifications"])
 )
 async def list_notifications(
     user_id: uuid.UUID,
+    response: Response,
     type: NotificationType | None = Query(default=None),
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None),
     db: AsyncSession = Depends(get_db),
 ):
     """List active notifications for a user with optional type filter and pagination.
 
+    Pagination: when more rows follow, the ``X-Next-Cursor`` response header
+    carries an opaque cursor; pass it back as ``?cursor=`` for the next page.
+    Unlike ``offset`` it costs the same at any depth and doesn't skip or
+    repeat rows when new notifications arrive.  ``offset`` still works but
+    can't be combined with ``cursor``.
+
     Auth: requires JWT. ``user_id`` in path must match ``current_user.id``
     — users can only see their own notifications.  An admin role could
     bypass this restriction for support/debugging.
@@ -36,21 +105,48 @@ async def list_notifications(
     if not result.scalar_one_or_none():
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Subquery: field IDs belonging to this user
-    user_field_ids = select(Field.id).where(Field.user_id == user_id).scalar_subquery()
+    if cursor is not None and offset:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset, not both")
+    after = decode_cursor(cursor) if cursor is not None else None
 
-    stmt = (
-        select(Notification)
-        .join(AlertConfig, AlertConfig.id == Notification.alert_config_id)
-        .where(AlertConfig.field_id.in_(user_field_ids))
-    )
+    # One extra row tells whether there is a next page
+    result = await db.execute(user_notifications_query(user_id, type, limit + 1, offset, after))
+    notifications = list(result.scalars())
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        last = notifications[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.triggered_at, last.id)
+    return notifications
 
-    if type is not None:
-        stmt = stmt.where(Notification.notification_type == type.value)
 
-    stmt = stmt.order_by(Notification.triggered_at.desc()).limit(limit).offset(offset)
-    result = await db.execute(stmt)
-    return result.scalars().all()
+@router.get("/users/{user_id}/notifications/export")
+async def export_user_notifications(
+    user_id: uuid.UUID,
+    format: ExportFormat = Query(default="ndjson"),
+    type: NotificationType | None = Query(default=None),
+    field_id: uuid.UUID | None = Query(default=None),
+    since: datetime | None = Query(default=None),
+    until: datetime | None = Query(default=None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream a user's full notification history, oldest first, as NDJSON or CSV.
+
+    No ``limit``: rows are read through a server-side cursor and written as
+    they arrive, so the response starts immediately and memory stays flat.
+    ``field_id`` and the ``[since, until)`` window narrow the export.
+
+    Auth: same as the list — ``user_id`` must match ``current_user.id``.
+    """
+    result = await db.execute(select(User).where(User.id == user_id))
+    if not result.scalar_one_or_none():
+        raise HTTPException(status_code=404, detail="User not found")
+
+    stmt = export_query(user_id, type, field_id, since, until)
+    return StreamingResponse(
+        export_notifications(db, stmt, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="notifications-{user_id}.{format}"'},
+    )
 
 
 @router.patch(
@@ -67,13 +163,44 @@ async def deliver_notification(
     is designed for internal services (SMS gateway, push notification
     provider) to confirm delivery — not for end users.
     """
-    result = await db.execute(select(Notification).where(Notification.id == notification_id))
+    result = await db.execute(
+        select(Notification).where(Notification.id == notification_id).with_for_update()
+    )
     notification = result.scalar_one_or_none()
     if not notification:
         raise HTTPException(status_code=404, detail="Notification not found")
 
+    await apply_counters(
+        db, status_changes([(notification.status, NotificationStatus.DELIVERED.value)])
+    )
     notification.status = NotificationStatus.DELIVERED.value
     notification.delivered_at = datetime.now(UTC)
     await db.commit()
     await db.refresh(notification)
     return notification
+
+
+@router.post("/notifications/deliver", response_model=DeliveryAckResponse)
+async def deliver_notifications(
+    payload: DeliveryAckBatch,
+    db: AsyncSession = Depends(get_db),
+):
+    """Acknowledge a batch of deliveries (``delivered`` by default, or ``failed``).
+
+    One ``UPDATE ... WHERE id = ANY(...) RETURNING`` for the whole batch;
+    ids that match no notification come back in ``unknown_ids``.  A repeated
+    ``delivered`` ack keeps the first ``delivered_at``; if an id is repeated
+    in the batch, its last status wins.
+
+    Auth: same as ``PATCH /notifications/{id}/deliver`` (``service`` or ``admin``).
+    """
+    statuses = {ack.id: NotificationStatus(ack.status) for ack in payload.items}
+    updated = await mark_deliveries(db, statuses)
+    await db.commit()
+
+    found = {row.id for row in updated}
+    return DeliveryAckResponse(
+        delivered=sum(row.status == NotificationStatus.DELIVERED for row in updated),
+        failed=sum(row.status == NotificationStatus.FAILED for row in updated),
+        unknown_ids=[id_ for id_ in statuses if id_ not in found],
+    )
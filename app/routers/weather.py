@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dependencies import get_db
+from app.services.weather_ingest import IngestFormat, IngestFormatError, ingest_weather
+
+router = APIRouter(prefix="/api/v1", tags=["weather"])
+
+INGEST_CONTENT_TYPES: dict[str, IngestFormat] = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+
+@router.post("/weather/batch")
+async def ingest_weather_batch(request: Request, db: AsyncSession = Depends(get_db)):
+    """Bulk upsert forecasts from an NDJSON or CSV body.
+
+    Each record carries ``field_id``, ``event_date``, ``event_type`` and
+    ``probability`` (CSV needs a header row with those columns).  The body is
+    streamed into a staging table and merged in one statement; invalid lines
+    and lines for unknown fields are skipped and reported as ``rejected``
+    (first 20 in ``errors``) instead of failing the batch.
+
+    Auth: requires JWT with role ``admin`` or a service token for the
+    forecast provider — this overwrites forecasts for any field.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = INGEST_CONTENT_TYPES.get(content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Use one of: {', '.join(INGEST_CONTENT_TYPES)}",
+        )
+    try:
+        report = await ingest_weather(db, request.stream(), fmt)
+    except IngestFormatError as exc:
+        await db.rollback()
+        raise HTTPException(status_code=422, detail=str(exc)) from None
+    return {"status": "merged", **report}
@@ -1,8 +1,10 @@
+import enum
 import uuid
 from datetime import datetime
 
 from pydantic import BaseModel, Field
 
+from app.config import settings
 from app.models.weather_data import ClimateEventType
 
 
@@ -26,3 +28,51 @@ class AlertConfigResponse(BaseModel):
     updated_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class AlertConfigBulkCreateItem(AlertConfigCreate):
+    field_id: uuid.UUID
+
+
+class AlertConfigBulkUpdateItem(AlertConfigUpdate):
+    """Upsert by ``(field_id, event_type)``; ``threshold`` is required to create."""
+
+    field_id: uuid.UUID
+    event_type: ClimateEventType
+
+
+class AlertConfigBulkCreate(BaseModel):
+    items: list[AlertConfigBulkCreateItem] = Field(
+        min_length=1, max_length=settings.ALERT_BULK_MAX_ITEMS
+    )
+
+
+class AlertConfigBulkUpdate(BaseModel):
+    items: list[AlertConfigBulkUpdateItem] = Field(
+        min_length=1, max_length=settings.ALERT_BULK_MAX_ITEMS
+    )
+
+
+class BulkItemStatus(enum.StrEnum):
+    CREATED = "created"
+    UPDATED = "updated"
+    # POST: the field already has an alert for this event type
+    CONFLICT = "conflict"
+    # Same (field_id, event_type) earlier in the batch; only the first is applied
+    DUPLICATE = "duplicate"
+    FIELD_NOT_FOUND = "field_not_found"
+    # PATCH without threshold for an alert that doesn't exist yet
+    NOT_FOUND = "not_found"
+
+
+class AlertConfigBulkItemResult(BaseModel):
+    index: int
+    field_id: uuid.UUID
+    event_type: str
+    status: BulkItemStatus
+    alert: AlertConfigResponse | None = None
+
+
+class AlertConfigBulkResponse(BaseModel):
+    counts: dict[BulkItemStatus, int]
+    results: list[AlertConfigBulkItemResult]
@@ -1,9 +1,11 @@
 import uuid
 from datetime import datetime
+from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from app.models.notification import NotificationType
+from app.config import settings
+from app.models.notification import NotificationStatus, NotificationType
 
 
 class NotificationResponse(BaseModel):
@@ -17,6 +19,7 @@ class NotificationResponse(BaseModel):
     message: str
     triggered_at: datetime
     delivered_at: datetime | None
+    digest_id: uuid.UUID | None = None
 
     model_config = {"from_attributes": True}
 
@@ -25,3 +28,20 @@ class NotificationListParams(BaseModel):
     type: NotificationType | None = None
     limit: int = 20
     offset: int = 0
+
+
+class DeliveryAck(BaseModel):
+    id: uuid.UUID
+    status: Literal[NotificationStatus.DELIVERED, NotificationStatus.FAILED] = (
+        NotificationStatus.DELIVERED
+    )
+
+
+class DeliveryAckBatch(BaseModel):
+    items: list[DeliveryAck] = Field(min_length=1, max_length=settings.DELIVERY_ACK_MAX_ITEMS)
+
+
+class DeliveryAckResponse(BaseModel):
+    delivered: int
+    failed: int
+    unknown_ids: list[uuid.UUID]
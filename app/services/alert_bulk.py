@@ -0,0 +1,181 @@
+"""Bulk alert-config writes for ``POST``/``PATCH /api/v1/alerts/bulk``.
+
+Onboarding a cooperative means thousands of (field, event type) configs;
+one request per config is one field lookup, commit and refresh each.  Here
+a whole batch costs one query validating its field ids (a single array
+parameter), (for PATCH) lookups of the configs it touches and multi-row
+``INSERT ... ON CONFLICT`` statements, both ``BULK_STATEMENT_ROWS`` items at a
+time to stay under the driver's bind parameter limit, all committed
+together.
+
+Problems are reported per item (see :class:`BulkItemStatus`) instead of
+failing the batch: POST leaves existing configs alone (``conflict``), PATCH
+upserts them by ``(field_id, event_type)``.
+"""
+
+import uuid
+from collections import Counter
+from collections.abc import Iterator, Sequence
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.alert_config import AlertConfig
+from app.models.field import Field
+from app.schemas.alert_config import (
+    AlertConfigBulkCreateItem,
+    AlertConfigBulkItemResult,
+    AlertConfigBulkResponse,
+    AlertConfigBulkUpdateItem,
+    AlertConfigResponse,
+    BulkItemStatus,
+)
+from app.services.alert_config_cache import alert_config_cache
+from app.sql_functions import any_of, upsert
+
+# At most 5 bind parameters per row; asyncpg allows 32767 per statement
+BULK_STATEMENT_ROWS = 5000
+
+AlertKey = tuple[uuid.UUID, str]
+BulkItem = AlertConfigBulkCreateItem | AlertConfigBulkUpdateItem
+
+
+def _batches(rows: list) -> Iterator[list]:
+    for start in range(0, len(rows), BULK_STATEMENT_ROWS):
+        yield rows[start : start + BULK_STATEMENT_ROWS]
+
+
+async def _existing_fields(session: AsyncSession, items: Sequence[BulkItem]) -> set[uuid.UUID]:
+    field_ids = {item.field_id for item in items}
+    return set(await session.scalars(select(Field.id).where(any_of(session, Field.id, field_ids))))
+
+
+def _triage(
+    items: Sequence[BulkItem], fields: set[uuid.UUID]
+) -> tuple[dict[int, BulkItemStatus], dict[AlertKey, int]]:
+    """Statuses decided before writing, and the index of each item left to write."""
+    statuses: dict[int, BulkItemStatus] = {}
+    pending: dict[AlertKey, int] = {}
+    for index, item in enumerate(items):
+        key = (item.field_id, item.event_type.value)
+        if item.field_id not in fields:
+            statuses[index] = BulkItemStatus.FIELD_NOT_FOUND
+        elif key in pending:
+            statuses[index] = BulkItemStatus.DUPLICATE
+        else:
+            pending[key] = index
+    return statuses, pending
+
+
+def _response(
+    items: Sequence[BulkItem],
+    statuses: dict[int, BulkItemStatus],
+    alerts: dict[int, AlertConfig],
+) -> AlertConfigBulkResponse:
+    results = [
+        AlertConfigBulkItemResult(
+            index=index,
+            field_id=item.field_id,
+            event_type=item.event_type.value,
+            status=statuses[index],
+            alert=AlertConfigResponse.model_validate(alerts[index]) if index in alerts else None,
+        )
+        for index, item in enumerate(items)
+    ]
+    return AlertConfigBulkResponse(counts=Counter(statuses.values()), results=results)
+
+
+async def bulk_create_alerts(
+    session: AsyncSession, items: Sequence[AlertConfigBulkCreateItem]
+) -> AlertConfigBulkResponse:
+    """Insert new configs; ones that already exist are reported as ``conflict``."""
+    statuses, pending = _triage(items, await _existing_fields(session, items))
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "field_id": field_id,
+            "event_type": event_type,
+            "threshold": items[index].threshold,
+            "is_active": True,
+        }
+        for (field_id, event_type), index in pending.items()
+    ]
+
+    alerts: dict[int, AlertConfig] = {}
+    for batch in _batches(rows):
+        stmt = (
+            upsert(session, AlertConfig)
+            .values(batch)
+            .on_conflict_do_nothing(index_elements=["field_id", "event_type"])
+            .returning(AlertConfig)
+        )
+        for alert in await session.scalars(stmt):
+            alerts[pending[(alert.field_id, alert.event_type)]] = alert
+
+    for index in pending.values():
+        statuses[index] = BulkItemStatus.CREATED if index in alerts else BulkItemStatus.CONFLICT
+
+    created_fields = {alert.field_id for alert in alerts.values()}
+    await alert_config_cache.invalidate(session, created_fields, session.commit)
+    return _response(items, statuses, alerts)
+
+
+async def bulk_upsert_alerts(
+    session: AsyncSession, items: Sequence[AlertConfigBulkUpdateItem]
+) -> AlertConfigBulkResponse:
+    """Update configs by ``(field_id, event_type)``, creating those given a ``threshold``.
+
+    Omitted ``threshold``/``is_active`` keep their current value.
+    """
+    statuses, pending = _triage(items, await _existing_fields(session, items))
+    current: dict[AlertKey, AlertConfig] = {}
+    # Two bind parameters per key: look them up a statement-sized batch at a time
+    for keys in _batches(list(pending)):
+        stmt = select(AlertConfig).where(
+            tuple_(AlertConfig.field_id, AlertConfig.event_type).in_(keys)
+        )
+        current.update({(a.field_id, a.event_type): a for a in await session.scalars(stmt)})
+
+    rows = []
+    for key, index in list(pending.items()):
+        item, existing = items[index], current.get(key)
+        if existing is None and item.threshold is None:
+            statuses[index] = BulkItemStatus.NOT_FOUND
+            del pending[key]
+            continue
+        statuses[index] = BulkItemStatus.UPDATED if existing else BulkItemStatus.CREATED
+        rows.append(
+            {
+                "id": existing.id if existing else uuid.uuid4(),
+                "field_id": key[0],
+                "event_type": key[1],
+                "threshold": item.threshold if item.threshold is not None else existing.threshold,
+                "is_active": (
+                    item.is_active
+                    if item.is_active is not None
+                    else (existing.is_active if existing else True)
+                ),
+            }
+        )
+
+    alerts: dict[int, AlertConfig] = {}
+    for batch in _batches(rows):
+        stmt = upsert(session, AlertConfig).values(batch)
+        stmt = (
+            stmt.on_conflict_do_update(
+                index_elements=["field_id", "event_type"],
+                set_={
+                    "threshold": stmt.excluded.threshold,
+                    "is_active": stmt.excluded.is_active,
+                    "updated_at": func.now(),
+                },
+            )
+            .returning(AlertConfig)
+            .execution_options(populate_existing=True)
+        )
+        for alert in await session.scalars(stmt):
+            alerts[pending[(alert.field_id, alert.event_type)]] = alert
+
+    written_fields = {alert.field_id for alert in alerts.values()}
+    await alert_config_cache.invalidate(session, written_fields, session.commit)
+    return _response(items, statuses, alerts)
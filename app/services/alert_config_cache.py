@@ -0,0 +1,210 @@
+"""Read-through cache of ``GET /fields/{field_id}/alerts`` listings.
+
+Mobile clients re-list a field's alerts on every screen open; each listing
+costs two queries (field existence + configs).  :class:`AlertConfigCache`
+keeps the serialized listing per ``field_id`` in process, bounded by
+``ALERT_CACHE_TTL_SECONDS`` and an LRU of ``ALERT_CACHE_MAX_FIELDS`` entries.
+Unknown fields (404) are never cached.
+
+Writes go through :meth:`AlertConfigCache.invalidate`: it runs the
+backend's ``publish`` in the writer's transaction and evicts the local entry
+once the transaction has committed.  A listing read before an invalidation
+is not stored if it completes after it (``token``/``put``), so a slow
+reader can't put back the old list.
+
+Backends (``ALERT_CACHE_BACKEND``):
+
+- ``local``: invalidations only reach this process;
+- ``postgres``: ``pg_notify`` on ``alert_config_invalidations`` inside the
+  write transaction, so the event is only delivered if the write commits.
+  Every replica runs an :class:`AlertCacheInvalidationListener` and evicts
+  the field.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Collection, Sequence
+from typing import Protocol
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import metrics
+from app.config import settings
+from app.schemas.alert_config import AlertConfigResponse
+
+logger = logging.getLogger(__name__)
+
+ALERT_INVALIDATIONS_CHANNEL = "alert_config_invalidations"
+RECONNECT_DELAY_SECONDS = 5.0
+
+AlertListing = tuple[AlertConfigResponse, ...]
+
+
+class InvalidationBackend(Protocol):
+    async def publish(self, session: AsyncSession, field_ids: Collection[uuid.UUID]) -> None: ...
+
+
+class LocalInvalidation:
+    """Single-process deployments: nothing to tell other replicas."""
+
+    async def publish(self, session: AsyncSession, field_ids: Collection[uuid.UUID]) -> None:
+        return None
+
+
+class PostgresInvalidation:
+    """Transactional ``NOTIFY``: delivered to every listener only on commit."""
+
+    async def publish(self, session: AsyncSession, field_ids: Collection[uuid.UUID]) -> None:
+        # One notification per field, all in a single round trip
+        await session.execute(
+            text("SELECT pg_notify(:channel, f::text) FROM unnest(CAST(:field_ids AS uuid[])) f"),
+            {"channel": ALERT_INVALIDATIONS_CHANNEL, "field_ids": list(field_ids)},
+        )
+
+
+class AlertConfigCache:
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        backend: InvalidationBackend | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.backend: InvalidationBackend = backend or LocalInvalidation()
+        self._clock = clock
+        self._entries: OrderedDict[uuid.UUID, tuple[float, AlertListing]] = OrderedDict()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, field_id: uuid.UUID) -> AlertListing | None:
+        entry = self._entries.get(field_id)
+        if entry is not None and entry[0] > self._clock():
+            self._entries.move_to_end(field_id)
+            self.hits += 1
+            metrics.observe_alert_cache("hit")
+            return entry[1]
+        if entry is not None:
+            del self._entries[field_id]
+        self.misses += 1
+        metrics.observe_alert_cache("miss")
+        return None
+
+    def token(self) -> int:
+        """Taken before reading the database; hand it back to :meth:`put`."""
+        return self._generation
+
+    def put(self, field_id: uuid.UUID, listing: Sequence[AlertConfigResponse], token: int) -> None:
+        # An invalidation since the read started: the listing may predate it
+        if not self.enabled or token != self._generation:
+            return
+        self._entries[field_id] = (self._clock() + self.ttl_seconds, tuple(listing))
+        self._entries.move_to_end(field_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def evict(self, field_id: uuid.UUID) -> None:
+        self._generation += 1
+        self._entries.pop(field_id, None)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    async def invalidate(
+        self,
+        session: AsyncSession,
+        field_ids: Collection[uuid.UUID],
+        commit: Callable[[], Awaitable[None]],
+    ) -> None:
+        """Publish, run ``commit`` and evict ``field_ids``, even if the commit fails."""
+        if field_ids:
+            await self.backend.publish(session, field_ids)
+        try:
+            await commit()
+        finally:
+            for field_id in field_ids:
+                self.evict(field_id)
+
+
+class AlertCacheInvalidationListener:
+    """LISTENs on :data:`ALERT_INVALIDATIONS_CHANNEL` and evicts the notified fields.
+
+    Same connection handling as ``WeatherUpdateListener``: a dedicated
+    asyncpg connection, reconnected after ``RECONNECT_DELAY_SECONDS``.
+    The cache is cleared on every (re)connect, since invalidations sent while
+    disconnected were lost.
+    """
+
+    def __init__(self, dsn: str, cache: AlertConfigCache) -> None:
+        self._dsn = dsn
+        self._cache = cache
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def handle_payload(self, payload: str) -> None:
+        try:
+            field_id = uuid.UUID(payload)
+        except ValueError:
+            logger.warning(
+                "Ignoring malformed %s payload: %r", ALERT_INVALIDATIONS_CHANNEL, payload
+            )
+            return
+        self._cache.evict(field_id)
+
+    async def _listen_forever(self) -> None:
+        while True:
+            try:
+                await self._listen_once()
+            except Exception:
+                logger.exception("Alert cache invalidation listener failed")
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    async def _listen_once(self) -> None:
+        conn = await asyncpg.connect(self._dsn)
+        try:
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _conn: lost.set())
+            await conn.add_listener(
+                ALERT_INVALIDATIONS_CHANNEL,
+                lambda _conn, _pid, _channel, payload: self.handle_payload(payload),
+            )
+            self._cache.clear()
+            logger.info("Listening for alert cache invalidations")
+            await lost.wait()
+            logger.warning("Alert cache invalidation listener disconnected, reconnecting")
+        finally:
+            if not conn.is_closed():
+                await conn.close()
+
+
+alert_config_cache = AlertConfigCache(
+    settings.ALERT_CACHE_TTL_SECONDS,
+    settings.ALERT_CACHE_MAX_FIELDS,
+    PostgresInvalidation() if settings.ALERT_CACHE_BACKEND == "postgres" else None,
+)
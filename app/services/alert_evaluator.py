@@ -1,22 +1,67 @@
+import enum
 import logging
-from dataclasses import dataclass
+import operator
+import time
+import uuid
+import zlib
+from collections.abc import Collection, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import UTC, date, datetime, timedelta
-
-from sqlalchemy import and_, func, select, text
+from functools import reduce
+from string import Formatter
+
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    Float,
+    Row,
+    Select,
+    String,
+    and_,
+    case,
+    cast,
+    func,
+    insert,
+    literal,
+    null,
+    or_,
+    select,
+    text,
+    true,
+    tuple_,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import metrics
 from app.config import settings
 from app.models.alert_config import AlertConfig
+from app.models.evaluation_state import EvaluationState
 from app.models.field import Field
-from app.models.notification import Notification, NotificationType
+from app.models.notification import Notification, NotificationStatus, NotificationType
+from app.models.notification_state import NotificationState
 from app.models.weather_data import WeatherData
+from app.services.notification_counters import apply_counters
+from app.services.notification_digest import build_digests, hold_digest_writes
 from app.services.weather_seeder import EVENT_LABELS
+from app.sql_functions import any_of, field_shard, iso_date, new_uuid, percent, upsert
 
 logger = logging.getLogger(__name__)
 
 # Advisory lock ID for evaluation job (arbitrary constant)
 EVALUATION_LOCK_ID = 8675309
 
+
+class Tier(enum.StrEnum):
+    """Event-date horizon evaluated on its own schedule (``EVAL_URGENT_*`` settings)."""
+
+    URGENT = "urgent"  # D+0 .. D+EVAL_URGENT_HORIZON_DAYS
+    FAR = "far"  # everything after that
+
+
+# Each tier has its own lock so urgent runs never wait behind a far sweep
+TIER_LOCK_IDS = {Tier.URGENT: EVALUATION_LOCK_ID + 1, Tier.FAR: EVALUATION_LOCK_ID + 2}
+
 TEMPLATES = {
     "risk_increased": (
         "\u26a0\ufe0f Alerta: probabilidad de {event_label} {new_prob}% en campo {field_name} "
@@ -35,8 +80,11 @@ class NotificationAction:
     type: NotificationType
 
 
-def is_within_cooldown(prev_triggered: datetime, cooldown_hours: int) -> bool:
-    now = datetime.now(UTC)
+def is_within_cooldown(
+    prev_triggered: datetime, cooldown_hours: int, now: datetime | None = None
+) -> bool:
+    if now is None:
+        now = datetime.now(UTC)
     if prev_triggered.tzinfo is None:
         prev_triggered = prev_triggered.replace(tzinfo=UTC)
     return (now - prev_triggered) < timedelta(hours=cooldown_hours)
@@ -51,6 +99,7 @@ def determine_action(
     prev_triggered: datetime | None,
     delta_threshold: float,
     cooldown_hours: int,
+    now: datetime | None = None,
 ) -> NotificationAction | None:
     # No previous notification
     if not has_previous:
@@ -63,7 +112,7 @@ def determine_action(
         return NotificationAction(type=NotificationType.RISK_ENDED)
 
     # Cooldown check (risk_ended already handled above)
-    if prev_triggered and is_within_cooldown(prev_triggered, cooldown_hours):
+    if prev_triggered and is_within_cooldown(prev_triggered, cooldown_hours, now):
         return None
 
     # Case B: Still above, significant delta
@@ -124,73 +173,409 @@ def build_message(
     )
 
 
-async def _try_acquire_advisory_lock(session: AsyncSession) -> bool:
-    """Try to acquire a PostgreSQL advisory lock. Returns False if already held."""
+@dataclass(frozen=True)
+class EvaluationScope:
+    """Slice of the (alert_config, weather_data) space handled by one locked run."""
+
+    shard: int | None = None
+    shard_count: int = 1
+    tier: Tier | None = None
+    # Event-driven runs restricted to these fields; they leave evaluation_state alone
+    field_ids: frozenset[uuid.UUID] | None = None
+
+    @property
+    def name(self) -> str:
+        if self.field_ids is not None:
+            return "fields"
+        prefix = f"{self.tier}/" if self.tier is not None else ""
+        if self.shard is None:
+            return f"{prefix}all"
+        return f"{prefix}shard:{self.shard}/{self.shard_count}"
+
+
+# Phases timed separately in every run; "decide" and "render" happen inside
+# the INSERT with EVAL_STRATEGY=sql, so that strategy reports them as part of "flush".
+PHASES = ("query", "decide", "render", "flush", "commit")
+# Per-row outcome labels: a notification type, or "none" when nothing was sent
+ACTIONS = (*(t.value for t in NotificationType), "none")
+
+
+@dataclass
+class EvaluationStats:
+    """Counters and per-phase wall time accumulated during one scope run."""
+
+    evaluated: int = 0
+    created: int = 0
+    # Part of ``created`` already added to the notification counters
+    counted: int = 0
+    phases: dict[str, float] = field(default_factory=lambda: dict.fromkeys(PHASES, 0.0))
+    actions: dict[str, int] = field(default_factory=lambda: dict.fromkeys(ACTIONS, 0))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+
+    def count_actions(self, action_types: Sequence[str | None]) -> None:
+        for action_type in action_types:
+            self.actions[action_type or "none"] += 1
+
+
+def _sum_results(results: Sequence[dict]) -> dict:
+    """Add up the counters of several scope runs (shards or tiers)."""
+    totals = {"evaluated": 0, "notifications_created": 0, "skipped": 0, "write_s": 0.0}
+    phases = dict.fromkeys(PHASES, 0.0)
+    actions = dict.fromkeys(ACTIONS, 0)
+    for result in results:
+        for key in totals:
+            totals[key] += result.get(key, 0)
+        for name, seconds in result.get("phases", {}).items():
+            phases[name] += seconds
+        for name, rows in result.get("actions", {}).items():
+            actions[name] += rows
+    totals["write_s"] = round(totals["write_s"], 3)
+    return {
+        **totals,
+        "phases": {name: round(seconds, 3) for name, seconds in phases.items()},
+        "actions": actions,
+    }
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite returns naive datetimes even for DateTime(timezone=True)
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+def _initial_status() -> NotificationStatus:
+    """New notifications wait for their run's digest in ``EVAL_DIGEST`` mode."""
+    return NotificationStatus.DIGESTED if settings.EVAL_DIGEST else NotificationStatus.PENDING
+
+
+async def _count_created(session: AsyncSession, stats: EvaluationStats, now: datetime) -> None:
+    """Add the notifications written since the last commit to the stats counters."""
+    created = stats.created - stats.counted
+    if created:
+        await apply_counters(session, {_initial_status(): created}, created, now)
+        stats.counted = stats.created
+
+
+def _tiers_enabled() -> bool:
+    return settings.EVAL_URGENT_INTERVAL_MINUTES > 0
+
+
+async def _try_acquire_advisory_lock(
+    session: AsyncSession, shard: int | None = None, tier: Tier | None = None
+) -> bool:
+    """Try to acquire a PostgreSQL advisory lock. Returns False if already held.
+
+    Transaction-scoped (``pg_try_advisory_xact_lock``): it is released by the
+    commit/rollback that ends the run, even if the pool hands the session a
+    different connection afterwards.  Shards use the two-key form
+    ``(EVALUATION_LOCK_ID, shard)`` so each shard has its own lock; tiers swap
+    ``EVALUATION_LOCK_ID`` for their ``TIER_LOCK_IDS`` entry.
+    """
+    lock_id = TIER_LOCK_IDS[tier] if tier is not None else EVALUATION_LOCK_ID
     try:
-        result = await session.execute(text(f"SELECT pg_try_advisory_lock({EVALUATION_LOCK_ID})"))
+        if shard is None:
+            stmt = text("SELECT pg_try_advisory_xact_lock(:lock_id)").bindparams(lock_id=lock_id)
+        else:
+            stmt = text("SELECT pg_try_advisory_xact_lock(:lock_id, :shard)").bindparams(
+                lock_id=lock_id, shard=shard
+            )
+        result = await session.execute(stmt)
         return bool(result.scalar())
     except Exception:
         # Not PostgreSQL (e.g. SQLite in tests) — skip locking
         return True
 
 
-async def _release_advisory_lock(session: AsyncSession) -> None:
-    """Release the PostgreSQL advisory lock."""
-    try:
-        await session.execute(text(f"SELECT pg_advisory_unlock({EVALUATION_LOCK_ID})"))
-    except Exception:
-        pass  # Not PostgreSQL
+async def evaluate_alerts(
+    session: AsyncSession,
+    field_ids: Collection[uuid.UUID] | None = None,
+    tier: Tier | None = None,
+) -> dict:
+    """Run one evaluation cycle.
+
+    ``field_ids`` restricts it to those fields; ``tier`` to one event-date
+    horizon.  With tiers enabled and no ``tier`` given, every tier runs in
+    priority order (urgent first).  In ``EVAL_DIGEST`` mode the digests are
+    built once, after every shard and tier of the cycle has committed; a
+    sweep whose shards are still running elsewhere leaves that to the node
+    that completes the last one.
+    """
+    started_at = datetime.now(UTC)
+    result = await _evaluate(session, field_ids, tier)
+    if settings.EVAL_DIGEST and not result.get("locked"):
+        scopes = [] if field_ids is not None else _sweep_scopes(tier)
+        result["digests_created"] = await build_digests(
+            session, [scope.name for scope in scopes], started_at
+        )
+    return result
+
+
+def _sweep_scopes(tier: Tier | None) -> list[EvaluationScope]:
+    """Scopes a sweep of ``tier`` (every tier when None) completes."""
+    tiers: list[Tier | None] = [tier]
+    if tier is None and _tiers_enabled():
+        tiers = list(Tier)
+    shard_count = settings.EVAL_SHARD_COUNT
+    if shard_count <= 1:
+        return [EvaluationScope(tier=t) for t in tiers]
+    return [
+        EvaluationScope(shard=shard, shard_count=shard_count, tier=t)
+        for t in tiers
+        for shard in range(shard_count)
+    ]
+
+
+async def _evaluate(
+    session: AsyncSession,
+    field_ids: Collection[uuid.UUID] | None = None,
+    tier: Tier | None = None,
+) -> dict:
+    if field_ids is not None:
+        return await _evaluate_fields(session, frozenset(field_ids))
+
+    if tier is None and _tiers_enabled():
+        return await _evaluate_all_tiers(session)
+
+    start = time.monotonic()
+    if settings.EVAL_SHARD_COUNT > 1:
+        result = await _evaluate_sharded(session, settings.EVAL_SHARD_COUNT, tier)
+    else:
+        # Advisory lock: prevent concurrent evaluations
+        acquired = await _try_acquire_advisory_lock(session, tier=tier)
+        if not acquired:
+            await session.rollback()
+            logger.warning("Evaluation skipped — another instance is already running")
+            result = {"evaluated": 0, "notifications_created": 0, "skipped": 0, "locked": True}
+        else:
+            result = await _do_evaluate(session, EvaluationScope(tier=tier))
+
+    if tier is not None:
+        result["tier"] = tier.value
+        result["run_s"] = round(time.monotonic() - start, 3)
+    return result
+
+
+async def _evaluate_all_tiers(session: AsyncSession) -> dict:
+    """Evaluate every tier once, urgent first, reporting each separately."""
+    tiers = {tier.value: await _evaluate(session, tier=tier) for tier in Tier}
+    return {**_sum_results(list(tiers.values())), "tiers": tiers}
+
+
+async def _evaluate_fields(session: AsyncSession, field_ids: frozenset[uuid.UUID]) -> dict:
+    """Targeted run for fields whose forecast just changed (event-driven mode).
+
+    Takes the same advisory locks as a sweep covering those fields, so the two
+    never evaluate a pair concurrently.  If any of them is busy the run is
+    skipped with ``locked`` and the caller retries later.  Watermarks and
+    checkpoints belong to sweeps and are not touched.
+    """
+    tiers: list[Tier | None] = list(Tier) if _tiers_enabled() else [None]
+    shards: list[int | None] = [None]
+    if settings.EVAL_SHARD_COUNT > 1:
+        shard_of = field_shard(Field.id, settings.EVAL_SHARD_COUNT)
+        result = await session.scalars(
+            select(shard_of)
+            .where(any_of(session, Field.id, field_ids))
+            .distinct()
+            .order_by(shard_of)
+        )
+        shards = list(result)
+
+    for tier in tiers:
+        for shard in shards:
+            if not await _try_acquire_advisory_lock(session, shard, tier):
+                await session.rollback()
+                logger.info("Targeted evaluation deferred — %s/%s is busy", tier, shard)
+                return {"evaluated": 0, "notifications_created": 0, "skipped": 0, "locked": True}
+
+    return await _do_evaluate(session, EvaluationScope(field_ids=field_ids))
+
+
+async def _evaluate_sharded(
+    session: AsyncSession, shard_count: int, tier: Tier | None = None
+) -> dict:
+    """Claim and evaluate every free shard, one locked transaction per shard.
+
+    Each node starts at a different shard (derived from ``NODE_ID``) so
+    replicas ticking at the same time fan out instead of racing for shard 0.
+    Shards locked by another node are skipped, as are shards another node
+    already completed after this run started.
+    """
+    run_started = datetime.now(UTC)
+    node_id = settings.NODE_ID
+    results: list[dict] = []
+    processed: list[int] = []
+    busy: list[int] = []
+    done_elsewhere: list[int] = []
+    lags: list[float] = []
+
+    offset = zlib.crc32(node_id.encode()) % shard_count
+    for i in range(shard_count):
+        shard = (offset + i) % shard_count
+        scope = EvaluationScope(shard=shard, shard_count=shard_count, tier=tier)
+
+        if not await _try_acquire_advisory_lock(session, shard, tier):
+            await session.rollback()
+            busy.append(shard)
+            continue
 
+        last_completed = await session.scalar(
+            select(EvaluationState.last_completed_at).where(EvaluationState.scope == scope.name)
+        )
+        if last_completed is not None and _as_utc(last_completed) >= run_started:
+            await session.rollback()  # releases the shard lock
+            done_elsewhere.append(shard)
+            continue
 
-async def evaluate_alerts(session: AsyncSession) -> dict:
-    # Advisory lock: prevent concurrent evaluations
-    acquired = await _try_acquire_advisory_lock(session)
-    if not acquired:
-        logger.warning("Evaluation skipped — another instance is already running")
-        return {"evaluated": 0, "notifications_created": 0, "skipped": 0, "locked": True}
+        result = await _do_evaluate(session, scope)
+        results.append(result)
+        if result["lag_s"] is not None:
+            lags.append(result["lag_s"])
+        # An interrupted shard was taken over mid-run by another node
+        (busy if result.get("interrupted") else processed).append(shard)
+
+    prefix = f"{tier}/" if tier is not None else ""
+    owners = await session.execute(
+        select(EvaluationState.scope, EvaluationState.node_id).where(
+            EvaluationState.scope.like(f"{prefix}shard:%/{shard_count}")
+        )
+    )
+    shard_owners = {
+        int(scope_name.removeprefix(prefix).split(":")[1].split("/")[0]): owner
+        for scope_name, owner in owners
+    }
 
-    try:
-        return await _do_evaluate(session)
-    finally:
-        await _release_advisory_lock(session)
+    if busy:
+        logger.info("Shards %s busy on other nodes", busy)
 
+    return {
+        **_sum_results(results),
+        # Stalest processed shard: how far behind this pass found the data
+        "lag_s": max(lags, default=None),
+        "node_id": node_id,
+        "shards": {
+            "processed": sorted(processed),
+            "busy": sorted(busy),
+            "done_elsewhere": sorted(done_elsewhere),
+            "owners": dict(sorted(shard_owners.items())),
+        },
+    }
 
-async def _do_evaluate(session: AsyncSession) -> dict:
-    now = datetime.now(UTC)
-    today = now.date()
 
-    # CTE: latest notification per (alert_config_id, weather_data_id)
-    latest_notification = (
-        select(
-            Notification.alert_config_id,
-            Notification.weather_data_id,
-            Notification.notification_type,
-            Notification.probability_at_notification,
-            Notification.triggered_at,
-            Notification.id.label("notification_id"),
-            func.row_number()
-            .over(
-                partition_by=[Notification.alert_config_id, Notification.weather_data_id],
-                order_by=Notification.triggered_at.desc(),
-            )
-            .label("rn"),
-        )
-        .where(Notification.alert_config_id.isnot(None))
-        .cte("latest_notification")
+async def _record_completion(
+    session: AsyncSession, scope: EvaluationScope, started_at: datetime
+) -> None:
+    state = await session.get(EvaluationState, scope.name, populate_existing=True)
+    if state is None:
+        state = EvaluationState(scope=scope.name)
+        session.add(state)
+    state.node_id = settings.NODE_ID
+    state.last_started_at = started_at
+    state.last_completed_at = datetime.now(UTC)
+    state.run_started_at = None
+    state.checkpoint_alert_config_id = None
+    state.checkpoint_weather_data_id = None
+
+
+async def _save_checkpoint(
+    session: AsyncSession,
+    scope: EvaluationScope,
+    run_started: datetime,
+    key: tuple[uuid.UUID, uuid.UUID],
+) -> None:
+    state = await session.get(EvaluationState, scope.name, populate_existing=True)
+    if state is None:
+        state = EvaluationState(scope=scope.name)
+        session.add(state)
+    state.node_id = settings.NODE_ID
+    state.run_started_at = run_started
+    state.checkpoint_alert_config_id, state.checkpoint_weather_data_id = key
+
+
+async def _upsert_notification_state(session: AsyncSession, notifications: list[dict]) -> None:
+    """Point each pair's state row at the notification just written for it."""
+    stmt = upsert(session, NotificationState)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["alert_config_id", "weather_data_id"],
+        set_={
+            "notification_id": stmt.excluded.notification_id,
+            "notification_type": stmt.excluded.notification_type,
+            "probability_at_notification": stmt.excluded.probability_at_notification,
+            "triggered_at": stmt.excluded.triggered_at,
+        },
+    )
+    await session.execute(
+        stmt,
+        [
+            {
+                "alert_config_id": n["alert_config_id"],
+                "weather_data_id": n["weather_data_id"],
+                "notification_id": n["id"],
+                "notification_type": n["notification_type"],
+                "probability_at_notification": n["probability_at_notification"],
+                "triggered_at": n["triggered_at"],
+            }
+            for n in notifications
+        ],
     )
 
-    latest = select(latest_notification).where(latest_notification.c.rn == 1).cte("latest")
 
-    # Main query
+def _decide(rows: Sequence[Row], now: datetime) -> list[NotificationType | None]:
+    """Decide the action for each row of a chunk with the configured engine."""
+    if settings.EVAL_DECISION_ENGINE == "numpy":
+        # Imported lazily: NumPy is an optional dependency
+        from app.services.decision_engine import decide_rows
+
+        return decide_rows(rows, now, settings.DELTA_THRESHOLD, settings.COOLDOWN_HOURS)
+
+    actions: list[NotificationType | None] = []
+    for row in rows:
+        current_prob = float(row.probability)
+        threshold = float(row.threshold)
+        prev_prob = float(row.prev_probability) if row.prev_probability is not None else None
+        action = determine_action(
+            has_previous=row.prev_type is not None,
+            was_above=prev_prob is not None and prev_prob >= threshold,
+            is_above=current_prob >= threshold,
+            current_prob=current_prob,
+            prev_prob=prev_prob,
+            prev_triggered=row.prev_triggered_at,
+            delta_threshold=settings.DELTA_THRESHOLD,
+            cooldown_hours=settings.COOLDOWN_HOURS,
+            now=now,
+        )
+        actions.append(action.type if action else None)
+    return actions
+
+
+def evaluation_pairs_query(today: date, scope: EvaluationScope | None = None) -> Select:
+    """Every active (alert_config, forecast) pair from ``today`` on, with its previous state.
+
+    The hot query of every run; ``scope`` narrows it to a shard or tier.
+    Field sets and incremental watermarks are applied by the caller.
+    """
+    scope = scope or EvaluationScope()
     stmt = (
         select(
-            AlertConfig,
-            WeatherData,
+            AlertConfig.id.label("alert_config_id"),
+            AlertConfig.field_id,
+            AlertConfig.event_type,
+            AlertConfig.threshold,
+            WeatherData.id.label("weather_data_id"),
+            WeatherData.event_date,
+            WeatherData.probability,
             Field.name.label("field_name"),
-            latest.c.notification_type.label("prev_type"),
-            latest.c.probability_at_notification.label("prev_probability"),
-            latest.c.triggered_at.label("prev_triggered_at"),
-            latest.c.notification_id.label("prev_notification_id"),
+            Field.user_id,
+            NotificationState.notification_type.label("prev_type"),
+            NotificationState.probability_at_notification.label("prev_probability"),
+            NotificationState.triggered_at.label("prev_triggered_at"),
+            NotificationState.notification_id.label("prev_notification_id"),
         )
         .join(Field, Field.id == AlertConfig.field_id)
         .join(
@@ -201,10 +586,10 @@ async def _do_evaluate(session: AsyncSession) -> dict:
             ),
         )
         .outerjoin(
-            latest,
+            NotificationState,
             and_(
-                latest.c.alert_config_id == AlertConfig.id,
-                latest.c.weather_data_id == WeatherData.id,
+                NotificationState.alert_config_id == AlertConfig.id,
+                NotificationState.weather_data_id == WeatherData.id,
             ),
         )
         .where(
@@ -212,71 +597,412 @@ async def _do_evaluate(session: AsyncSession) -> dict:
             WeatherData.event_date >= today,
         )
     )
+    if scope.shard is not None:
+        stmt = stmt.where(field_shard(AlertConfig.field_id, scope.shard_count) == scope.shard)
+    if scope.tier is not None:
+        # Relative to each run's own "today": only a far run straddling
+        # midnight can overlap the urgent tier, on its newly added last day.
+        horizon = today + timedelta(days=settings.EVAL_URGENT_HORIZON_DAYS)
+        if scope.tier is Tier.URGENT:
+            stmt = stmt.where(WeatherData.event_date <= horizon)
+        else:
+            stmt = stmt.where(WeatherData.event_date > horizon)
+    return stmt
+
+
+async def _do_evaluate(session: AsyncSession, scope: EvaluationScope) -> dict:
+    now = datetime.now(UTC)
+    today = now.date()
 
-    count = 0
-    skipped = 0
-
-    result = await session.execute(stmt)
-    rows = result.all()
-
-    for row in rows:
-        alert_config = row[0]
-        weather_data = row[1]
-        field_name = row[2]
-        prev_type = row[3]
-        prev_prob = row[4]
-        prev_triggered = row[5]
-        prev_id = row[6]
+    # A previous run of this scope that died mid-way left a checkpoint behind:
+    # resume after its last committed key and keep its start as the run start.
+    targeted = scope.field_ids is not None
+    checkpointed = settings.EVAL_CHECKPOINT and settings.EVAL_STRATEGY == "python" and not targeted
+    run_started = now
+    resume_key: tuple[uuid.UUID, uuid.UUID] | None = None
+    if checkpointed:
+        state = await session.get(EvaluationState, scope.name, populate_existing=True)
+        if (
+            state is not None
+            and state.checkpoint_alert_config_id is not None
+            and state.checkpoint_weather_data_id is not None
+        ):
+            resume_key = (state.checkpoint_alert_config_id, state.checkpoint_weather_data_id)
+            run_started = _as_utc(state.run_started_at or now)
+            logger.info("Resuming evaluation of %s after checkpoint %s", scope.name, resume_key)
+
+    stmt = evaluation_pairs_query(today, scope)
+    if targeted:
+        # One array parameter however many fields a listener batch holds
+        stmt = stmt.where(any_of(session, AlertConfig.field_id, scope.field_ids))
+
+    # Incremental mode: only pairs that changed since the last completed run
+    # of this scope, plus pairs whose cooldown expired in the meantime.
+    watermark = None
+    lag_s = None
+    if not targeted:
+        previous = (
+            await session.execute(
+                select(EvaluationState.last_started_at, EvaluationState.last_completed_at).where(
+                    EvaluationState.scope == scope.name
+                )
+            )
+        ).first()
+        if previous is not None:
+            if settings.EVAL_INCREMENTAL:
+                watermark = previous.last_started_at
+            if previous.last_completed_at is not None:
+                # Time since this scope was last fully evaluated
+                lag_s = round((now - _as_utc(previous.last_completed_at)).total_seconds(), 3)
+    if watermark is not None:
+        # Overlap absorbs clock skew and writes committed after our snapshot
+        since = _as_utc(watermark) - timedelta(seconds=settings.EVAL_WATERMARK_OVERLAP_SECONDS)
+        cooldown = timedelta(hours=settings.COOLDOWN_HOURS)
+        stmt = stmt.where(
+            or_(
+                WeatherData.updated_at > since,
+                AlertConfig.updated_at > since,
+                and_(
+                    NotificationState.triggered_at > since - cooldown,
+                    NotificationState.triggered_at <= now - cooldown,
+                ),
+            )
+        )
 
-        current_prob = float(weather_data.probability)
-        threshold = float(alert_config.threshold)
-        above_threshold = current_prob >= threshold
+    if targeted:
+        mode = "targeted"
+    else:
+        mode = "incremental" if watermark is not None else "full"
+
+    stats = EvaluationStats()
+    summary: dict = {}
+    if settings.EVAL_STRATEGY == "sql":
+        await _evaluate_in_database(session, stmt, now, stats)
+    elif checkpointed:
+        chunks, completed = await _evaluate_checkpointed(
+            session, stmt, now, scope, run_started, resume_key, stats
+        )
+        summary = {"chunks_committed": chunks, "resumed": resume_key is not None}
+        if not completed:
+            # Lost the lock between chunks: the node holding it now resumes
+            # from our last checkpoint, so leave the scope unfinished.
+            logger.warning("Evaluation of %s handed off after %d chunks", scope.name, chunks)
+            await session.rollback()
+            summary["interrupted"] = True
+    else:
+        await _evaluate_in_python(session, stmt, now, stats)
+
+    if not summary.get("interrupted"):
+        if not targeted:
+            await _record_completion(session, scope, run_started)
+        with stats.phase("flush"):
+            await _count_created(session, stats, now)
+        with stats.phase("commit"):
+            await session.commit()
+
+    metrics.observe_evaluation(stats.phases, stats.actions)
+    return {
+        "evaluated": stats.evaluated,
+        "notifications_created": stats.created,
+        "skipped": stats.evaluated - stats.created,
+        "write_s": round(stats.phases["flush"], 3),
+        "phases": {name: round(seconds, 3) for name, seconds in stats.phases.items()},
+        "actions": stats.actions,
+        "mode": mode,
+        "strategy": settings.EVAL_STRATEGY,
+        "lag_s": lag_s,
+        **summary,
+    }
 
-        prev_prob_float = float(prev_prob) if prev_prob is not None else None
-        was_above = prev_prob_float is not None and prev_prob_float >= threshold
 
-        action = determine_action(
-            has_previous=prev_type is not None,
-            was_above=was_above,
-            is_above=above_threshold,
-            current_prob=current_prob,
-            prev_prob=prev_prob_float,
-            prev_triggered=prev_triggered,
-            delta_threshold=settings.DELTA_THRESHOLD,
-            cooldown_hours=settings.COOLDOWN_HOURS,
-        )
+async def _write_chunk(
+    session: AsyncSession, rows: Sequence[Row], now: datetime, stats: EvaluationStats
+) -> None:
+    """Decide, render and bulk-write one chunk, accounting it in ``stats``."""
+    with stats.phase("decide"):
+        action_types = _decide(rows, now)
+    stats.evaluated += len(rows)
+    stats.count_actions(action_types)
 
-        if action is None:
-            skipped += 1
+    pending: list[dict] = []
+    render_start = time.perf_counter()
+    for row, action_type in zip(rows, action_types, strict=True):
+        if action_type is None:
             continue
 
+        current_prob = float(row.probability)
+        threshold = float(row.threshold)
+        prev_prob_float = float(row.prev_probability) if row.prev_probability is not None else None
+
         message = build_message(
-            action_type=action.type,
-            event_type=alert_config.event_type,
-            field_name=field_name,
-            event_date=weather_data.event_date,
+            action_type=action_type,
+            event_type=row.event_type,
+            field_name=row.field_name,
+            event_date=row.event_date,
             current_prob=current_prob,
             prev_prob=prev_prob_float,
             threshold=threshold,
         )
 
-        notification = Notification(
-            alert_config_id=alert_config.id,
-            weather_data_id=weather_data.id,
-            notification_type=action.type.value,
-            probability_at_notification=current_prob,
-            previous_notification_id=prev_id,
-            status="pending",
-            message=message,
+        pending.append(
+            {
+                "id": uuid.uuid4(),
+                "alert_config_id": row.alert_config_id,
+                "weather_data_id": row.weather_data_id,
+                "field_id": row.field_id,
+                "user_id": row.user_id,
+                "notification_type": action_type.value,
+                "probability_at_notification": current_prob,
+                "previous_notification_id": row.prev_notification_id,
+                "status": _initial_status().value,
+                "message": message,
+                "triggered_at": now,
+            }
         )
-        session.add(notification)
         logger.info(message)
-        count += 1
+    stats.phases["render"] += time.perf_counter() - render_start
+
+    if not pending:
+        return
+
+    # One multi-row INSERT per chunk instead of a row-by-row ORM flush.
+    # render_nulls keeps rows with and without previous_notification_id in
+    # the same batch; otherwise the ORM splits the chunk at every change.
+    with stats.phase("flush"):
+        if settings.EVAL_DIGEST:
+            await hold_digest_writes(session)
+        await session.execute(insert(Notification).execution_options(render_nulls=True), pending)
+        await _upsert_notification_state(session, pending)
+    stats.created += len(pending)
+
+
+async def _evaluate_in_python(
+    session: AsyncSession, stmt: Select, now: datetime, stats: EvaluationStats
+) -> None:
+    """Reference path: decide and render in Python, chunk by chunk."""
+    # Stream plain columns (no ORM identity map) through a server-side cursor
+    # in bounded chunks so memory stays flat regardless of the number of pairs.
+    chunk_size = settings.EVAL_CHUNK_SIZE
+    with stats.phase("query"):
+        result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+    partitions = result.partitions(chunk_size)
+
+    while True:
+        with stats.phase("query"):
+            rows = await anext(partitions, None)
+        if rows is None:
+            return
+        await _write_chunk(session, rows, now, stats)
+
+
+async def _evaluate_checkpointed(
+    session: AsyncSession,
+    stmt: Select,
+    now: datetime,
+    scope: EvaluationScope,
+    run_started: datetime,
+    resume_key: tuple[uuid.UUID, uuid.UUID] | None,
+    stats: EvaluationStats,
+) -> tuple[int, bool]:
+    """Keyset-paged evaluation committing each chunk together with a checkpoint.
+
+    Pages are ordered by ``(alert_config_id, weather_data_id)``; after every
+    chunk the last key is persisted in ``evaluation_state`` in the same
+    transaction as the chunk's notifications, so a crash loses at most one
+    chunk and the next run resumes right after it.  Each commit releases the
+    advisory lock, bounding lock hold time and WAL bursts; it is re-acquired
+    before the next chunk.
+
+    Returns ``(chunks_committed, completed)``.
+    """
+    chunks = 0
+    key = resume_key
+    ordered = stmt.order_by(AlertConfig.id, WeatherData.id).limit(settings.EVAL_CHUNK_SIZE)
+
+    while True:
+        page = ordered
+        if key is not None:
+            page = page.where(tuple_(AlertConfig.id, WeatherData.id) > tuple_(*key))
+        with stats.phase("query"):
+            rows = (await session.execute(page)).all()
+        if not rows:
+            return chunks, True
+
+        await _write_chunk(session, rows, now, stats)
+
+        key = (rows[-1].alert_config_id, rows[-1].weather_data_id)
+        await _save_checkpoint(session, scope, run_started, key)
+        with stats.phase("flush"):
+            await _count_created(session, stats, now)
+        with stats.phase("commit"):
+            await session.commit()
+        chunks += 1
+
+        if not await _try_acquire_advisory_lock(session, scope.shard, scope.tier):
+            return chunks, False
+
+
+def _render_template_sql(template: str, fields: dict[str, ColumnElement]) -> ColumnElement:
+    """Translate a ``str.format`` template into a SQL string concatenation."""
+    parts: list[ColumnElement] = []
+    for literal_text, field_name, _, _ in Formatter().parse(template):
+        if literal_text:
+            parts.append(literal(literal_text, String()))
+        if field_name:
+            parts.append(cast(fields[field_name], String()))
+    return reduce(operator.add, parts)
+
+
+async def _evaluate_in_database(
+    session: AsyncSession, stmt: Select, now: datetime, stats: EvaluationStats
+) -> None:
+    """Set-based path: cases A–D, cooldown, delta and message rendering as SQL.
+
+    Notifications are written with a single ``INSERT ... SELECT ... RETURNING``;
+    only the created rows travel back, to maintain ``notification_state``.
+    On PostgreSQL the same statement also counts the pairs in scope, so the
+    join runs once and the count matches what the INSERT saw.
+    Probabilities are compared as float8 so decisions (and truncated percents)
+    match the Python reference path exactly.
+    """
+    pairs = stmt.subquery("pairs")
+    current = cast(pairs.c.probability, Float())
+    threshold = cast(pairs.c.threshold, Float())
+    previous = cast(pairs.c.prev_probability, Float())
+    has_previous = pairs.c.prev_type.isnot(None)
+    is_above = current >= threshold
+    was_above = and_(previous.isnot(None), previous >= threshold)
+    in_cooldown = and_(
+        pairs.c.prev_triggered_at.isnot(None),
+        pairs.c.prev_triggered_at > now - timedelta(hours=settings.COOLDOWN_HOURS),
+    )
+    increased = literal(NotificationType.RISK_INCREASED.value, String())
+    ended = literal(NotificationType.RISK_ENDED.value, String())
+
+    action = case(
+        (and_(~has_previous, is_above), increased),
+        (~has_previous, null()),
+        # Case A: was above, now below → all clear (ignores cooldown)
+        (and_(was_above, ~is_above), ended),
+        (in_cooldown, null()),
+        # Case B: still above, significant delta (Case C: minor change → NULL)
+        (
+            and_(
+                was_above,
+                is_above,
+                current - func.coalesce(previous, 0.0) >= settings.DELTA_THRESHOLD,
+            ),
+            increased,
+        ),
+        # Case D: was below, now above
+        (and_(~was_above, is_above), increased),
+        else_=null(),
+    )
+    decided = select(pairs, action.label("action")).cte("decided")
+
+    fields = {
+        "event_label": case(
+            *((decided.c.event_type == k, literal(v, String())) for k, v in EVENT_LABELS.items()),
+            else_=decided.c.event_type,
+        ),
+        "new_prob": percent(decided.c.probability),
+        "old_prob": percent(func.coalesce(decided.c.prev_probability, 0)),
+        "field_name": decided.c.field_name,
+        "date": iso_date(decided.c.event_date),
+        "threshold": percent(decided.c.threshold),
+        "delta_text": case(
+            (decided.c.prev_probability.is_(None), literal("", String())),
+            else_=_render_template_sql(
+                "Subió del {old_prob}% al {new_prob}%",
+                {
+                    "old_prob": percent(decided.c.prev_probability),
+                    "new_prob": percent(decided.c.probability),
+                },
+            ),
+        ),
+    }
+    message = case(
+        (
+            decided.c.action == ended,
+            _render_template_sql(TEMPLATES["risk_ended"], fields),
+        ),
+        else_=func.rtrim(_render_template_sql(TEMPLATES["risk_increased"], fields)),
+    )
 
-    await session.commit()
+    insert_stmt = (
+        insert(Notification)
+        .from_select(
+            [
+                "id",
+                "alert_config_id",
+                "weather_data_id",
+                "field_id",
+                "user_id",
+                "notification_type",
+                "probability_at_notification",
+                "previous_notification_id",
+                "status",
+                "message",
+                "triggered_at",
+            ],
+            select(
+                new_uuid(),
+                decided.c.alert_config_id,
+                decided.c.weather_data_id,
+                decided.c.field_id,
+                decided.c.user_id,
+                decided.c.action,
+                decided.c.probability,
+                decided.c.prev_notification_id,
+                literal(_initial_status().value, String()),
+                message,
+                literal(now, DateTime(timezone=True)),
+            ).where(decided.c.action.isnot(None)),
+        )
+        .returning(
+            Notification.id,
+            Notification.alert_config_id,
+            Notification.weather_data_id,
+            Notification.notification_type,
+            Notification.probability_at_notification,
+            Notification.triggered_at,
+            Notification.message,
+        )
+    )
 
-    return {
-        "evaluated": len(rows),
-        "notifications_created": count,
-        "skipped": skipped,
-    }
+    with stats.phase("flush"):
+        if settings.EVAL_DIGEST:
+            await hold_digest_writes(session)
+        if session.get_bind().dialect.name == "sqlite":
+            # No INSERT inside WITH on SQLite: count the pairs separately
+            evaluated = await session.scalar(select(func.count()).select_from(pairs)) or 0
+            created = [dict(row._mapping) for row in await session.execute(insert_stmt)]
+        else:
+            # Pairs in scope, for the summary, counted by the same statement:
+            # decided is a CTE read by both the count and the INSERT
+            inserted = insert_stmt.cte("inserted")
+            evaluated_count = select(func.count().label("evaluated")).select_from(decided)
+            counted = evaluated_count.subquery("counted")
+            rows = (
+                await session.execute(
+                    select(counted.c.evaluated, inserted).select_from(
+                        counted.outerjoin(inserted, true())
+                    )
+                )
+            ).all()
+            evaluated = rows[0].evaluated
+            created = [
+                {key: value for key, value in row._mapping.items() if key != "evaluated"}
+                for row in rows
+                if row.id is not None
+            ]
+        if created:
+            await _upsert_notification_state(session, created)
+
+    stats.evaluated += evaluated
+    stats.created += len(created)
+    stats.count_actions([row["notification_type"] for row in created])
+    stats.actions["none"] += evaluated - len(created)
+
+    for row in created:
+        logger.info(row["message"])
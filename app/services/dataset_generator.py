@@ -0,0 +1,371 @@
+"""Deterministic synthetic dataset for capacity testing, loaded with COPY.
+
+Usage::
+
+    agrobot-generate-dataset --users 50000 --fields-per-user 10 --truncate
+
+Each user gets its own ``random.Random`` derived from ``--seed`` and the
+user's index, so the dataset is identical across runs and independent of
+``--batch-users``.  Rows are generated a batch of users at a time and
+streamed into PostgreSQL with binary ``COPY`` (``copy_records_to_table``),
+one transaction per batch, keeping memory flat for tens of millions of rows.
+
+Per field: one forecast per event type and day, alert configs for a few
+event types, and for a share of the alert pairs a chain of past
+notifications (alternating ``risk_increased``/``risk_ended``) whose last
+link is mirrored into ``notification_state`` like the evaluator does.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+
+import asyncpg
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+from app.database import asyncpg_dsn
+from app.models.notification import NotificationStatus, NotificationType
+from app.models.notification_counters import NotificationCounters
+from app.models.weather_data import ClimateEventType
+from app.services.alert_evaluator import build_message
+from app.services.notification_counters import COUNTERS, COUNTERS_ID, stats_query
+
+
+def recount_counters_sql() -> str:
+    """Upsert of the /jobs/stats counters from :func:`stats_query`, as PostgreSQL SQL.
+
+    COPY bypasses the writers that keep the counters: recount once loaded,
+    with the same per-status aggregate the reconciliation job uses.
+    """
+    counted = stats_query().subquery("counted")
+    stmt = postgresql.insert(NotificationCounters).from_select(
+        ["id", *COUNTERS, "last_triggered_at", "reconciled_at"],
+        select(
+            literal(COUNTERS_ID),
+            *(counted.c[name] for name in COUNTERS),
+            counted.c.last_triggered,
+            func.now(),
+        ),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={
+            name: stmt.excluded[name] for name in (*COUNTERS, "last_triggered_at", "reconciled_at")
+        },
+    )
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+# Load order respects foreign keys
+TABLE_COLUMNS: dict[str, tuple[str, ...]] = {
+    "users": ("id", "name", "phone"),
+    "fields": ("id", "user_id", "name", "latitude", "longitude"),
+    "weather_data": ("id", "field_id", "event_date", "event_type", "probability"),
+    "alert_configs": ("id", "field_id", "event_type", "threshold", "is_active"),
+    "notifications": (
+        "id",
+        "alert_config_id",
+        "weather_data_id",
+        "notification_type",
+        "probability_at_notification",
+        "previous_notification_id",
+        "status",
+        "message",
+        "triggered_at",
+        "delivered_at",
+        "field_id",
+        "user_id",
+    ),
+    "notification_state": (
+        "alert_config_id",
+        "weather_data_id",
+        "notification_id",
+        "notification_type",
+        "probability_at_notification",
+        "triggered_at",
+    ),
+}
+
+# Roughly the Argentine agricultural area
+LATITUDE_RANGE = (-39.0, -22.0)
+LONGITUDE_RANGE = (-68.0, -57.0)
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    users: int = 1000
+    fields_per_user: int = 10
+    days: int = 14
+    event_types: tuple[str, ...] = tuple(t.value for t in ClimateEventType)
+    alerts_per_field: int = 2
+    # Share of alert (config, forecast) pairs with a notification history
+    history_rate: float = 0.3
+    max_history: int = 3
+    inactive_rate: float = 0.05
+    seed: int = 42
+
+
+@dataclass
+class Rows:
+    """Generated records per table, in ``TABLE_COLUMNS`` order."""
+
+    tables: dict[str, list[tuple]] = field(
+        default_factory=lambda: {table: [] for table in TABLE_COLUMNS}
+    )
+
+    def extend(self, other: "Rows") -> None:
+        for table, records in other.tables.items():
+            self.tables[table].extend(records)
+
+    def counts(self) -> dict[str, int]:
+        return {table: len(records) for table, records in self.tables.items()}
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _prob(value: float) -> Decimal:
+    # Numeric(3, 2) columns: clamp and keep two decimals
+    return Decimal(f"{min(max(value, 0.0), 1.0):.2f}")
+
+
+def generate_user(spec: DatasetSpec, index: int, start: date, now: datetime) -> Rows:
+    """All rows owned by the ``index``-th user, deterministic for a given spec."""
+    rng = random.Random(spec.seed * 1_000_003 + index)
+    rows = Rows()
+    t = rows.tables
+
+    user_id = _uuid(rng)
+    t["users"].append(
+        (user_id, f"Usuario {index}", f"+54 9 11 {index // 10000:04d}-{index % 10000:04d}")
+    )
+
+    for field_no in range(spec.fields_per_user):
+        field_id = _uuid(rng)
+        field_name = f"Campo {index}-{field_no}"
+        t["fields"].append(
+            (
+                field_id,
+                user_id,
+                field_name,
+                round(rng.uniform(*LATITUDE_RANGE), 4),
+                round(rng.uniform(*LONGITUDE_RANGE), 4),
+            )
+        )
+
+        # Forecast per event type: a skewed-low base with a daily random walk
+        forecasts: dict[str, list[tuple[uuid.UUID, date, Decimal]]] = {}
+        for event_type in spec.event_types:
+            level = rng.betavariate(2, 5)
+            series = []
+            for day in range(spec.days):
+                level = min(max(level + rng.gauss(0, 0.12), 0.0), 1.0)
+                event_date = start + timedelta(days=day)
+                weather = (_uuid(rng), event_date, _prob(level))
+                series.append(weather)
+                t["weather_data"].append((weather[0], field_id, event_date, event_type, weather[2]))
+            forecasts[event_type] = series
+
+        alert_types = rng.sample(
+            spec.event_types, min(spec.alerts_per_field, len(spec.event_types))
+        )
+        for event_type in alert_types:
+            alert_id = _uuid(rng)
+            threshold = _prob(rng.uniform(0.3, 0.9))
+            t["alert_configs"].append(
+                (alert_id, field_id, event_type, threshold, rng.random() >= spec.inactive_rate)
+            )
+            for weather_id, event_date, _ in forecasts[event_type]:
+                if rng.random() < spec.history_rate:
+                    _add_history(
+                        rows,
+                        rng,
+                        spec,
+                        now,
+                        user_id,
+                        field_id,
+                        alert_id,
+                        weather_id,
+                        event_type,
+                        field_name,
+                        event_date,
+                        threshold,
+                    )
+
+    return rows
+
+
+def _add_history(
+    rows: Rows,
+    rng: random.Random,
+    spec: DatasetSpec,
+    now: datetime,
+    user_id: uuid.UUID,
+    field_id: uuid.UUID,
+    alert_id: uuid.UUID,
+    weather_id: uuid.UUID,
+    event_type: str,
+    field_name: str,
+    event_date: date,
+    threshold: Decimal,
+) -> None:
+    """Chain of alternating increased/ended notifications, oldest first."""
+    length = rng.randint(1, spec.max_history)
+    triggered_at = now - timedelta(hours=rng.uniform(1, 24) * length)
+    previous_id: uuid.UUID | None = None
+    previous_prob: Decimal | None = None
+    for link in range(length):
+        if link % 2 == 0:
+            action = NotificationType.RISK_INCREASED
+            prob = _prob(rng.uniform(float(threshold), 1.0))
+        else:
+            action = NotificationType.RISK_ENDED
+            prob = _prob(rng.uniform(0.0, float(threshold) - 0.01))
+        notification_id = _uuid(rng)
+        is_last = link == length - 1
+        delivered = not is_last or rng.random() < 0.7
+        rows.tables["notifications"].append(
+            (
+                notification_id,
+                alert_id,
+                weather_id,
+                action.value,
+                prob,
+                previous_id,
+                (NotificationStatus.DELIVERED if delivered else NotificationStatus.PENDING).value,
+                build_message(
+                    action_type=action,
+                    event_type=event_type,
+                    field_name=field_name,
+                    event_date=event_date,
+                    current_prob=float(prob),
+                    prev_prob=float(previous_prob) if previous_prob is not None else None,
+                    threshold=float(threshold),
+                ),
+                triggered_at,
+                triggered_at + timedelta(seconds=rng.randint(1, 120)) if delivered else None,
+                field_id,
+                user_id,
+            )
+        )
+        previous_id, previous_prob = notification_id, prob
+        if is_last:
+            rows.tables["notification_state"].append(
+                (alert_id, weather_id, notification_id, action.value, prob, triggered_at)
+            )
+        triggered_at += timedelta(hours=rng.uniform(1, 24))
+
+
+def generate_batches(
+    spec: DatasetSpec, batch_users: int, start: date, now: datetime
+) -> Iterator[Rows]:
+    for first in range(0, spec.users, batch_users):
+        batch = Rows()
+        for index in range(first, min(first + batch_users, spec.users)):
+            batch.extend(generate_user(spec, index, start, now))
+        yield batch
+
+
+async def load_dataset(
+    conn: asyncpg.Connection,
+    spec: DatasetSpec,
+    batch_users: int = 1000,
+    start: date | None = None,
+) -> dict[str, int]:
+    """COPY the dataset into the database. Returns rows per table.
+
+    The next batch is generated in a worker thread while the current one is
+    being copied, overlapping Python generation with PostgreSQL ingestion.
+    """
+    start = start or date.today()
+    now = datetime.now(UTC)
+    totals = dict.fromkeys(TABLE_COLUMNS, 0)
+    batches = generate_batches(spec, batch_users, start, now)
+
+    # A crash mid-load only loses uncommitted batches; no need to fsync each one
+    await conn.execute("SET synchronous_commit = off")
+    upcoming = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+    try:
+        while (batch := await upcoming) is not None:
+            upcoming = asyncio.ensure_future(asyncio.to_thread(next, batches, None))
+            async with conn.transaction():
+                for table, columns in TABLE_COLUMNS.items():
+                    records = batch.tables[table]
+                    if records:
+                        await conn.copy_records_to_table(table, records=records, columns=columns)
+                    totals[table] += len(records)
+    finally:
+        upcoming.cancel()
+
+    await conn.execute(recount_counters_sql())
+    for table in TABLE_COLUMNS:
+        await conn.execute(f"ANALYZE {table}")
+    return totals
+
+
+async def truncate_dataset(conn: asyncpg.Connection) -> None:
+    await conn.execute(
+        "TRUNCATE users, fields, weather_data, alert_configs, notifications, "
+        "notification_state, notification_counters, evaluation_state CASCADE"
+    )
+
+
+async def _run(args: argparse.Namespace) -> dict:
+    spec = DatasetSpec(
+        users=args.users,
+        fields_per_user=args.fields_per_user,
+        days=args.days,
+        alerts_per_field=args.alerts_per_field,
+        history_rate=args.history_rate,
+        max_history=args.max_history,
+        seed=args.seed,
+    )
+    conn = await asyncpg.connect(asyncpg_dsn(args.database_url))
+    try:
+        if args.truncate:
+            await truncate_dataset(conn)
+        started = time.perf_counter()
+        counts = await load_dataset(conn, spec, args.batch_users)
+        elapsed = time.perf_counter() - started
+    finally:
+        await conn.close()
+    total = sum(counts.values())
+    return {
+        "spec": asdict(spec),
+        "rows": counts,
+        "total_rows": total,
+        "elapsed_s": round(elapsed, 2),
+        "rows_per_s": round(total / elapsed) if elapsed else None,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=DatasetSpec.users)
+    parser.add_argument("--fields-per-user", type=int, default=DatasetSpec.fields_per_user)
+    parser.add_argument("--days", type=int, default=DatasetSpec.days)
+    parser.add_argument("--alerts-per-field", type=int, default=DatasetSpec.alerts_per_field)
+    parser.add_argument("--history-rate", type=float, default=DatasetSpec.history_rate)
+    parser.add_argument("--max-history", type=int, default=DatasetSpec.max_history)
+    parser.add_argument("--seed", type=int, default=DatasetSpec.seed)
+    parser.add_argument("--batch-users", type=int, default=1000)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument(
+        "--truncate", action="store_true", help="empty all application tables before loading"
+    )
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(_run(args)), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
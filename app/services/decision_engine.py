@@ -0,0 +1,116 @@
+"""Vectorized NumPy counterpart of :func:`~app.services.alert_evaluator.determine_action`.
+
+Takes one array per column of an evaluation chunk and returns an action code
+per row, computed with boolean masks instead of a Python loop.  It must make
+exactly the same decisions as the scalar reference implementation; the
+property-based tests in ``tests/test_decision_engine.py`` enforce that.
+
+Timestamps are integer microseconds since the Unix epoch so the cooldown
+comparison is exact (``datetime`` arithmetic is microsecond-precise too).
+"""
+
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import numpy as np
+
+from app.models.notification import NotificationType
+
+ACTION_NONE = 0
+ACTION_RISK_INCREASED = 1
+ACTION_RISK_ENDED = 2
+
+ACTION_TYPES: dict[int, NotificationType | None] = {
+    ACTION_NONE: None,
+    ACTION_RISK_INCREASED: NotificationType.RISK_INCREASED,
+    ACTION_RISK_ENDED: NotificationType.RISK_ENDED,
+}
+
+# Marks rows without a previous triggered_at in ``prev_triggered_us``
+NO_TIMESTAMP = np.iinfo(np.int64).min
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def to_epoch_us(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def determine_actions(
+    current_prob: np.ndarray,
+    prev_prob: np.ndarray,
+    threshold: np.ndarray,
+    has_previous: np.ndarray,
+    prev_triggered_us: np.ndarray,
+    now_us: int,
+    delta_threshold: float,
+    cooldown_hours: int,
+) -> np.ndarray:
+    """Return an ``int8`` action code per row (``ACTION_*`` constants).
+
+    ``prev_prob`` is ``NaN`` and ``prev_triggered_us`` is ``NO_TIMESTAMP``
+    where the pair has no previous notification.
+    """
+    is_above = current_prob >= threshold
+    # NaN compares False, matching "prev_prob is not None and prev_prob >= threshold"
+    was_above = prev_prob >= threshold
+
+    has_triggered = prev_triggered_us != NO_TIMESTAMP
+    cooldown_us = int(timedelta(hours=cooldown_hours) // timedelta(microseconds=1))
+    # (now - prev) < cooldown  <=>  prev > now - cooldown, without int64 overflow
+    in_cooldown = has_triggered & (prev_triggered_us > now_us - cooldown_us)
+
+    delta = current_prob - np.where(np.isnan(prev_prob), 0.0, prev_prob)
+
+    first_alert = ~has_previous & is_above
+    # Case A: was above, now below → all clear (ignores cooldown)
+    risk_ended = has_previous & was_above & ~is_above
+    eligible = has_previous & ~in_cooldown
+    # Case B: still above with a significant delta
+    case_b = eligible & was_above & is_above & (delta >= delta_threshold)
+    # Case D: was below, now above
+    case_d = eligible & ~was_above & is_above
+
+    codes = np.full(current_prob.shape, ACTION_NONE, dtype=np.int8)
+    codes[first_alert | case_b | case_d] = ACTION_RISK_INCREASED
+    codes[risk_ended] = ACTION_RISK_ENDED
+    return codes
+
+
+def decide_rows(
+    rows: Sequence[Any],
+    now: datetime,
+    delta_threshold: float,
+    cooldown_hours: int,
+) -> list[NotificationType | None]:
+    """Evaluate a chunk of evaluator rows and map the codes back to types."""
+    count = len(rows)
+    current_prob = np.empty(count, dtype=np.float64)
+    prev_prob = np.full(count, np.nan, dtype=np.float64)
+    threshold = np.empty(count, dtype=np.float64)
+    has_previous = np.zeros(count, dtype=bool)
+    prev_triggered_us = np.full(count, NO_TIMESTAMP, dtype=np.int64)
+
+    for i, row in enumerate(rows):
+        current_prob[i] = float(row.probability)
+        threshold[i] = float(row.threshold)
+        if row.prev_probability is not None:
+            prev_prob[i] = float(row.prev_probability)
+        has_previous[i] = row.prev_type is not None
+        if row.prev_triggered_at is not None:
+            prev_triggered_us[i] = to_epoch_us(row.prev_triggered_at)
+
+    codes = determine_actions(
+        current_prob,
+        prev_prob,
+        threshold,
+        has_previous,
+        prev_triggered_us,
+        to_epoch_us(now),
+        delta_threshold,
+        cooldown_hours,
+    )
+    return [ACTION_TYPES[int(code)] for code in codes]
@@ -0,0 +1,133 @@
+"""Incrementally maintained notification totals for ``GET /api/v1/jobs/stats``.
+
+Counting ``notifications`` on every dashboard poll scans the whole table.
+Instead, the single :class:`NotificationCounters` row is adjusted by every
+write that creates notifications or changes their status, in the writer's
+own transaction (:func:`apply_counters`), so the counters commit or roll
+back together with the rows they describe and ``get_stats`` is a primary
+key lookup.
+
+Writers call :func:`apply_counters` as their last statement before
+committing: every writer updates the same row, so its lock is held only
+for the commit itself.
+
+Writes that bypass these paths (manual SQL, the benchmark dataset loader)
+make the counters drift; :func:`reconcile_counters`, scheduled every
+``STATS_RECONCILE_MINUTES``, recounts the table and logs the drift it fixed.
+"""
+
+import logging
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from datetime import UTC, datetime
+
+from sqlalchemy import Select, case, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.notification import Notification, NotificationStatus
+from app.models.notification_counters import NotificationCounters
+from app.sql_functions import upsert
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_ID = 1
+STATUS_COUNTERS = tuple(status.value for status in NotificationStatus)
+COUNTERS = ("total", *STATUS_COUNTERS)
+
+
+def stats_query() -> Select:
+    """Notification totals by status over the whole table (reconciliation, plan checks)."""
+    return select(
+        func.count(Notification.id).label("total"),
+        *(
+            func.count().filter(Notification.status == status).label(status)
+            for status in STATUS_COUNTERS
+        ),
+        func.max(Notification.triggered_at).label("last_triggered"),
+    )
+
+
+def counters_query() -> Select:
+    return select(NotificationCounters).where(NotificationCounters.id == COUNTERS_ID)
+
+
+def status_changes(transitions: Iterable[tuple[str, str]]) -> Counter[str]:
+    """Per-status deltas of ``(old_status, new_status)`` transitions."""
+    deltas: Counter[str] = Counter()
+    for old, new in transitions:
+        deltas[old] -= 1
+        deltas[new] += 1
+    return deltas
+
+
+async def apply_counters(
+    session: AsyncSession,
+    deltas: Mapping[str, int],
+    created: int = 0,
+    last_triggered: datetime | None = None,
+) -> None:
+    """Add ``deltas`` per status and ``created`` to the total, uncommitted.
+
+    ``created`` rows must also be counted in ``deltas`` under their status.
+    """
+    deltas = {status: deltas.get(status, 0) for status in STATUS_COUNTERS}
+    if not created and not any(deltas.values()) and last_triggered is None:
+        return
+    stmt = upsert(session, NotificationCounters).values(
+        id=COUNTERS_ID, total=created, last_triggered_at=last_triggered, **deltas
+    )
+    table = NotificationCounters.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={
+            **{name: table.c[name] + stmt.excluded[name] for name in COUNTERS},
+            "last_triggered_at": case(
+                (
+                    or_(
+                        table.c.last_triggered_at.is_(None),
+                        stmt.excluded.last_triggered_at > table.c.last_triggered_at,
+                    ),
+                    stmt.excluded.last_triggered_at,
+                ),
+                else_=table.c.last_triggered_at,
+            ),
+        },
+    )
+    await session.execute(stmt)
+
+
+async def reconcile_counters(session: AsyncSession) -> dict[str, int]:
+    """Recount ``notifications`` into the counters row and commit; returns the drift fixed.
+
+    The row is locked before counting: writers that adjusted it earlier have
+    committed, so the count sees their rows, and writers still open adjust
+    it after our commit, on top of a count that excludes their rows.
+    """
+    counted = await session.scalar(
+        counters_query().with_for_update().execution_options(populate_existing=True)
+    )
+    actual = (await session.execute(stats_query())).one()
+
+    values = {name: getattr(actual, name) for name in COUNTERS}
+    drift = {
+        name: value - (getattr(counted, name) if counted is not None else 0)
+        for name, value in values.items()
+    }
+    stmt = upsert(session, NotificationCounters).values(
+        id=COUNTERS_ID,
+        last_triggered_at=actual.last_triggered,
+        reconciled_at=datetime.now(UTC),
+        **values,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={
+            name: stmt.excluded[name] for name in (*COUNTERS, "last_triggered_at", "reconciled_at")
+        },
+    )
+    await session.execute(stmt)
+    await session.commit()
+
+    if any(drift.values()):
+        logger.warning("Notification counters drifted, corrected by %s", drift)
+    return drift
@@ -0,0 +1,382 @@
+"""Delivery of pending notifications: bulk acknowledgements and the outbox dispatcher.
+
+``notifications`` doubles as a transactional outbox: the evaluator writes
+rows as ``pending`` in the same transaction as its state, and
+:class:`NotificationDispatcher` sends them.  Each batch:
+
+1. claims up to ``DISPATCH_BATCH_SIZE`` pending rows, oldest first, with
+   ``SELECT ... FOR UPDATE SKIP LOCKED``, stamps their ``claimed_at`` lease
+   and commits.  Concurrent dispatchers, in this process or on other
+   replicas, skip rows that are locked or leased, so a row is never sent
+   twice at the same time;
+2. pushes them through a :class:`NotificationSender`, at most
+   ``DISPATCH_CONCURRENCY`` at a time, outside any transaction: a slow
+   provider holds neither row locks (acks on those rows go through) nor a
+   connection;
+3. marks them ``delivered``/``failed`` with one bulk UPDATE (shared with
+   ``POST /notifications/deliver``), applies the counters once and commits.
+
+The lease lasts twice the longest a batch can take to send, so it only
+expires when its dispatcher died mid-batch.
+
+Pending digests (``EVAL_DIGEST``) are claimed the same way, ahead of single
+notifications, and their outcome is copied to their member notifications
+(:func:`mark_digest_deliveries`).
+
+Delivery is at-least-once: if the process dies between sending and the
+final commit, the rows are claimed again once their lease expires.
+"""
+
+import asyncio
+import importlib
+import logging
+import math
+import time
+import uuid
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Protocol
+
+from sqlalchemy import Row, Select, Update, case, false, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app import metrics
+from app.models.notification import Notification, NotificationStatus
+from app.models.notification_digest import NotificationDigest
+from app.models.user import User
+from app.services.notification_counters import apply_counters, status_changes
+from app.sql_functions import any_of
+
+logger = logging.getLogger(__name__)
+
+
+def _final_status_update(
+    session: AsyncSession,
+    model: type[Notification] | type[NotificationDigest],
+    key: InstrumentedAttribute[uuid.UUID],
+    statuses: Mapping[uuid.UUID, NotificationStatus],
+) -> Update:
+    """``UPDATE model`` setting each row's status from ``statuses``, keyed by ``key``.
+
+    ``delivered`` keeps an existing ``delivered_at`` (repeated acks),
+    ``failed`` leaves it untouched.
+    """
+    failed = [id_ for id_, status in statuses.items() if status == NotificationStatus.FAILED]
+    is_failed = any_of(session, key, failed) if failed else false()
+    return (
+        update(model)
+        .where(any_of(session, key, statuses))
+        .values(
+            status=case(
+                (is_failed, NotificationStatus.FAILED.value),
+                else_=NotificationStatus.DELIVERED.value,
+            ),
+            delivered_at=case(
+                (is_failed, model.delivered_at),
+                else_=func.coalesce(model.delivered_at, datetime.now(UTC)),
+            ),
+        )
+        .execution_options(synchronize_session="fetch")
+    )
+
+
+async def mark_deliveries(
+    session: AsyncSession, statuses: Mapping[uuid.UUID, NotificationStatus]
+) -> Sequence[Row]:
+    """Set each notification's final status in one ``UPDATE ... RETURNING``, uncommitted.
+
+    Also moves the stats counters.  Returns ``(id, status)`` of the rows found.
+    """
+    rows, deltas = await _update_notifications(session, Notification.id, statuses)
+    await apply_counters(session, deltas)
+    return rows
+
+
+async def mark_digest_deliveries(
+    session: AsyncSession, statuses: Mapping[uuid.UUID, NotificationStatus]
+) -> Counter[str]:
+    """Set each digest's final status, and its member notifications', uncommitted.
+
+    Returns the counter deltas of the members for the caller to apply.
+    """
+    await session.execute(
+        _final_status_update(session, NotificationDigest, NotificationDigest.id, statuses)
+    )
+    _, deltas = await _update_notifications(session, Notification.digest_id, statuses)
+    return deltas
+
+
+async def _update_notifications(
+    session: AsyncSession,
+    key: InstrumentedAttribute[uuid.UUID],
+    statuses: Mapping[uuid.UUID, NotificationStatus],
+) -> tuple[Sequence[Row], Counter[str]]:
+    """Final statuses by ``key``; returns ``(id, status)`` rows and counter deltas.
+
+    One ``UPDATE ... FROM (SELECT ... ORDER BY id FOR UPDATE) RETURNING``:
+    the subquery supplies the previous statuses (``RETURNING`` only sees the
+    new ones) and locks the rows in id order, so overlapping batches queue
+    up instead of deadlocking.
+    """
+    locked = (
+        select(Notification.id, Notification.status)
+        .where(any_of(session, key, statuses))
+        .order_by(Notification.id)
+        .with_for_update()
+    )
+    update_stmt = _final_status_update(session, Notification, key, statuses)
+    if session.get_bind().dialect.name == "sqlite":
+        # SQLite's RETURNING only sees the target table; its writes are serialized anyway
+        previous = dict((await session.execute(locked)).all())
+        stmt = update_stmt.returning(Notification.id, Notification.status)
+        rows = (await session.execute(stmt)).all()
+        return rows, status_changes((previous[id_], new) for id_, new in rows)
+
+    old = locked.subquery("old")
+    stmt = update_stmt.where(Notification.id == old.c.id).returning(
+        Notification.id, Notification.status, old.c.status.label("previous")
+    )
+    rows = (await session.execute(stmt)).all()
+    return rows, status_changes((row.previous, row.status) for row in rows)
+
+
+@dataclass(frozen=True)
+class OutgoingNotification:
+    id: uuid.UUID
+    user_id: uuid.UUID
+    phone: str
+    message: str
+
+
+class DeliveryError(Exception):
+    """The provider rejected the message; the notification is marked ``failed``."""
+
+
+class NotificationSender(Protocol):
+    async def send(self, notification: OutgoingNotification) -> None:
+        """Deliver one message.
+
+        Raise :class:`DeliveryError` (or time out) to mark it ``failed``; any
+        other exception aborts the batch, leaving its rows pending for a retry
+        once their lease expires.
+        """
+        ...
+
+
+class LoggingSender:
+    """Default sender: logs the message instead of contacting a provider."""
+
+    async def send(self, notification: OutgoingNotification) -> None:
+        logger.info("Delivering to %s: %s", notification.phone, notification.message)
+
+
+@dataclass
+class FakeSender:
+    """In-memory sender for tests: records messages and fails the ``failing`` ids."""
+
+    failing: set[uuid.UUID] = field(default_factory=set)
+    delay: float = 0.0
+    sent: list[OutgoingNotification] = field(default_factory=list)
+    max_in_flight: int = 0
+    _in_flight: int = 0
+
+    async def send(self, notification: OutgoingNotification) -> None:
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if notification.id in self.failing:
+                raise DeliveryError(f"Rejected {notification.id}")
+            self.sent.append(notification)
+        finally:
+            self._in_flight -= 1
+
+
+def load_sender(path: str) -> NotificationSender:
+    """Instantiate the sender class at ``"package.module:ClassName"``."""
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def pending_queue_query(batch_size: int, lease_expired: datetime) -> Select:
+    """Oldest unleased pending notifications with their recipient, locked for this transaction.
+
+    Rows claimed before ``lease_expired`` count as unleased.
+    """
+    return (
+        select(Notification.id, Notification.user_id, User.phone, Notification.message)
+        .join(User, User.id == Notification.user_id)
+        .where(
+            Notification.status == NotificationStatus.PENDING.value,
+            or_(Notification.claimed_at.is_(None), Notification.claimed_at < lease_expired),
+        )
+        .order_by(Notification.triggered_at)
+        .limit(batch_size)
+        .with_for_update(of=Notification, skip_locked=True)
+    )
+
+
+def pending_digests_query(batch_size: int, lease_expired: datetime) -> Select:
+    """Oldest unleased pending digests with their recipient, locked for this transaction."""
+    return (
+        select(
+            NotificationDigest.id,
+            NotificationDigest.user_id,
+            User.phone,
+            NotificationDigest.message,
+        )
+        .join(User, User.id == NotificationDigest.user_id)
+        .where(
+            NotificationDigest.status == NotificationStatus.PENDING.value,
+            or_(
+                NotificationDigest.claimed_at.is_(None),
+                NotificationDigest.claimed_at < lease_expired,
+            ),
+        )
+        .order_by(NotificationDigest.created_at)
+        .limit(batch_size)
+        .with_for_update(of=NotificationDigest, skip_locked=True)
+    )
+
+
+class NotificationDispatcher:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        sender: NotificationSender,
+        batch_size: int,
+        concurrency: int,
+        send_timeout: float,
+        poll_seconds: float = 5.0,
+    ) -> None:
+        self._session_factory = session_factory
+        self._sender = sender
+        self._batch_size = batch_size
+        self._concurrency = concurrency
+        self._send_timeout = send_timeout
+        self._poll_seconds = poll_seconds
+        # Twice the worst case of a batch: every send running into the timeout
+        self._lease = timedelta(seconds=2 * math.ceil(batch_size / concurrency) * send_timeout)
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _send(
+        self, notification: OutgoingNotification, limit: asyncio.Semaphore
+    ) -> NotificationStatus:
+        async with limit:
+            try:
+                await asyncio.wait_for(self._sender.send(notification), self._send_timeout)
+            except (DeliveryError, TimeoutError) as exc:
+                logger.warning("Delivery of %s failed: %s", notification.id, exc)
+                return NotificationStatus.FAILED
+            return NotificationStatus.DELIVERED
+
+    async def dispatch_batch(self) -> dict[str, int]:
+        """Claim, send and mark one batch; returns counts per final status."""
+        start = time.perf_counter()
+        async with self._session_factory() as session:
+            digests, rows = await self._claim(session)
+            if not digests and not rows:
+                return {}
+            # Sent after the claim's commit: no locks or transaction held meanwhile
+            claimed = [OutgoingNotification(*row) for row in (*digests, *rows)]
+            limit = asyncio.Semaphore(self._concurrency)
+            outcomes = await asyncio.gather(*(self._send(n, limit) for n in claimed))
+            statuses = {n.id: status for n, status in zip(claimed, outcomes, strict=True)}
+
+            digest_ids = {row.id for row in digests}
+            deltas: Counter[str] = Counter()
+            if digest_ids:
+                deltas.update(
+                    await mark_digest_deliveries(
+                        session, {id_: s for id_, s in statuses.items() if id_ in digest_ids}
+                    )
+                )
+            if rows:
+                _, changes = await _update_notifications(
+                    session,
+                    Notification.id,
+                    {id_: s for id_, s in statuses.items() if id_ not in digest_ids},
+                )
+                deltas.update(changes)
+            await apply_counters(session, deltas)
+            await session.commit()
+
+        counts = dict.fromkeys(
+            (NotificationStatus.DELIVERED.value, NotificationStatus.FAILED.value), 0
+        )
+        for status in outcomes:
+            counts[status.value] += 1
+        metrics.observe_dispatch(counts, time.perf_counter() - start)
+        return counts
+
+    async def _claim(self, session: AsyncSession) -> tuple[Sequence[Row], Sequence[Row]]:
+        """Lease up to a batch of pending digests, then notifications, and commit."""
+        now = datetime.now(UTC)
+        lease_expired = now - self._lease
+        # Digests first: each one stands for several notifications
+        digests = (
+            await session.execute(pending_digests_query(self._batch_size, lease_expired))
+        ).all()
+        rows: Sequence[Row] = []
+        if len(digests) < self._batch_size:
+            query = pending_queue_query(self._batch_size - len(digests), lease_expired)
+            rows = (await session.execute(query)).all()
+        if digests:
+            await session.execute(
+                update(NotificationDigest)
+                .where(any_of(session, NotificationDigest.id, [row.id for row in digests]))
+                .values(claimed_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        if rows:
+            await session.execute(
+                update(Notification)
+                .where(any_of(session, Notification.id, [row.id for row in rows]))
+                .values(claimed_at=now)
+                .execution_options(synchronize_session=False)
+            )
+        await session.commit()
+        return digests, rows
+
+    async def queue_depth(self) -> int:
+        async with self._session_factory() as session:
+            depth = await session.scalar(
+                select(
+                    select(func.count())
+                    .where(Notification.status == NotificationStatus.PENDING.value)
+                    .scalar_subquery()
+                    + select(func.count())
+                    .where(NotificationDigest.status == NotificationStatus.PENDING.value)
+                    .scalar_subquery()
+                )
+            )
+        metrics.observe_dispatch_queue(depth or 0)
+        return depth or 0
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                # Full batches back to back; sleep once a batch comes back short
+                while True:
+                    counts = await self.dispatch_batch()
+                    if sum(counts.values()) < self._batch_size:
+                        break
+                await self.queue_depth()
+            except Exception:
+                logger.exception("Notification dispatch failed")
+            await asyncio.sleep(self._poll_seconds)
@@ -0,0 +1,234 @@
+"""Per-user digests of one evaluation run (``EVAL_DIGEST``).
+
+A cold front crossing a region triggers a notification per field, event
+type and date: a farmer with 20 fields gets dozens of SMS from one run.  In
+digest mode the evaluator still writes every notification, as ``digested``
+instead of ``pending``, and :func:`build_digests` runs once the run's
+scopes (shards, tiers) have all committed:
+
+- users with a single waiting notification get it back as ``pending`` and
+  receive it as usual;
+- every other user gets one :class:`NotificationDigest` whose message lists
+  their notifications (``EVAL_DIGEST_MAX_LINES`` at most, then a count of the
+  rest); the notifications point at it through ``digest_id``.
+
+Grouping happens in SQL: only the first ``EVAL_DIGEST_MAX_LINES`` messages
+of each user are read, streamed ``DIGEST_BATCH_USERS`` users at a time, so
+a mass event doesn't load every notification into memory.
+
+A run's rows are only grouped once the whole run is in:
+
+- sweeps pass the scopes they cover and their start; :func:`build_digests`
+  does nothing until every one of them has a ``last_completed_at`` after
+  that start, so with ``EVAL_SHARD_COUNT > 1`` across replicas the node
+  that completes the last shard builds the digests;
+- rows written after the start of a checkpointed run still in progress
+  (``EVAL_CHECKPOINT``, which commits chunk by chunk) are left for later;
+- writers of ``digested`` rows hold :data:`DIGEST_LOCK_ID` shared
+  (:func:`hold_digest_writes`) and :func:`build_digests` takes it
+  exclusively, so it waits for transactions still writing and no rows
+  appear while it groups.
+
+Sweeps of different tiers run on their own schedules: the digest built
+after one tier also picks up whatever shards of a concurrent sweep of the
+other tier have committed, and the rest of that sweep gets a digest of its
+own.
+
+The dispatcher sends pending digests like notifications and propagates the
+outcome to their members, so per-notification history and acks still work.
+"""
+
+import logging
+import uuid
+from collections.abc import Collection, Sequence
+from datetime import UTC, datetime
+
+from sqlalchemy import ColumnElement, func, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.evaluation_state import EvaluationState
+from app.models.notification import Notification, NotificationStatus
+from app.models.notification_digest import NotificationDigest
+from app.services.notification_counters import apply_counters
+from app.sql_functions import any_of
+
+logger = logging.getLogger(__name__)
+
+# Next to the evaluation locks (EVALUATION_LOCK_ID and its two tier locks)
+DIGEST_LOCK_ID = 8675309 + 3
+# Digests inserted (and their members linked) per statement
+DIGEST_BATCH_USERS = 1000
+
+DIGEST_HEADER = "\U0001f4cb Resumen de alertas: {count} novedades en tus campos."
+DIGEST_LINE = "• {message}"
+DIGEST_MORE = "… y {count} más."
+
+
+def render_digest(messages: Sequence[str], total: int) -> str:
+    """Header, the listed ``messages`` and how many of ``total`` were left out."""
+    lines = [DIGEST_HEADER.format(count=total)]
+    lines += [DIGEST_LINE.format(message=message) for message in messages]
+    if total > len(messages):
+        lines.append(DIGEST_MORE.format(count=total - len(messages)))
+    return "\n".join(lines)
+
+
+def _undigested(cutoff: datetime | None = None) -> ColumnElement[bool]:
+    # Matches the partial index ix_notification_undigested
+    condition = (Notification.status == NotificationStatus.DIGESTED.value) & (
+        Notification.digest_id.is_(None)
+    )
+    if cutoff is not None:
+        condition &= Notification.triggered_at < cutoff
+    return condition
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite returns naive datetimes even for DateTime(timezone=True)
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
+
+async def _run_complete(session: AsyncSession, scopes: Collection[str], since: datetime) -> bool:
+    completed = await session.scalars(
+        select(EvaluationState.last_completed_at).where(EvaluationState.scope.in_(scopes))
+    )
+    done = [at for at in completed if at is not None and _as_utc(at) >= since]
+    return len(done) == len(scopes)
+
+
+async def _checkpointed_run_start(session: AsyncSession) -> datetime | None:
+    """Start of the oldest checkpointed run still in progress, if any."""
+    return await session.scalar(
+        select(func.min(EvaluationState.run_started_at)).where(
+            EvaluationState.checkpoint_alert_config_id.is_not(None)
+        )
+    )
+
+
+async def hold_digest_writes(session: AsyncSession) -> None:
+    """Before writing ``digested`` rows: keep :func:`build_digests` out until commit."""
+    if session.get_bind().dialect.name == "postgresql":
+        await session.execute(
+            text("SELECT pg_advisory_xact_lock_shared(:lock_id)"), {"lock_id": DIGEST_LOCK_ID}
+        )
+
+
+async def _lock_digest_building(session: AsyncSession) -> None:
+    if session.get_bind().dialect.name == "postgresql":
+        await session.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": DIGEST_LOCK_ID}
+        )
+
+
+async def _write_digests(
+    session: AsyncSession, digests: list[dict], undigested: ColumnElement[bool]
+) -> None:
+    await session.execute(insert(NotificationDigest), digests)
+    by_user = {digest["user_id"]: digest["id"] for digest in digests}
+    await session.execute(
+        update(Notification)
+        .where(undigested, any_of(session, Notification.user_id, list(by_user)))
+        .values(
+            digest_id=select(NotificationDigest.id)
+            .where(
+                NotificationDigest.user_id == Notification.user_id,
+                any_of(session, NotificationDigest.id, list(by_user.values())),
+            )
+            .scalar_subquery()
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def build_digests(
+    session: AsyncSession, scopes: Collection[str] = (), since: datetime | None = None
+) -> int:
+    """Group the undigested notifications by user and commit; returns digests created.
+
+    With ``scopes``, waits (returns 0) until each of them completed a run
+    started at or after ``since``.
+    """
+    await _lock_digest_building(session)
+    if scopes and since is not None and not await _run_complete(session, scopes, since):
+        await session.rollback()
+        logger.info("Digests deferred — the run's other scopes have not completed yet")
+        return 0
+    cutoff = await _checkpointed_run_start(session)
+    undigested = _undigested(cutoff)
+
+    singles = (
+        select(Notification.user_id)
+        .where(undigested)
+        .group_by(Notification.user_id)
+        .having(func.count() == 1)
+    )
+    released = (
+        await session.execute(
+            update(Notification)
+            .where(undigested, Notification.user_id.in_(singles))
+            .values(status=NotificationStatus.PENDING.value)
+            .execution_options(synchronize_session=False)
+        )
+    ).rowcount
+
+    # First EVAL_DIGEST_MAX_LINES messages of each remaining user, oldest first
+    ranked = (
+        select(
+            Notification.user_id,
+            Notification.message,
+            func.row_number()
+            .over(
+                partition_by=Notification.user_id,
+                order_by=(Notification.triggered_at, Notification.id),
+            )
+            .label("line"),
+            func.count().over(partition_by=Notification.user_id).label("total"),
+        )
+        .where(undigested)
+        .subquery()
+    )
+    listed = (
+        select(ranked.c.user_id, ranked.c.total, ranked.c.message)
+        .where(ranked.c.line <= settings.EVAL_DIGEST_MAX_LINES)
+        .order_by(ranked.c.user_id, ranked.c.line)
+    )
+
+    created = 0
+    digests: list[dict] = []
+    current: tuple[uuid.UUID, int] | None = None
+    messages: list[str] = []
+    result = await session.stream(listed.execution_options(yield_per=DIGEST_BATCH_USERS))
+    async for user_id, total, message in result:
+        if current is not None and current[0] != user_id:
+            digests.append(_digest(*current, messages))
+            messages = []
+        current = (user_id, total)
+        messages.append(message)
+        if len(digests) >= DIGEST_BATCH_USERS:
+            await _write_digests(session, digests, undigested)
+            created += len(digests)
+            digests = []
+    await result.close()
+    if current is not None:
+        digests.append(_digest(*current, messages))
+    if digests:
+        await _write_digests(session, digests, undigested)
+        created += len(digests)
+
+    if released:
+        await apply_counters(
+            session, {NotificationStatus.DIGESTED: -released, NotificationStatus.PENDING: released}
+        )
+    await session.commit()
+    return created
+
+
+def _digest(user_id: uuid.UUID, total: int, messages: list[str]) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "notification_count": total,
+        "message": render_digest(messages, total),
+        "status": NotificationStatus.PENDING.value,
+    }
@@ -0,0 +1,82 @@
+"""Weather upserts that only touch changed rows, plus the change feed they emit.
+
+Forecast refreshes mostly repeat what is already stored.  :func:`upsert_weather`
+rewrites a ``weather_data`` row only when its probability actually changed,
+so ``updated_at`` stays a real change signal and unchanged rows create no
+dead tuples.  Every inserted or re-priced (field, date, event type) is also
+recorded in ``weather_changes``; the ``EVAL_CHANGE_FEED_SECONDS`` job drains
+that feed (:func:`drain_changed_fields`) ``EVAL_CHANGE_FEED_BATCH_FIELDS``
+fields at a time and evaluates the touched fields.
+"""
+
+import uuid
+from typing import Any
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.weather_change import WeatherChange
+from app.models.weather_data import WeatherData
+from app.sql_functions import statement_now, upsert
+
+KEY_COLUMNS = ("field_id", "event_date", "event_type")
+
+
+async def upsert_weather(session: AsyncSession, stmt: Any) -> int:
+    """Execute ``stmt``, an ``upsert(session, WeatherData)`` with values or a SELECT.
+
+    Returns the number of rows inserted or changed.
+    """
+    # Statement time, not transaction start: an ingest merges long after it began
+    set_ = {"probability": stmt.excluded.probability, "updated_at": statement_now()}
+    changed_only = WeatherData.probability.is_distinct_from(stmt.excluded.probability)
+    if session.get_bind().dialect.name == "postgresql":
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_weather_field_date_type", set_=set_, where=changed_only
+        )
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=KEY_COLUMNS, set_=set_, where=changed_only)
+    stmt = stmt.returning(WeatherData.field_id, WeatherData.event_date, WeatherData.event_type)
+
+    feed = upsert(session, WeatherChange)
+    if session.get_bind().dialect.name == "postgresql":
+        # One round trip: the upsert's RETURNING feeds the change log via CTEs
+        changed = stmt.cte("changed")
+        logged = feed.from_select(KEY_COLUMNS, select(changed)).on_conflict_do_update(
+            index_elements=KEY_COLUMNS, set_={"changed_at": func.now()}
+        )
+        count = await session.scalar(
+            select(func.count()).select_from(changed).add_cte(logged.cte("logged"))
+        )
+        return count or 0
+
+    rows = (await session.execute(stmt)).all()
+    if rows:
+        await session.execute(
+            feed.on_conflict_do_update(index_elements=KEY_COLUMNS, set_={"changed_at": func.now()}),
+            [dict(zip(KEY_COLUMNS, row, strict=True)) for row in rows],
+        )
+    return len(rows)
+
+
+async def drain_changed_fields(session: AsyncSession, max_fields: int) -> set[uuid.UUID]:
+    """Delete the feed rows of up to ``max_fields`` fields and return those fields.
+
+    Longest-waiting fields go first.  Not committed here: the caller commits
+    once the fields were processed, or rolls back to leave the feed
+    untouched.  Bounding the batch keeps a provider refresh touching every
+    field from producing one evaluation too large to ever succeed, which
+    would roll back and drain the same set again on every tick.
+    """
+    batch = (
+        select(WeatherChange.field_id)
+        .group_by(WeatherChange.field_id)
+        .order_by(func.min(WeatherChange.changed_at), WeatherChange.field_id)
+        .limit(max_fields)
+    )
+    result = await session.scalars(
+        delete(WeatherChange)
+        .where(WeatherChange.field_id.in_(batch.scalar_subquery()))
+        .returning(WeatherChange.field_id)
+    )
+    return set(result)
@@ -0,0 +1,259 @@
+"""Bulk forecast ingest: stream NDJSON/CSV into a staging table, then merge.
+
+``POST /api/v1/weather/batch`` feeds the request body through
+:func:`ingest_weather` without buffering it: lines are parsed as they
+arrive, validated, and staged ``WEATHER_INGEST_CHUNK_SIZE`` rows at a time
+into a temporary table (binary ``COPY`` on PostgreSQL, ``executemany`` on
+SQLite).  A single ``INSERT ... SELECT ... ON CONFLICT`` then merges the
+staged rows into ``weather_data``; when the same (field, date, event type)
+appears several times in one batch the last line wins.  Everything runs in
+one transaction, so a failed merge leaves ``weather_data`` untouched.
+
+``merged`` counts rows inserted or whose probability changed (see
+:mod:`app.services.weather_changes`); rows repeating the stored value are
+left out.  Staged lines for unknown fields (they would violate the foreign
+key) are skipped by the merge and reported as rejected, like invalid lines.
+"""
+
+import codecs
+import csv
+import json
+import uuid
+from collections.abc import AsyncIterable, AsyncIterator, Mapping
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Literal
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    Insert,
+    MetaData,
+    Numeric,
+    Select,
+    String,
+    Table,
+    Uuid,
+    func,
+    insert,
+    select,
+    true,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.field import Field
+from app.models.weather_data import ClimateEventType, WeatherData
+from app.services.weather_changes import upsert_weather
+from app.sql_functions import new_uuid, upsert
+
+IngestFormat = Literal["ndjson", "csv"]
+
+INGEST_COLUMNS = ("field_id", "event_date", "event_type", "probability")
+MAX_REPORTED_ERRORS = 20
+
+# Per-transaction scratch table; temporary tables skip the WAL like unlogged ones
+weather_staging = Table(
+    "weather_staging",
+    MetaData(),
+    Column("line", BigInteger, nullable=False),
+    Column("field_id", Uuid, nullable=False),
+    Column("event_date", Date, nullable=False),
+    Column("event_type", String(50), nullable=False),
+    Column("probability", Numeric(3, 2), nullable=False),
+    prefixes=["TEMPORARY"],
+)
+
+StagedRow = tuple[int, uuid.UUID, date, str, Decimal]
+
+
+class IngestFormatError(ValueError):
+    """The body as a whole can't be read (e.g. a CSV header without the required columns)."""
+
+
+@dataclass
+class IngestReport:
+    received: int = 0
+    staged: int = 0
+    rejected: int = 0
+    merged: int = 0
+    errors: list[dict[str, Any]] = field(default_factory=list)
+
+    def reject(self, line: int, error: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def reject_staged(self, total: int, errors: list[dict[str, Any]]) -> None:
+        """Add ``total`` rejected staged lines, of which ``errors`` are the first ones."""
+        self.rejected += total
+        self.errors = sorted([*self.errors, *errors], key=lambda error: error["line"])
+        del self.errors[MAX_REPORTED_ERRORS:]
+
+
+def parse_record(line: int, values: Mapping[str, Any]) -> StagedRow:
+    """Validate one input record. Raises ``ValueError`` with a readable message."""
+    missing = [name for name in INGEST_COLUMNS if values.get(name) in (None, "")]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    try:
+        field_id = uuid.UUID(str(values["field_id"]))
+    except ValueError:
+        raise ValueError("field_id is not a UUID") from None
+    try:
+        event_date = date.fromisoformat(str(values["event_date"]))
+    except ValueError:
+        raise ValueError("event_date is not an ISO date") from None
+    event_type = str(values["event_type"])
+    if event_type not in ClimateEventType.__members__.values():
+        raise ValueError(f"unknown event_type {event_type!r}")
+    try:
+        probability = Decimal(str(values["probability"]))
+    except InvalidOperation:
+        raise ValueError("probability is not a number") from None
+    if not 0 <= probability <= 1:
+        raise ValueError("probability must be between 0 and 1")
+    return line, field_id, event_date, event_type, probability.quantize(Decimal("0.01"))
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines, without the line terminators."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def parse_records(
+    chunks: AsyncIterable[bytes], fmt: IngestFormat, report: IngestReport
+) -> AsyncIterator[StagedRow]:
+    """Valid rows from an NDJSON or CSV body; invalid lines are recorded in ``report``."""
+    header: list[str] | None = None
+    number = 0
+    async for text in iter_lines(chunks):
+        number += 1
+        if not text.strip():
+            continue
+        if fmt == "csv" and header is None:
+            header = [name.strip() for name in next(csv.reader([text]))]
+            missing = set(INGEST_COLUMNS) - set(header)
+            if missing:
+                raise IngestFormatError(f"CSV header is missing {', '.join(sorted(missing))}")
+            continue
+
+        report.received += 1
+        try:
+            if fmt == "csv":
+                assert header is not None
+                values: Any = dict(zip(header, next(csv.reader([text])), strict=False))
+            else:
+                values = json.loads(text)
+                if not isinstance(values, dict):
+                    raise ValueError("expected a JSON object")
+            yield parse_record(number, values)
+        except ValueError as exc:  # json.JSONDecodeError included
+            report.reject(number, str(exc))
+
+
+async def _chunked(rows: AsyncIterable[StagedRow], size: int) -> AsyncIterator[list[StagedRow]]:
+    chunk: list[StagedRow] = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _stage(session: AsyncSession, rows: list[StagedRow]) -> None:
+    connection = await session.connection()
+    if connection.dialect.name == "postgresql":
+        raw = await connection.get_raw_connection()
+        assert raw.driver_connection is not None
+        await raw.driver_connection.copy_records_to_table(
+            weather_staging.name,
+            records=rows,
+            columns=[column.name for column in weather_staging.columns],
+        )
+    else:
+        keys = [column.name for column in weather_staging.columns]
+        await connection.execute(
+            insert(weather_staging), [dict(zip(keys, row, strict=True)) for row in rows]
+        )
+
+
+def unknown_fields_query() -> Select:
+    """First staged lines whose field doesn't exist, with the total count."""
+    staged = weather_staging.c
+    return (
+        select(staged.line, staged.field_id, func.count().over().label("total"))
+        .where(~select(Field.id).where(Field.id == staged.field_id).exists())
+        .order_by(staged.line)
+        .limit(MAX_REPORTED_ERRORS)
+    )
+
+
+def merge_staged_query(session: AsyncSession) -> Insert:
+    """``INSERT ... SELECT`` of the latest staged row per (field, date, event type).
+
+    Conflict handling is added by :func:`upsert_weather`.
+    """
+    staged = weather_staging.c
+    latest = (
+        select(func.max(staged.line).label("line"))
+        .group_by(staged.field_id, staged.event_date, staged.event_type)
+        .subquery()
+    )
+    rows = (
+        select(
+            new_uuid(), staged.field_id, staged.event_date, staged.event_type, staged.probability
+        )
+        .join(latest, latest.c.line == staged.line)
+        .join(Field, Field.id == staged.field_id)
+        # SQLite can't tell a join's ON from ON CONFLICT without a WHERE clause
+        .where(true())
+    )
+    return upsert(session, WeatherData).from_select(
+        ["id", "field_id", "event_date", "event_type", "probability"], rows
+    )
+
+
+async def ingest_weather(
+    session: AsyncSession,
+    chunks: AsyncIterable[bytes],
+    fmt: IngestFormat,
+    chunk_size: int | None = None,
+) -> dict:
+    """Stage and merge a streamed NDJSON/CSV body. Returns an :class:`IngestReport` dict."""
+    chunk_size = chunk_size or settings.WEATHER_INGEST_CHUNK_SIZE
+    report = IngestReport()
+    connection = await session.connection()
+    await connection.run_sync(weather_staging.create)
+
+    async for rows in _chunked(parse_records(chunks, fmt, report), chunk_size):
+        await _stage(session, rows)
+        report.staged += len(rows)
+
+    if report.staged:
+        unknown = (await session.execute(unknown_fields_query())).all()
+        if unknown:
+            report.reject_staged(
+                unknown[0].total,
+                [
+                    {"line": row.line, "error": f"unknown field_id {row.field_id}"}
+                    for row in unknown
+                ],
+            )
+        report.merged = await upsert_weather(session, merge_staged_query(session))
+    await connection.run_sync(weather_staging.drop)
+    await session.commit()
+    return asdict(report)
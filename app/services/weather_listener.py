@@ -0,0 +1,132 @@
+"""Event-driven evaluation: LISTEN for weather changes, evaluate the touched fields.
+
+A trigger on ``weather_data`` (migration 009) sends ``NOTIFY weather_updates``
+with the field id whenever a forecast is inserted or its probability changes.
+Field ids are collected for ``EVAL_DEBOUNCE_SECONDS`` and evaluated together in
+one targeted run, so a burst of upserts costs a single evaluation.  The
+interval job stays as the safety-net sweep for anything missed while the
+listener was disconnected.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections.abc import Awaitable, Callable, Iterable
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+WEATHER_UPDATES_CHANNEL = "weather_updates"
+RECONNECT_DELAY_SECONDS = 5.0
+
+FieldEvaluator = Callable[[set[uuid.UUID]], Awaitable[dict]]
+
+
+class FieldDebouncer:
+    """Batches field ids and hands them to ``evaluate`` at most once per window.
+
+    The first id opens a window of ``delay`` seconds; ids arriving meanwhile
+    join the batch.  Ids arriving while a batch is being evaluated open the
+    next window, so evaluations never overlap.  A batch whose evaluation was
+    skipped because a sweep held the lock (``locked`` in the result) is put
+    back and retried in the next window.
+    """
+
+    def __init__(self, evaluate: FieldEvaluator, delay: float) -> None:
+        self._evaluate = evaluate
+        self._delay = delay
+        self._pending: set[uuid.UUID] = set()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def pending(self) -> frozenset[uuid.UUID]:
+        return frozenset(self._pending)
+
+    def add(self, field_ids: Iterable[uuid.UUID]) -> None:
+        self._pending.update(field_ids)
+        if self._pending and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        try:
+            while self._pending:
+                await asyncio.sleep(self._delay)
+                batch, self._pending = self._pending, set()
+                try:
+                    result = await self._evaluate(batch)
+                except Exception:
+                    # The next sweep covers these fields anyway
+                    logger.exception("Targeted evaluation failed for %d fields", len(batch))
+                    continue
+                if result.get("locked"):
+                    self._pending |= batch
+        finally:
+            self._task = None
+
+
+class WeatherUpdateListener:
+    """Keeps a dedicated asyncpg connection LISTENing and feeds a :class:`FieldDebouncer`.
+
+    LISTEN needs a long-lived session, so it uses its own connection outside
+    the SQLAlchemy pool and reconnects after ``RECONNECT_DELAY_SECONDS`` if it
+    drops.
+    """
+
+    def __init__(self, dsn: str, evaluate: FieldEvaluator, debounce_seconds: float) -> None:
+        self._dsn = dsn
+        self._debouncer = FieldDebouncer(evaluate, debounce_seconds)
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._debouncer.close()
+
+    def handle_payload(self, payload: str) -> None:
+        try:
+            field_id = uuid.UUID(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed %s payload: %r", WEATHER_UPDATES_CHANNEL, payload)
+            return
+        self._debouncer.add([field_id])
+
+    async def _listen_forever(self) -> None:
+        while True:
+            try:
+                await self._listen_once()
+            except Exception:
+                logger.exception("Weather update listener failed")
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    async def _listen_once(self) -> None:
+        conn = await asyncpg.connect(self._dsn)
+        try:
+            lost = asyncio.Event()
+            conn.add_termination_listener(lambda _conn: lost.set())
+            await conn.add_listener(
+                WEATHER_UPDATES_CHANNEL,
+                lambda _conn, _pid, _channel, payload: self.handle_payload(payload),
+            )
+            logger.info("Listening for weather updates on %s", WEATHER_UPDATES_CHANNEL)
+            await lost.wait()
+            logger.warning("Weather update listener disconnected, reconnecting")
+        finally:
+            if not conn.is_closed():
+                await conn.close()
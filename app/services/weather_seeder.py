@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.field import Field
 from app.models.user import User
 from app.models.weather_data import WeatherData
+from app.services.weather_changes import upsert_weather
 
 SEED_USER_ID = uuid.UUID("a1b2c3d4-e5f6-7890-abcd-ef1234567890")
 SEED_FIELD_ESPERANZA_ID = uuid.UUID("f1e2d3c4-b5a6-7890-fedc-ba0987654321")
@@ -65,35 +66,33 @@ async def seed_data(session: AsyncSession) -> dict:
             .on_conflict_do_nothing(index_elements=["id"])
         )
 
-    # Upsert weather data
+    # Upsert weather data; unchanged forecasts are left alone
     today = date.today()
-    weather_count = 0
+    weather_rows = []
     for field_id, events in SEED_WEATHER.items():
         for event_type, probs in events.items():
             for day_offset, prob in enumerate(probs):
                 event_date = today + timedelta(days=day_offset)
-                await session.execute(
-                    insert(WeatherData)
-                    .values(
-                        id=uuid.uuid5(uuid.NAMESPACE_DNS, f"{field_id}-{event_date}-{event_type}"),
-                        field_id=field_id,
-                        event_date=event_date,
-                        event_type=event_type,
-                        probability=prob,
-                    )
-                    .on_conflict_do_update(
-                        constraint="uq_weather_field_date_type",
-                        set_={"probability": prob, "updated_at": text("now()")},
-                    )
+                weather_rows.append(
+                    {
+                        "id": uuid.uuid5(
+                            uuid.NAMESPACE_DNS, f"{field_id}-{event_date}-{event_type}"
+                        ),
+                        "field_id": field_id,
+                        "event_date": event_date,
+                        "event_type": event_type,
+                        "probability": prob,
+                    }
                 )
-                weather_count += 1
+    weather_changed = await upsert_weather(session, insert(WeatherData).values(weather_rows))
 
     await session.commit()
 
     return {
         "users": 1,
         "fields": 2,
-        "weather_records": weather_count,
+        "weather_records": len(weather_rows),
+        "weather_changed": weather_changed,
     }
 
 
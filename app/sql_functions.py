@@ -0,0 +1,153 @@
+"""Portable SQL constructs compiled per dialect.
+
+Production runs on PostgreSQL; the test suite runs on SQLite in-memory.
+Each construct renders the native PostgreSQL expression and an
+equivalent SQLite fallback so the same query builders work in both.
+"""
+
+from collections.abc import Collection
+from typing import Any
+
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    Integer,
+    String,
+    Uuid,
+    any_,
+    bindparam,
+    literal,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+def upsert(session: AsyncSession, entity: Any) -> Any:
+    """Dialect-specific INSERT supporting ``on_conflict_do_update``/``excluded``."""
+    if session.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(entity)
+    return postgresql.insert(entity)
+
+
+def any_of(session: AsyncSession, column: Any, values: Collection[Any]) -> ColumnElement[bool]:
+    """``column = ANY(:values)`` with one array parameter; expanding ``IN`` on SQLite.
+
+    Keeps large id lists to a single bind parameter on PostgreSQL (asyncpg
+    caps a statement at 32767).
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        return column.in_(values)
+    return column == any_(bindparam(None, list(values), type_=postgresql.ARRAY(column.type)))
+
+
+class field_shard(FunctionElement[int]):
+    """Deterministic shard number in ``[0, shard_count)`` for a UUID column.
+
+    Usage: ``field_shard(AlertConfig.field_id, 4) == 2``.
+    """
+
+    type = Integer()
+    inherit_cache = True
+
+    def __init__(self, column: Any, shard_count: int) -> None:
+        super().__init__(column, literal(shard_count, Integer()))
+
+
+@compiles(field_shard, "postgresql")
+def _pg_field_shard(element: field_shard, compiler: Any, **kw: Any) -> str:
+    column, shard_count = (compiler.process(c, **kw) for c in element.clauses)
+    # hashtext() returns int4; widen before abs() so INT_MIN doesn't overflow
+    return f"(abs(hashtext(CAST({column} AS text))::bigint) % {shard_count})"
+
+
+@compiles(field_shard)
+def _default_field_shard(element: field_shard, compiler: Any, **kw: Any) -> str:
+    # SQLite stores UUIDs as 32 hex chars: use the last two digits (0..255)
+    column, shard_count = (compiler.process(c, **kw) for c in element.clauses)
+    digits = "'0123456789abcdef'"
+    return (
+        f"(((instr({digits}, lower(substr({column}, -1, 1))) - 1) "
+        f"+ 16 * (instr({digits}, lower(substr({column}, -2, 1))) - 1)) % {shard_count})"
+    )
+
+
+class new_uuid(FunctionElement[Any]):
+    """Server-side random UUID, for INSERT ... SELECT without Python defaults."""
+
+    type = Uuid()
+    inherit_cache = True
+
+
+@compiles(new_uuid, "postgresql")
+def _pg_new_uuid(element: new_uuid, compiler: Any, **kw: Any) -> str:
+    return "gen_random_uuid()"
+
+
+@compiles(new_uuid)
+def _default_new_uuid(element: new_uuid, compiler: Any, **kw: Any) -> str:
+    # Matches SQLAlchemy's CHAR(32) hex storage of UUIDs on SQLite
+    return "lower(hex(randomblob(16)))"
+
+
+class percent(FunctionElement[int]):
+    """``int(value * 100)`` with Python's float semantics (truncation, not rounding)."""
+
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(percent, "postgresql")
+def _pg_percent(element: percent, compiler: Any, **kw: Any) -> str:
+    (value,) = (compiler.process(c, **kw) for c in element.clauses)
+    # float8 multiply like Python floats; a plain ::int cast would round
+    return f"CAST(trunc(CAST({value} AS float8) * 100) AS integer)"
+
+
+@compiles(percent)
+def _default_percent(element: percent, compiler: Any, **kw: Any) -> str:
+    (value,) = (compiler.process(c, **kw) for c in element.clauses)
+    return f"CAST(CAST({value} AS REAL) * 100 AS INTEGER)"
+
+
+class iso_date(FunctionElement[str]):
+    """``date.strftime("%Y-%m-%d")`` independent of the server's DateStyle."""
+
+    type = String()
+    inherit_cache = True
+
+
+@compiles(iso_date, "postgresql")
+def _pg_iso_date(element: iso_date, compiler: Any, **kw: Any) -> str:
+    (value,) = (compiler.process(c, **kw) for c in element.clauses)
+    return f"to_char({value}, 'YYYY-MM-DD')"
+
+
+@compiles(iso_date)
+def _default_iso_date(element: iso_date, compiler: Any, **kw: Any) -> str:
+    # SQLite stores dates as ISO strings already
+    (value,) = (compiler.process(c, **kw) for c in element.clauses)
+    return f"CAST({value} AS TEXT)"
+
+
+class statement_now(FunctionElement[Any]):
+    """Start of the current statement, unlike ``now()`` (start of the transaction).
+
+    For change stamps compared against watermarks: a long transaction, e.g. a
+    streamed upload staged before its merge, must not stamp rows with the
+    time it began.
+    """
+
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(statement_now, "postgresql")
+def _pg_statement_now(element: statement_now, compiler: Any, **kw: Any) -> str:
+    return "statement_timestamp()"
+
+
+@compiles(statement_now)
+def _default_statement_now(element: statement_now, compiler: Any, **kw: Any) -> str:
+    return "CURRENT_TIMESTAMP"
@@ -0,0 +1,205 @@
+"""Benchmark ``evaluate_alerts`` end to end on PostgreSQL at increasing sizes.
+
+Usage::
+
+    python -m benchmarks.bench_evaluator --pairs 10000,100000,1000000 --output bench.json
+
+For each size the application tables in ``--database-url`` are truncated and
+refilled with the synthetic dataset generator (sized to roughly that many
+alert pairs), then three runs are timed:
+
+- ``first``: evaluation right after loading, against the generated history.
+- ``steady``: an immediate second run with no changes (cooldowns, no deltas).
+- ``mass_alert``: every forecast jumps to 99% after cooldowns expired, so
+  nearly every active pair notifies.
+
+Each run reports wall time, runs/sec, rows/sec, SQL statements issued, peak
+RSS and (with ``--trace-memory``, which slows Python down) the peak of
+Python allocations.  Evaluator settings (``EVAL_STRATEGY``, ``EVAL_CHUNK_SIZE``,
+...) come from the environment as usual and are recorded in the output so
+JSON files from different commits can be compared.
+
+Destructive: only point it at a scratch database.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import resource
+import subprocess
+import time
+import tracemalloc
+from datetime import UTC, datetime
+
+import asyncpg
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.database import asyncpg_dsn
+from app.services.alert_evaluator import evaluate_alerts
+from app.services.dataset_generator import DatasetSpec, load_dataset, truncate_dataset
+
+FIELDS_PER_USER = 10
+ALERTS_PER_FIELD = 2
+DAYS = 14
+
+RECORDED_SETTINGS = (
+    "EVAL_STRATEGY",
+    "EVAL_DECISION_ENGINE",
+    "EVAL_CHUNK_SIZE",
+    "EVAL_SHARD_COUNT",
+    "EVAL_INCREMENTAL",
+    "EVAL_CHECKPOINT",
+    "EVAL_URGENT_INTERVAL_MINUTES",
+    "COOLDOWN_HOURS",
+    "DELTA_THRESHOLD",
+)
+
+
+def _spec_for(pairs: int, seed: int) -> DatasetSpec:
+    users = math.ceil(pairs / (FIELDS_PER_USER * ALERTS_PER_FIELD * DAYS))
+    return DatasetSpec(
+        users=users,
+        fields_per_user=FIELDS_PER_USER,
+        days=DAYS,
+        alerts_per_field=ALERTS_PER_FIELD,
+        seed=seed,
+    )
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def _timed_run(
+    session_factory: async_sessionmaker[AsyncSession], queries: list[int], trace_memory: bool
+) -> dict:
+    queries[0] = 0
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    async with session_factory() as session:
+        result = await evaluate_alerts(session)
+    elapsed = time.perf_counter() - start
+    peak_python_mb = None
+    if trace_memory:
+        peak_python_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+        tracemalloc.stop()
+
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "runs_per_s": round(1 / elapsed, 3),
+        "evaluated": result["evaluated"],
+        "notifications_created": result["notifications_created"],
+        "rows_per_s": round(result["evaluated"] / elapsed),
+        "queries": queries[0],
+        "max_rss_mb": _max_rss_mb(),
+        "peak_python_mb": peak_python_mb,
+        "phases": result.get("phases"),
+    }
+
+
+async def bench_size(
+    conn: asyncpg.Connection,
+    session_factory: async_sessionmaker[AsyncSession],
+    queries: list[int],
+    pairs: int,
+    seed: int,
+    trace_memory: bool,
+) -> dict:
+    spec = _spec_for(pairs, seed)
+    await truncate_dataset(conn)
+    load_start = time.perf_counter()
+    rows = await load_dataset(conn, spec)
+    load_s = time.perf_counter() - load_start
+    rss_after_load = _max_rss_mb()
+
+    runs = {"first": await _timed_run(session_factory, queries, trace_memory)}
+    runs["steady"] = await _timed_run(session_factory, queries, trace_memory)
+
+    # Let every cooldown expire, then push all forecasts over any threshold
+    await conn.execute(
+        "UPDATE notification_state SET triggered_at = triggered_at - make_interval(hours => $1)",
+        settings.COOLDOWN_HOURS + 1,
+    )
+    # Raw SQL bypasses the app's write paths: stamp updated_at like they do,
+    # or an EVAL_INCREMENTAL run would skip every changed forecast
+    await conn.execute(
+        "UPDATE weather_data SET probability = 0.99, updated_at = statement_timestamp() "
+        "WHERE probability < 0.99"
+    )
+    await conn.execute("ANALYZE weather_data")
+    runs["mass_alert"] = await _timed_run(session_factory, queries, trace_memory)
+
+    return {
+        "target_pairs": pairs,
+        "dataset": rows,
+        "load_s": round(load_s, 2),
+        # Peak RSS is process-wide; runs only grow it past this baseline
+        "max_rss_after_load_mb": rss_after_load,
+        "runs": runs,
+    }
+
+
+async def run(database_url: str, sizes: list[int], seed: int, trace_memory: bool) -> dict:
+    engine = create_async_engine(database_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    queries = [0]
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count_query(*_args) -> None:
+        queries[0] += 1
+
+    conn = await asyncpg.connect(asyncpg_dsn(database_url))
+    try:
+        results = [
+            await bench_size(conn, session_factory, queries, pairs, seed, trace_memory)
+            for pairs in sizes
+        ]
+    finally:
+        await conn.close()
+        await engine.dispose()
+
+    return {
+        "commit": _git_commit(),
+        "started_at": datetime.now(UTC).isoformat(),
+        "settings": {name: getattr(settings, name) for name in RECORDED_SETTINGS},
+        "seed": seed,
+        "sizes": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--pairs",
+        default="10000,100000,1000000",
+        help="comma-separated target alert pair counts",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--output", default="bench-evaluator.json")
+    parser.add_argument("--trace-memory", action="store_true")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.pairs.split(",")]
+    report = asyncio.run(run(args.database_url, sizes, args.seed, args.trace_memory))
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Query-plan regression checks for the hot SQL paths on PostgreSQL.
+
+Usage::
+
+    python -m benchmarks.query_plans --load --users 2000      # fresh dataset, compare
+    python -m benchmarks.query_plans --update-baseline        # accept current plans
+
+Runs ``EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`` on the evaluator pairs
+query, a user's notification list, the job stats lookup and its
+reconciliation aggregate, built with
+the same query builders the application uses.  For each plan it records the
+node types, relations and indexes, estimated vs actual rows and shared
+buffer hits/reads, and compares them with ``--baseline``:
+
+- a relation that was read through an index in the baseline is now read by
+  a ``Seq Scan`` (e.g. after a dropped index or a changed join);
+- shared buffers touched grew past ``--buffer-factor`` × baseline (only when
+  the dataset spec matches the baseline's);
+- a node's row estimate (over all its loops) is off by more than
+  ``--misestimate-factor``; nodes cut short by a ``Limit`` only count when
+  they return more rows than planned.
+
+Exits with status 1 when any check fails.  ``--load`` truncates the target
+database: only point it at a scratch one.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from collections.abc import Callable, Iterator
+from dataclasses import asdict
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import asyncpg
+from sqlalchemy import Select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.database import asyncpg_dsn
+from app.routers.notifications import user_notifications_query
+from app.services.alert_evaluator import evaluation_pairs_query
+from app.services.dataset_generator import DatasetSpec, load_dataset, truncate_dataset
+from app.services.notification_counters import counters_query, stats_query
+
+DEFAULT_BASELINE = Path(__file__).with_name("query_plans_baseline.json")
+
+# The user-facing queries are explained for the user with the most notifications
+BUSIEST_USER_SQL = """
+    SELECT user_id
+    FROM notifications
+    GROUP BY user_id
+    ORDER BY count(*) DESC
+    LIMIT 1
+"""
+
+HotQuery = Callable[[dict[str, Any]], Select]
+
+HOT_QUERIES: dict[str, HotQuery] = {
+    "evaluator_pairs": lambda ctx: evaluation_pairs_query(ctx["today"]),
+    "list_notifications": lambda ctx: user_notifications_query(ctx["user_id"]),
+    "job_stats": lambda ctx: counters_query(),
+    "stats_reconcile": lambda ctx: stats_query(),
+}
+
+
+def _walk(plan: dict, under_limit: bool = False) -> Iterator[tuple[dict, bool]]:
+    yield plan, under_limit
+    for child in plan.get("Plans", []):
+        yield from _walk(child, under_limit or plan["Node Type"] == "Limit")
+
+
+def summarize(explain: list[dict]) -> dict:
+    """Reduce an ``EXPLAIN (FORMAT JSON)`` document to the fields we track.
+
+    Rows are totals over all loops: ``Plan Rows`` and ``Actual Rows`` are both
+    per loop, so the inner side of a nested loop is compared like for like.
+    Nodes under a ``Limit`` stop as soon as it is satisfied and return fewer
+    rows than planned; only an underestimate counts against them.
+    """
+    root = explain[0]
+    nodes = []
+    for node, under_limit in _walk(root["Plan"]):
+        loops = node.get("Actual Loops", 1)
+        estimated = node.get("Plan Rows", 0) * loops
+        actual = node.get("Actual Rows", 0) * loops
+        misestimate = round(max(estimated, actual, 1) / max(min(estimated, actual), 1), 1)
+        if under_limit and actual < estimated:
+            misestimate = None
+        nodes.append(
+            {
+                "node": node["Node Type"],
+                "relation": node.get("Relation Name"),
+                "index": node.get("Index Name"),
+                "loops": loops,
+                "estimated_rows": estimated,
+                "actual_rows": actual,
+                "misestimate": misestimate,
+                "shared_hit": node.get("Shared Hit Blocks", 0),
+                "shared_read": node.get("Shared Read Blocks", 0),
+            }
+        )
+    plan = root["Plan"]
+    return {
+        "execution_ms": root.get("Execution Time"),
+        "planning_ms": root.get("Planning Time"),
+        "node_types": sorted({n["node"] for n in nodes}),
+        "scans": {
+            relation: sorted({n["node"] for n in nodes if n["relation"] == relation})
+            for relation in sorted({n["relation"] for n in nodes if n["relation"]})
+        },
+        "shared_buffers": plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0),
+        "max_misestimate": max(
+            (n["misestimate"] for n in nodes if n["misestimate"] is not None), default=1.0
+        ),
+        "nodes": nodes,
+    }
+
+
+def compare(
+    name: str,
+    current: dict,
+    baseline: dict | None,
+    same_dataset: bool,
+    buffer_factor: float,
+    misestimate_factor: float,
+) -> list[str]:
+    """Human-readable regressions of ``current`` against ``baseline``."""
+    problems = []
+    if current["max_misestimate"] > misestimate_factor:
+        problems.append(
+            f"{name}: row estimate off by {current['max_misestimate']}x "
+            f"(limit {misestimate_factor}x)"
+        )
+    if baseline is None:
+        return problems
+
+    for relation, scans in current["scans"].items():
+        before = set(baseline["scans"].get(relation, []))
+        if "Seq Scan" in scans and before and "Seq Scan" not in before:
+            problems.append(
+                f"{name}: Seq Scan on {relation} (baseline used {', '.join(sorted(before))})"
+            )
+
+    if same_dataset and baseline["shared_buffers"]:
+        growth = current["shared_buffers"] / baseline["shared_buffers"]
+        if growth > buffer_factor:
+            problems.append(
+                f"{name}: shared buffers {baseline['shared_buffers']} -> "
+                f"{current['shared_buffers']} ({growth:.1f}x)"
+            )
+    return problems
+
+
+async def explain_all(database_url: str) -> dict[str, dict]:
+    engine = create_async_engine(database_url)
+    dialect = postgresql.dialect()
+    try:
+        async with engine.connect() as conn:
+            user_id = (await conn.execute(text(BUSIEST_USER_SQL))).scalar()
+            if user_id is None:
+                raise SystemExit("No notifications in the database: run with --load first")
+            context = {"today": date.today(), "user_id": user_id}
+
+            plans = {}
+            for name, build in HOT_QUERIES.items():
+                sql = build(context).compile(
+                    dialect=dialect, compile_kwargs={"literal_binds": True}
+                )
+                result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"))
+                explain = result.scalar()
+                plans[name] = summarize(
+                    json.loads(explain) if isinstance(explain, str) else explain
+                )
+            return plans
+    finally:
+        await engine.dispose()
+
+
+async def run(args: argparse.Namespace) -> int:
+    spec = DatasetSpec(users=args.users, seed=args.seed)
+    if args.load:
+        conn = await asyncpg.connect(asyncpg_dsn(args.database_url))
+        try:
+            await truncate_dataset(conn)
+            await load_dataset(conn, spec)
+        finally:
+            await conn.close()
+
+    plans = await explain_all(args.database_url)
+    report = {"dataset": asdict(spec) if args.load else None, "plans": plans}
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {baseline_path}")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+    same_dataset = baseline is not None and baseline["dataset"] == report["dataset"]
+    problems = []
+    for name, current in plans.items():
+        problems += compare(
+            name,
+            current,
+            baseline["plans"].get(name) if baseline else None,
+            same_dataset,
+            args.buffer_factor,
+            args.misestimate_factor,
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    for name, current in plans.items():
+        scans = ", ".join(f"{rel}: {'/'.join(kinds)}" for rel, kinds in current["scans"].items())
+        print(
+            f"{name}: {current['execution_ms']:.1f} ms, buffers={current['shared_buffers']}, {scans}"
+        )
+    for problem in problems:
+        print(f"REGRESSION {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--load", action="store_true", help="truncate and load a fresh dataset")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="also write the current plans to this JSON file")
+    parser.add_argument("--buffer-factor", type=float, default=2.0)
+    parser.add_argument("--misestimate-factor", type=float, default=100.0)
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
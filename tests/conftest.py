@@ -1,6 +1,7 @@
 import uuid
 from datetime import date, timedelta
 
+import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 from sqlalchemy import event
@@ -12,6 +13,7 @@ from app.models import Base
 from app.models.field import Field
 from app.models.user import User
 from app.models.weather_data import WeatherData
+from app.services.alert_config_cache import alert_config_cache
 
 # Use SQLite for tests (in-memory)
 TEST_DB_URL = "sqlite+aiosqlite:///:memory:"
@@ -33,6 +35,29 @@ def set_sqlite_pragma(dbapi_conn, connection_record):
     cursor.close()
 
 
+# asyncpg rejects statements with more bind parameters than this
+ASYNCPG_MAX_BIND_PARAMS = 32767
+
+
+@pytest.fixture
+def max_bind_params():
+    """Returns the most bind parameters a single statement used so far in the test.
+
+    SQLite accepts far more than asyncpg, so tests of large batches assert
+    against :data:`ASYNCPG_MAX_BIND_PARAMS` through this.
+    """
+    largest = 0
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        nonlocal largest
+        if not executemany:
+            largest = max(largest, len(parameters))
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+    yield lambda: largest
+    event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+
 # Fixed UUIDs for tests
 USER_ID = uuid.UUID("a1b2c3d4-e5f6-7890-abcd-ef1234567890")
 FIELD_ID = uuid.UUID("f1e2d3c4-b5a6-7890-fedc-ba0987654321")
@@ -111,6 +136,8 @@ async def client(seeded_session: AsyncSession):
         yield seeded_session
 
     app.dependency_overrides[get_db] = override_get_db
+    # Every test starts from a fresh database with the same fixed ids
+    alert_config_cache.clear()
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -0,0 +1,79 @@
+import uuid
+from datetime import UTC, datetime
+
+from app.schemas.alert_config import AlertConfigResponse
+from app.services.alert_config_cache import AlertCacheInvalidationListener, AlertConfigCache
+from tests.conftest import FIELD_2_ID, FIELD_ID
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _listing(field_id: uuid.UUID) -> list[AlertConfigResponse]:
+    now = datetime.now(UTC)
+    return [
+        AlertConfigResponse(
+            id=uuid.uuid4(),
+            field_id=field_id,
+            event_type="frost",
+            threshold=0.7,
+            is_active=True,
+            created_at=now,
+            updated_at=now,
+        )
+    ]
+
+
+class TestAlertConfigCache:
+    def test_hit_until_ttl_expires(self):
+        clock = FakeClock()
+        cache = AlertConfigCache(ttl_seconds=30, max_entries=10, clock=clock)
+        assert cache.get(FIELD_ID) is None
+
+        cache.put(FIELD_ID, _listing(FIELD_ID), cache.token())
+        assert cache.get(FIELD_ID)[0].field_id == FIELD_ID
+
+        clock.now = 31
+        assert cache.get(FIELD_ID) is None
+        assert (cache.hits, cache.misses) == (1, 2)
+        assert len(cache) == 0
+
+    def test_least_recently_used_is_dropped(self):
+        cache = AlertConfigCache(ttl_seconds=30, max_entries=2)
+        third = uuid.uuid4()
+        cache.put(FIELD_ID, _listing(FIELD_ID), cache.token())
+        cache.put(FIELD_2_ID, _listing(FIELD_2_ID), cache.token())
+        cache.get(FIELD_ID)
+        cache.put(third, _listing(third), cache.token())
+
+        assert cache.get(FIELD_2_ID) is None
+        assert cache.get(FIELD_ID) is not None
+        assert cache.get(third) is not None
+
+    def test_read_overtaken_by_invalidation_is_not_stored(self):
+        cache = AlertConfigCache(ttl_seconds=30, max_entries=10)
+        token = cache.token()
+        cache.evict(FIELD_ID)
+        cache.put(FIELD_ID, _listing(FIELD_ID), token)
+        assert cache.get(FIELD_ID) is None
+
+    def test_disabled_with_zero_ttl(self):
+        cache = AlertConfigCache(ttl_seconds=0, max_entries=10)
+        cache.put(FIELD_ID, _listing(FIELD_ID), cache.token())
+        assert cache.get(FIELD_ID) is None
+
+
+def test_listener_payloads_evict_fields():
+    cache = AlertConfigCache(ttl_seconds=30, max_entries=10)
+    cache.put(FIELD_ID, _listing(FIELD_ID), cache.token())
+    listener = AlertCacheInvalidationListener("postgresql://unused", cache)
+
+    listener.handle_payload("not-a-uuid")
+    assert cache.get(FIELD_ID) is not None
+    listener.handle_payload(str(FIELD_ID))
+    assert cache.get(FIELD_ID) is None
@@ -2,18 +2,23 @@ import uuid
 from datetime import UTC, date, datetime, timedelta
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.alert_config import AlertConfig
+from app.models.evaluation_state import EvaluationState
 from app.models.notification import Notification, NotificationType
+from app.models.notification_state import NotificationState
 from app.models.weather_data import WeatherData
+from app.services import alert_evaluator
 from app.services.alert_evaluator import (
+    Tier,
     build_message,
     determine_action,
     evaluate_alerts,
 )
-from tests.conftest import FIELD_ID
+from tests.conftest import FIELD_2_ID, FIELD_ID, USER_ID
 
 
 @pytest.fixture
@@ -210,6 +215,8 @@ class TestEvaluateAlerts:
         notifs = (await seeded_session.execute(select(Notification))).scalars().all()
         risk_increased = [n for n in notifs if n.notification_type == "risk_increased"]
         assert len(risk_increased) >= 1
+        # Owner is denormalized onto each notification for the user feed
+        assert {(n.field_id, n.user_id) for n in notifs} == {(FIELD_ID, USER_ID)}
 
     @pytest.mark.asyncio
     async def test_first_below_threshold(self, seeded_session: AsyncSession):
@@ -326,3 +333,552 @@ class TestEvaluateAlerts:
 
         # Second run: cooldown should prevent new notifications for same pairs
         assert result2["notifications_created"] == 0
+
+    @pytest.mark.asyncio
+    async def test_streams_in_small_chunks(self, seeded_session: AsyncSession, monkeypatch):
+        """Chunk size doesn't change the outcome, only how rows are fetched."""
+        monkeypatch.setattr(settings, "EVAL_CHUNK_SIZE", 1)
+        seeded_session.add_all(
+            [
+                AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.30),
+                AlertConfig(field_id=FIELD_ID, event_type="rain", threshold=0.30),
+            ]
+        )
+        await seeded_session.commit()
+
+        result = await evaluate_alerts(seeded_session)
+        assert result["evaluated"] == 3
+        assert result["notifications_created"] == 3
+        assert result["write_s"] >= 0
+
+        notifs = (await seeded_session.execute(select(Notification))).scalars().all()
+        assert len(notifs) == 3
+        assert all(n.status == "pending" for n in notifs)
+
+    @pytest.mark.asyncio
+    async def test_reports_phases_and_actions(self, seeded_session: AsyncSession):
+        seeded_session.add(AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.70))
+        await seeded_session.commit()
+
+        result = await evaluate_alerts(seeded_session)
+
+        assert set(result["phases"]) == {"query", "decide", "render", "flush", "commit"}
+        assert all(seconds >= 0 for seconds in result["phases"].values())
+        # Frost D+0 at 0.85 alerts, D+1 at 0.40 does not
+        assert result["actions"]["risk_increased"] == 1
+        assert result["actions"]["risk_ended"] == 0
+        assert result["actions"]["none"] == 1
+
+    @pytest.mark.asyncio
+    async def test_notification_state_tracks_latest(self, seeded_session: AsyncSession, today):
+        """One state row per pair, pointing at the most recent notification."""
+        weather_id = uuid.uuid5(uuid.NAMESPACE_DNS, f"{FIELD_ID}-{today}-frost")
+        seeded_session.add(AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.70))
+        await seeded_session.commit()
+        await evaluate_alerts(seeded_session)
+
+        wd = (
+            await seeded_session.execute(select(WeatherData).where(WeatherData.id == weather_id))
+        ).scalar_one()
+        wd.probability = 0.50
+        await seeded_session.commit()
+        await evaluate_alerts(seeded_session)
+
+        states = (
+            (
+                await seeded_session.execute(
+                    select(NotificationState).where(NotificationState.weather_data_id == weather_id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        latest = (
+            (
+                await seeded_session.execute(
+                    select(Notification)
+                    .where(Notification.weather_data_id == weather_id)
+                    .order_by(Notification.triggered_at.desc())
+                )
+            )
+            .scalars()
+            .first()
+        )
+        assert len(states) == 1
+        assert states[0].notification_id == latest.id
+        assert states[0].notification_type == "risk_ended"
+        assert float(states[0].probability_at_notification) == 0.50
+
+
+# --- Sharded evaluation ---
+
+
+class TestShardedEvaluation:
+    @pytest.fixture
+    def four_shards(self, monkeypatch):
+        monkeypatch.setattr(settings, "EVAL_SHARD_COUNT", 4)
+        monkeypatch.setattr(settings, "NODE_ID", "node-a")
+
+    @pytest.fixture
+    async def alerts_on_both_fields(self, seeded_session: AsyncSession, today):
+        seeded_session.add_all(
+            [
+                WeatherData(
+                    field_id=FIELD_2_ID,
+                    event_date=today,
+                    event_type="frost",
+                    probability=0.90,
+                ),
+                AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.70),
+                AlertConfig(field_id=FIELD_2_ID, event_type="frost", threshold=0.70),
+            ]
+        )
+        await seeded_session.commit()
+        return seeded_session
+
+    @pytest.mark.asyncio
+    async def test_shards_cover_all_pairs(self, alerts_on_both_fields, four_shards):
+        result = await evaluate_alerts(alerts_on_both_fields)
+
+        # 2 frost rows for FIELD_ID + 1 for FIELD_2_ID, each evaluated exactly once
+        assert result["evaluated"] == 3
+        assert result["notifications_created"] == 2
+        assert result["node_id"] == "node-a"
+        assert result["shards"]["processed"] == [0, 1, 2, 3]
+        assert result["shards"]["busy"] == []
+        assert result["shards"]["owners"] == {0: "node-a", 1: "node-a", 2: "node-a", 3: "node-a"}
+
+    @pytest.mark.asyncio
+    async def test_shard_completed_elsewhere_is_skipped(self, alerts_on_both_fields, four_shards):
+        alerts_on_both_fields.add(
+            EvaluationState(
+                scope="shard:2/4",
+                node_id="node-b",
+                last_completed_at=datetime.now(UTC) + timedelta(minutes=1),
+            )
+        )
+        await alerts_on_both_fields.commit()
+
+        result = await evaluate_alerts(alerts_on_both_fields)
+
+        assert 2 not in result["shards"]["processed"]
+        assert result["shards"]["done_elsewhere"] == [2]
+        assert result["shards"]["owners"][2] == "node-b"
+
+
+# --- Targeted (event-driven) evaluation ---
+
+
+class TestTargetedEvaluation:
+    @pytest.fixture
+    async def frost_on_both_fields(self, seeded_session: AsyncSession, today):
+        seeded_session.add_all(
+            [
+                WeatherData(
+                    field_id=FIELD_2_ID,
+                    event_date=today,
+                    event_type="frost",
+                    probability=0.90,
+                ),
+                AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.70),
+                AlertConfig(field_id=FIELD_2_ID, event_type="frost", threshold=0.70),
+            ]
+        )
+        await seeded_session.commit()
+        return seeded_session
+
+    @pytest.mark.asyncio
+    async def test_only_given_fields_are_evaluated(self, frost_on_both_fields):
+        result = await evaluate_alerts(frost_on_both_fields, field_ids={FIELD_2_ID})
+
+        assert result["mode"] == "targeted"
+        assert result["evaluated"] == 1
+        assert result["notifications_created"] == 1
+        field_ids = await frost_on_both_fields.scalars(
+            select(WeatherData.field_id).join(
+                Notification, Notification.weather_data_id == WeatherData.id
+            )
+        )
+        assert set(field_ids) == {FIELD_2_ID}
+
+    @pytest.mark.asyncio
+    async def test_does_not_advance_sweep_state(self, frost_on_both_fields, monkeypatch):
+        monkeypatch.setattr(settings, "EVAL_INCREMENTAL", True)
+
+        await evaluate_alerts(frost_on_both_fields, field_ids={FIELD_2_ID})
+
+        states = (await frost_on_both_fields.execute(select(EvaluationState))).scalars().all()
+        assert states == []
+        # The next sweep is still a full one and picks up FIELD_ID
+        result = await evaluate_alerts(frost_on_both_fields)
+        assert result["mode"] == "full"
+        assert result["notifications_created"] == 1
+
+    @pytest.mark.asyncio
+    async def test_sharded_deployment(self, frost_on_both_fields, monkeypatch):
+        monkeypatch.setattr(settings, "EVAL_SHARD_COUNT", 4)
+
+        result = await evaluate_alerts(frost_on_both_fields, field_ids={FIELD_ID, FIELD_2_ID})
+
+        assert result["evaluated"] == 3
+        assert result["notifications_created"] == 2
+
+
+# --- Horizon tiers ---
+
+
+class TestTieredEvaluation:
+    @pytest.fixture
+    def tiers(self, monkeypatch):
+        monkeypatch.setattr(settings, "EVAL_URGENT_INTERVAL_MINUTES", 2)
+        monkeypatch.setattr(settings, "EVAL_URGENT_HORIZON_DAYS", 1)
+
+    @pytest.fixture
+    async def frost_far_ahead(self, seeded_session: AsyncSession, today):
+        # Seeded frost rows are D+0 (0.85) and D+1 (0.40); add D+3
+        seeded_session.add_all(
+            [
+                WeatherData(
+                    field_id=FIELD_ID,
+                    event_date=today + timedelta(days=3),
+                    event_type="frost",
+                    probability=0.90,
+                ),
+                AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.70),
+            ]
+        )
+        await seeded_session.commit()
+        return seeded_session
+
+    @pytest.mark.asyncio
+    async def test_urgent_tier_only_sees_near_dates(self, frost_far_ahead, tiers):
+        result = await evaluate_alerts(frost_far_ahead, tier=Tier.URGENT)
+
+        assert result["tier"] == "urgent"
+        assert result["evaluated"] == 2
+        assert result["notifications_created"] == 1
+        assert result["lag_s"] is None
+        assert result["run_s"] >= 0
+
+        state = await frost_far_ahead.get(EvaluationState, "urgent/all")
+        assert state is not None
+
+        again = await evaluate_alerts(frost_far_ahead, tier=Tier.URGENT)
+        assert again["lag_s"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_far_tier_only_sees_later_dates(self, frost_far_ahead, tiers):
+        result = await evaluate_alerts(frost_far_ahead, tier=Tier.FAR)
+
+        assert result["tier"] == "far"
+        assert result["evaluated"] == 1
+        assert result["notifications_created"] == 1
+
+    @pytest.mark.asyncio
+    async def test_untiered_call_runs_urgent_first(self, frost_far_ahead, tiers):
+        result = await evaluate_alerts(frost_far_ahead)
+
+        assert list(result["tiers"]) == ["urgent", "far"]
+        assert result["evaluated"] == 3
+        assert result["notifications_created"] == 2
+
+    @pytest.mark.asyncio
+    async def test_sharded_tiers_track_their_own_shards(self, frost_far_ahead, tiers, monkeypatch):
+        monkeypatch.setattr(settings, "EVAL_SHARD_COUNT", 2)
+        monkeypatch.setattr(settings, "NODE_ID", "node-a")
+
+        result = await evaluate_alerts(frost_far_ahead, tier=Tier.URGENT)
+
+        assert result["shards"]["owners"] == {0: "node-a", 1: "node-a"}
+        scopes = await frost_far_ahead.scalars(select(EvaluationState.scope))
+        assert sorted(scopes) == ["urgent/shard:0/2", "urgent/shard:1/2"]
+
+
+# --- Incremental evaluation ---
+
+
+class TestIncrementalEvaluation:
+    @pytest.fixture
+    def incremental(self, monkeypatch):
+        monkeypatch.setattr(settings, "EVAL_INCREMENTAL", True)
+        monkeypatch.setattr(settings, "EVAL_WATERMARK_OVERLAP_SECONDS", 0)
+
+    @pytest.mark.asyncio
+    async def test_first_run_is_full(self, seeded_session: AsyncSession, incremental):
+        seeded_session.add(AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.70))
+        await seeded_session.commit()
+
+        result = await evaluate_alerts(seeded_session)
+        assert result["mode"] == "full"
+        assert result["evaluated"] == 2
+
+    @pytest.mark.asyncio
+    async def test_unchanged_pairs_are_not_rescanned(
+        self, seeded_session: AsyncSession, incremental
+    ):
+        seeded_session.add(AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.70))
+        await seeded_session.commit()
+        await evaluate_alerts(seeded_session)
+
+        result = await evaluate_alerts(seeded_session)
+        assert result["mode"] == "incremental"
+        assert result["evaluated"] == 0
+
+    @pytest.mark.asyncio
+    async def test_changed_weather_is_reevaluated(
+        self, seeded_session: AsyncSession, incremental, today
+    ):
+        seeded_session.add(AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.70))
+        await seeded_session.commit()
+        await evaluate_alerts(seeded_session)
+
+        weather_id = uuid.uuid5(uuid.NAMESPACE_DNS, f"{FIELD_ID}-{today}-frost")
+        wd = (
+            await seeded_session.execute(select(WeatherData).where(WeatherData.id == weather_id))
+        ).scalar_one()
+        wd.probability = 0.50
+        wd.updated_at = datetime.now(UTC)
+        await seeded_session.commit()
+
+        result = await evaluate_alerts(seeded_session)
+        assert result["evaluated"] == 1
+        assert result["notifications_created"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_cooldown_is_reevaluated(
+        self, seeded_session: AsyncSession, incremental, today
+    ):
+        long_ago = datetime.now(UTC) - timedelta(days=1)
+        alert = AlertConfig(
+            id=uuid.uuid4(),
+            field_id=FIELD_ID,
+            event_type="frost",
+            threshold=0.70,
+            updated_at=long_ago,
+        )
+        seeded_session.add(alert)
+        await seeded_session.flush()
+        weather_id = uuid.uuid5(uuid.NAMESPACE_DNS, f"{FIELD_ID}-{today}-frost")
+        for wd in (await seeded_session.execute(select(WeatherData))).scalars():
+            wd.updated_at = long_ago
+        seeded_session.add_all(
+            [
+                NotificationState(
+                    alert_config_id=alert.id,
+                    weather_data_id=weather_id,
+                    notification_type="risk_increased",
+                    probability_at_notification=0.50,
+                    triggered_at=datetime.now(UTC) - timedelta(hours=6, minutes=30),
+                ),
+                EvaluationState(
+                    scope="all",
+                    last_started_at=datetime.now(UTC) - timedelta(hours=1),
+                    last_completed_at=datetime.now(UTC) - timedelta(hours=1),
+                ),
+            ]
+        )
+        await seeded_session.commit()
+
+        result = await evaluate_alerts(seeded_session)
+        # Only the pair whose cooldown ended since the last run is picked up
+        assert result["mode"] == "incremental"
+        assert result["evaluated"] == 1
+
+
+# --- Set-based (SQL) evaluation ---
+
+
+# (event_date offset, probability, previous state: (prob, hours ago) or None)
+SQL_SCENARIO = [
+    (0, 0.85, None),  # first alert above threshold
+    (1, 0.40, None),  # first evaluation below threshold
+    (2, 0.75, (0.70, 7)),  # case C: minor change
+    (3, 0.57, (0.80, 1)),  # case A inside cooldown; 0.57 * 100 truncates to 56
+    (4, 0.90, (0.70, 7)),  # case B: significant delta
+    (5, 0.65, (0.50, 7)),  # case D: below → above
+    (6, 0.30, (0.20, 7)),  # still below
+    (7, 0.95, (0.50, 1)),  # case D blocked by cooldown
+    (8, 0.70, (0.60, 7)),  # 0.70 - 0.60 < 0.10 in float arithmetic → no alert
+]
+
+
+async def _load_sql_scenario(session: AsyncSession, alert_id: uuid.UUID) -> None:
+    """(Re)create the previous notifications and state rows of SQL_SCENARIO."""
+    await session.execute(delete(NotificationState))
+    await session.execute(delete(Notification))
+    for offset, _, previous in SQL_SCENARIO:
+        if previous is None:
+            continue
+        prev_prob, hours_ago = previous
+        weather_id = uuid.uuid5(uuid.NAMESPACE_DNS, f"{FIELD_ID}-{offset}-hail")
+        notification_id = uuid.uuid5(uuid.NAMESPACE_DNS, f"{weather_id}-previous")
+        triggered_at = datetime.now(UTC) - timedelta(hours=hours_ago)
+        session.add(
+            Notification(
+                id=notification_id,
+                alert_config_id=alert_id,
+                weather_data_id=weather_id,
+                field_id=FIELD_ID,
+                user_id=USER_ID,
+                notification_type="risk_increased",
+                probability_at_notification=prev_prob,
+                message="previous",
+                triggered_at=triggered_at,
+            )
+        )
+        await session.flush()
+        session.add(
+            NotificationState(
+                alert_config_id=alert_id,
+                weather_data_id=weather_id,
+                notification_id=notification_id,
+                notification_type="risk_increased",
+                probability_at_notification=prev_prob,
+                triggered_at=triggered_at,
+            )
+        )
+    await session.commit()
+
+
+async def _new_notifications(session: AsyncSession) -> set[tuple]:
+    notifs = (
+        (await session.execute(select(Notification).where(Notification.message != "previous")))
+        .scalars()
+        .all()
+    )
+    return {
+        (
+            n.alert_config_id,
+            n.weather_data_id,
+            n.field_id,
+            n.user_id,
+            n.notification_type,
+            float(n.probability_at_notification),
+            n.previous_notification_id,
+            n.status,
+            n.message,
+        )
+        for n in notifs
+    }
+
+
+class TestSqlStrategy:
+    @pytest.mark.asyncio
+    async def test_sql_and_python_strategies_match(
+        self, seeded_session: AsyncSession, monkeypatch, today
+    ):
+        alert_id = uuid.uuid4()
+        seeded_session.add(
+            AlertConfig(id=alert_id, field_id=FIELD_ID, event_type="hail", threshold=0.60)
+        )
+        seeded_session.add_all(
+            WeatherData(
+                id=uuid.uuid5(uuid.NAMESPACE_DNS, f"{FIELD_ID}-{offset}-hail"),
+                field_id=FIELD_ID,
+                event_date=today + timedelta(days=offset),
+                event_type="hail",
+                probability=prob,
+            )
+            for offset, prob, _ in SQL_SCENARIO
+        )
+        await seeded_session.commit()
+
+        await _load_sql_scenario(seeded_session, alert_id)
+        python_result = await evaluate_alerts(seeded_session)
+        python_notifs = await _new_notifications(seeded_session)
+
+        await _load_sql_scenario(seeded_session, alert_id)
+        monkeypatch.setattr(settings, "EVAL_STRATEGY", "sql")
+        sql_result = await evaluate_alerts(seeded_session)
+        sql_notifs = await _new_notifications(seeded_session)
+
+        assert sql_result["strategy"] == "sql"
+        assert python_notifs == sql_notifs
+        assert {n[4] for n in sql_notifs} == {"risk_increased", "risk_ended"}
+        for key in ("evaluated", "notifications_created", "skipped"):
+            assert sql_result[key] == python_result[key]
+        assert sql_result["notifications_created"] == 4
+
+    @pytest.mark.asyncio
+    async def test_sql_strategy_updates_notification_state(
+        self, seeded_session: AsyncSession, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "EVAL_STRATEGY", "sql")
+        seeded_session.add(AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.70))
+        await seeded_session.commit()
+
+        await evaluate_alerts(seeded_session)
+        result = await evaluate_alerts(seeded_session)
+
+        # Second run sees the first run's state: within cooldown, nothing new
+        assert result["notifications_created"] == 0
+        states = (await seeded_session.execute(select(NotificationState))).scalars().all()
+        notifs = (await seeded_session.execute(select(Notification))).scalars().all()
+        assert len(states) == len(notifs) == 1
+        assert states[0].notification_id == notifs[0].id
+
+
+# --- Chunked commits with checkpoint/resume ---
+
+
+class TestCheckpointedEvaluation:
+    @pytest.fixture
+    async def three_pairs(self, seeded_session: AsyncSession, monkeypatch):
+        monkeypatch.setattr(settings, "EVAL_CHECKPOINT", True)
+        monkeypatch.setattr(settings, "EVAL_CHUNK_SIZE", 1)
+        seeded_session.add_all(
+            [
+                AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.30),
+                AlertConfig(field_id=FIELD_ID, event_type="rain", threshold=0.30),
+            ]
+        )
+        await seeded_session.commit()
+        return seeded_session
+
+    @pytest.mark.asyncio
+    async def test_commits_each_chunk_and_clears_checkpoint(self, three_pairs):
+        result = await evaluate_alerts(three_pairs)
+
+        assert result["evaluated"] == 3
+        assert result["notifications_created"] == 3
+        assert result["chunks_committed"] == 3
+        assert result["resumed"] is False
+
+        state = await three_pairs.get(EvaluationState, "all", populate_existing=True)
+        assert state.last_completed_at is not None
+        assert state.checkpoint_alert_config_id is None
+        assert state.run_started_at is None
+
+    @pytest.mark.asyncio
+    async def test_resumes_after_crash(self, three_pairs, monkeypatch):
+        original_write_chunk = alert_evaluator._write_chunk
+        calls = 0
+
+        async def crash_on_second_chunk(*args, **kwargs):
+            nonlocal calls
+            calls += 1
+            if calls == 2:
+                raise RuntimeError("worker killed")
+            return await original_write_chunk(*args, **kwargs)
+
+        monkeypatch.setattr(alert_evaluator, "_write_chunk", crash_on_second_chunk)
+        with pytest.raises(RuntimeError):
+            await evaluate_alerts(three_pairs)
+        await three_pairs.rollback()
+
+        # First chunk survived the crash, together with its checkpoint
+        notifs = (await three_pairs.execute(select(Notification))).scalars().all()
+        assert len(notifs) == 1
+        state = await three_pairs.get(EvaluationState, "all", populate_existing=True)
+        assert state.checkpoint_alert_config_id is not None
+        assert state.last_completed_at is None
+
+        monkeypatch.setattr(alert_evaluator, "_write_chunk", original_write_chunk)
+        result = await evaluate_alerts(three_pairs)
+
+        assert result["resumed"] is True
+        assert result["evaluated"] == 2
+        notifs = (await three_pairs.execute(select(Notification))).scalars().all()
+        # Every pair notified exactly once across both runs
+        assert len(notifs) == 3
+        assert len({(n.alert_config_id, n.weather_data_id) for n in notifs}) == 3
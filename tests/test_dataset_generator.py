@@ -0,0 +1,50 @@
+from datetime import UTC, date, datetime
+
+from app.services.dataset_generator import DatasetSpec, generate_batches, generate_user
+
+START = date(2026, 7, 15)
+NOW = datetime(2026, 7, 15, 12, 0, tzinfo=UTC)
+SPEC = DatasetSpec(users=5, fields_per_user=3, days=4, history_rate=0.5)
+
+
+def test_same_seed_same_rows():
+    assert generate_user(SPEC, 3, START, NOW).tables == generate_user(SPEC, 3, START, NOW).tables
+
+
+def test_batching_does_not_change_the_dataset():
+    one_batch = next(generate_batches(SPEC, 5, START, NOW))
+    small_batches = list(generate_batches(SPEC, 2, START, NOW))
+    assert len(small_batches) == 3
+    for table, records in one_batch.tables.items():
+        assert [r for batch in small_batches for r in batch.tables[table]] == records
+
+
+def test_shape_and_constraints():
+    rows = next(generate_batches(SPEC, 5, START, NOW))
+    counts = rows.counts()
+    assert counts["users"] == 5
+    assert counts["fields"] == 15
+    assert counts["weather_data"] == 15 * 6 * 4
+    assert counts["alert_configs"] == 15 * 2
+
+    assert all(0 <= w[4] <= 1 for w in rows.tables["weather_data"])
+    alert_keys = [(a[1], a[2]) for a in rows.tables["alert_configs"]]
+    assert len(alert_keys) == len(set(alert_keys))
+
+
+def test_history_chains_end_in_notification_state():
+    rows = generate_user(SPEC, 0, START, NOW)
+    notifications = {n[0]: n for n in rows.tables["notifications"]}
+    assert rows.tables["notification_state"]
+
+    for alert_id, weather_id, notification_id, *_ in rows.tables["notification_state"]:
+        latest = notifications[notification_id]
+        assert (latest[1], latest[2]) == (alert_id, weather_id)
+        # Walk the chain back: types alternate and time goes backwards
+        node = latest
+        while node[5] is not None:
+            previous = notifications[node[5]]
+            assert previous[3] != node[3]
+            assert previous[8] < node[8]
+            node = previous
+        assert node[3] == "risk_increased"
@@ -0,0 +1,131 @@
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings as app_settings
+from app.models.alert_config import AlertConfig
+from app.models.notification import Notification, NotificationType
+from app.services.alert_evaluator import determine_action, evaluate_alerts
+from app.services.decision_engine import (
+    ACTION_TYPES,
+    NO_TIMESTAMP,
+    determine_actions,
+    to_epoch_us,
+)
+from tests.conftest import FIELD_ID
+
+NOW = datetime(2026, 7, 15, 12, 0, 0, 123456, tzinfo=UTC)
+COOLDOWN_HOURS = 6
+
+probabilities = st.one_of(
+    # Values as stored in Numeric(3, 2) columns...
+    st.integers(min_value=0, max_value=100).map(lambda p: p / 100),
+    # ...and arbitrary floats to probe rounding at the comparisons
+    st.floats(min_value=0.0, max_value=1.0, allow_nan=False),
+)
+
+rows = st.tuples(
+    probabilities,  # current_prob
+    st.one_of(st.none(), probabilities),  # prev_prob (None → no previous notification)
+    probabilities,  # threshold
+    # prev_triggered offset in µs, dense around the cooldown boundary
+    st.one_of(
+        st.integers(min_value=0, max_value=2 * COOLDOWN_HOURS * 3600 * 10**6),
+        st.integers(min_value=-5, max_value=5).map(lambda d: COOLDOWN_HOURS * 3600 * 10**6 + d),
+    ),
+)
+
+
+def _scalar(current, prev, threshold, prev_triggered, delta_threshold):
+    action = determine_action(
+        has_previous=prev is not None,
+        was_above=prev is not None and prev >= threshold,
+        is_above=current >= threshold,
+        current_prob=current,
+        prev_prob=prev,
+        prev_triggered=prev_triggered,
+        delta_threshold=delta_threshold,
+        cooldown_hours=COOLDOWN_HOURS,
+        now=NOW,
+    )
+    return action.type if action else None
+
+
+@settings(max_examples=300, deadline=None)
+@given(
+    batch=st.lists(rows, min_size=1, max_size=64),
+    delta_threshold=st.sampled_from([0.0, 0.05, 0.10, 0.25]),
+)
+def test_matches_scalar_determine_action(batch, delta_threshold):
+    current = np.array([r[0] for r in batch], dtype=np.float64)
+    prev = np.array([np.nan if r[1] is None else r[1] for r in batch], dtype=np.float64)
+    threshold = np.array([r[2] for r in batch], dtype=np.float64)
+    has_previous = np.array([r[1] is not None for r in batch], dtype=bool)
+    triggered = [NOW - timedelta(microseconds=r[3]) if r[1] is not None else None for r in batch]
+    triggered_us = np.array(
+        [NO_TIMESTAMP if t is None else to_epoch_us(t) for t in triggered], dtype=np.int64
+    )
+
+    codes = determine_actions(
+        current,
+        prev,
+        threshold,
+        has_previous,
+        triggered_us,
+        to_epoch_us(NOW),
+        delta_threshold,
+        COOLDOWN_HOURS,
+    )
+
+    expected = [
+        _scalar(r[0], r[1], r[2], t, delta_threshold) for r, t in zip(batch, triggered, strict=True)
+    ]
+    assert [ACTION_TYPES[int(c)] for c in codes] == expected
+
+
+def test_cooldown_boundary_is_exclusive():
+    """Exactly COOLDOWN_HOURS ago is no longer in cooldown, one µs less still is."""
+    boundary = NOW - timedelta(hours=COOLDOWN_HOURS)
+    triggered_us = np.array(
+        [to_epoch_us(boundary), to_epoch_us(boundary + timedelta(microseconds=1))],
+        dtype=np.int64,
+    )
+    codes = determine_actions(
+        current_prob=np.array([0.90, 0.90]),
+        prev_prob=np.array([0.50, 0.50]),
+        threshold=np.array([0.70, 0.70]),
+        has_previous=np.array([True, True]),
+        prev_triggered_us=triggered_us,
+        now_us=to_epoch_us(NOW),
+        delta_threshold=0.10,
+        cooldown_hours=COOLDOWN_HOURS,
+    )
+    decisions = [ACTION_TYPES[int(c)] for c in codes]
+    assert decisions == [NotificationType.RISK_INCREASED, None]
+    assert decisions == [
+        _scalar(0.90, 0.50, 0.70, boundary, 0.10),
+        _scalar(0.90, 0.50, 0.70, boundary + timedelta(microseconds=1), 0.10),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_evaluate_alerts_with_numpy_engine(seeded_session: AsyncSession, monkeypatch):
+    monkeypatch.setattr(app_settings, "EVAL_DECISION_ENGINE", "numpy")
+    seeded_session.add(AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.70))
+    await seeded_session.commit()
+
+    result = await evaluate_alerts(seeded_session)
+    assert result["evaluated"] == 2
+    assert result["notifications_created"] == 1
+
+    # Second run within cooldown: nothing new, same as the scalar engine
+    result = await evaluate_alerts(seeded_session)
+    assert result["notifications_created"] == 0
+
+    notifs = (await seeded_session.execute(select(Notification))).scalars().all()
+    assert [n.notification_type for n in notifs] == ["risk_increased"]
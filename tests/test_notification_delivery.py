@@ -0,0 +1,159 @@
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.alert_config import AlertConfig
+from app.models.notification import Notification
+from app.models.weather_data import WeatherData
+from app.services.notification_delivery import (
+    FakeSender,
+    LoggingSender,
+    NotificationDispatcher,
+    load_sender,
+)
+from tests.conftest import FIELD_ID, USER_ID
+from tests.conftest import test_session_factory as session_factory
+
+
+async def _pending(
+    session: AsyncSession, count: int, status: str = "pending", event_type: str = "frost"
+) -> list[uuid.UUID]:
+    alert = AlertConfig(field_id=FIELD_ID, event_type=event_type, threshold=0.7)
+    session.add(alert)
+    await session.flush()
+    weather_id = await session.scalar(
+        select(WeatherData.id).where(WeatherData.field_id == FIELD_ID).limit(1)
+    )
+    start = datetime.now(UTC) - timedelta(minutes=count)
+    notifications = [
+        Notification(
+            alert_config_id=alert.id,
+            weather_data_id=weather_id,
+            field_id=FIELD_ID,
+            user_id=USER_ID,
+            notification_type="risk_increased",
+            probability_at_notification=0.85,
+            status=status,
+            message=f"Alerta {i}",
+            triggered_at=start + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+    session.add_all(notifications)
+    await session.commit()
+    return [n.id for n in notifications]
+
+
+def _dispatcher(sender: FakeSender, batch_size: int = 10, concurrency: int = 4):
+    return NotificationDispatcher(
+        session_factory,
+        sender,
+        batch_size=batch_size,
+        concurrency=concurrency,
+        send_timeout=1.0,
+    )
+
+
+async def _statuses(session: AsyncSession) -> dict[uuid.UUID, str]:
+    session.expire_all()
+    rows = await session.execute(select(Notification.id, Notification.status))
+    return dict(rows.all())
+
+
+class TestNotificationDispatcher:
+    @pytest.mark.asyncio
+    async def test_sends_and_marks_pending_in_order(self, seeded_session: AsyncSession):
+        ids = await _pending(seeded_session, 5)
+        sender = FakeSender()
+
+        counts = await _dispatcher(sender).dispatch_batch()
+
+        assert counts == {"delivered": 5, "failed": 0}
+        assert [n.id for n in sender.sent] == ids
+        assert sender.sent[0].phone == "+54 9 11 0000-0000"
+        assert set((await _statuses(seeded_session)).values()) == {"delivered"}
+        # Nothing left to claim
+        assert await _dispatcher(sender).dispatch_batch() == {}
+
+    @pytest.mark.asyncio
+    async def test_rejected_and_timed_out_messages_fail(self, seeded_session: AsyncSession):
+        ids = await _pending(seeded_session, 3)
+        sender = FakeSender(failing={ids[1]})
+
+        counts = await _dispatcher(sender).dispatch_batch()
+
+        assert counts == {"delivered": 2, "failed": 1}
+        statuses = await _statuses(seeded_session)
+        assert statuses[ids[1]] == "failed"
+        assert statuses[ids[0]] == statuses[ids[2]] == "delivered"
+
+        slow = NotificationDispatcher(
+            session_factory, FakeSender(delay=0.2), 10, 1, send_timeout=0.01
+        )
+        more = await _pending(seeded_session, 1, event_type="rain")
+        assert await slow.dispatch_batch() == {"delivered": 0, "failed": 1}
+        assert (await _statuses(seeded_session))[more[0]] == "failed"
+
+    @pytest.mark.asyncio
+    async def test_batch_size_and_concurrency_are_bounded(self, seeded_session: AsyncSession):
+        await _pending(seeded_session, 12)
+        sender = FakeSender(delay=0.01)
+        dispatcher = _dispatcher(sender, batch_size=8, concurrency=3)
+
+        assert await dispatcher.dispatch_batch() == {"delivered": 8, "failed": 0}
+        assert sender.max_in_flight == 3
+        assert await dispatcher.queue_depth() == 4
+
+    @pytest.mark.asyncio
+    async def test_claim_is_committed_before_sending(self, seeded_session: AsyncSession):
+        ids = await _pending(seeded_session, 2)
+        seen: list[dict] = []
+
+        class PeekingSender(FakeSender):
+            async def send(self, notification):
+                # Mid-send: the lease is visible and another dispatcher skips the rows
+                async with session_factory() as other:
+                    leased = await other.scalar(
+                        select(Notification.claimed_at).where(Notification.id == notification.id)
+                    )
+                seen.append(
+                    {
+                        "leased": leased is not None,
+                        "other": await _dispatcher(FakeSender()).dispatch_batch(),
+                    }
+                )
+                await super().send(notification)
+
+        counts = await _dispatcher(PeekingSender(), concurrency=1).dispatch_batch()
+
+        assert counts == {"delivered": 2, "failed": 0}
+        assert seen == [{"leased": True, "other": {}}] * len(ids)
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_claimed_again(self, seeded_session: AsyncSession):
+        stale, fresh = await _pending(seeded_session, 2)
+        now = datetime.now(UTC)
+        for id_, claimed_at in ((stale, now - timedelta(hours=1)), (fresh, now)):
+            notification = await seeded_session.get(Notification, id_)
+            notification.claimed_at = claimed_at
+        await seeded_session.commit()
+        sender = FakeSender()
+
+        assert await _dispatcher(sender).dispatch_batch() == {"delivered": 1, "failed": 0}
+        assert [n.id for n in sender.sent] == [stale]
+
+    @pytest.mark.asyncio
+    async def test_delivered_rows_are_not_claimed(self, seeded_session: AsyncSession):
+        await _pending(seeded_session, 2, status="delivered")
+        sender = FakeSender()
+        assert await _dispatcher(sender).dispatch_batch() == {}
+        assert sender.sent == []
+
+
+def test_load_sender():
+    assert isinstance(
+        load_sender("app.services.notification_delivery:LoggingSender"), LoggingSender
+    )
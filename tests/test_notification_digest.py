@@ -0,0 +1,226 @@
+import uuid
+from datetime import UTC, date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.alert_config import AlertConfig
+from app.models.evaluation_state import EvaluationState
+from app.models.notification import Notification
+from app.models.notification_digest import NotificationDigest
+from app.models.weather_data import WeatherData
+from app.services import alert_evaluator
+from app.services.alert_evaluator import evaluate_alerts
+from app.services.notification_delivery import FakeSender, NotificationDispatcher
+from app.services.notification_digest import render_digest
+from tests.conftest import FIELD_2_ID, FIELD_ID, USER_ID
+from tests.conftest import test_session_factory as session_factory
+
+
+@pytest.fixture
+def digest_mode(monkeypatch):
+    monkeypatch.setattr(settings, "EVAL_DIGEST", True)
+
+
+async def _alerts(session: AsyncSession, thresholds: dict[str, float]) -> None:
+    session.add_all(
+        AlertConfig(field_id=FIELD_ID, event_type=event_type, threshold=threshold)
+        for event_type, threshold in thresholds.items()
+    )
+    await session.commit()
+
+
+def test_render_digest_counts_unlisted():
+    message = render_digest(["a", "b"], total=3)
+    assert message.splitlines() == [
+        "\U0001f4cb Resumen de alertas: 3 novedades en tus campos.",
+        "• a",
+        "• b",
+        "… y 1 más.",
+    ]
+
+
+class TestBuildDigests:
+    @pytest.mark.asyncio
+    async def test_groups_a_run_per_user(self, seeded_session: AsyncSession, digest_mode):
+        # Frost today and tomorrow plus rain today: three notifications
+        await _alerts(seeded_session, {"frost": 0.30, "rain": 0.30})
+
+        result = await evaluate_alerts(seeded_session)
+
+        assert result["notifications_created"] == 3
+        assert result["digests_created"] == 1
+        digest = (await seeded_session.scalars(select(NotificationDigest))).one()
+        assert (digest.user_id, digest.notification_count, digest.status) == (
+            USER_ID,
+            3,
+            "pending",
+        )
+        notifications = (await seeded_session.scalars(select(Notification))).all()
+        # Individual rows are kept for tracking, waiting on the digest
+        assert {(n.status, n.digest_id) for n in notifications} == {("digested", digest.id)}
+        for n in notifications:
+            assert f"• {n.message}" in digest.message
+
+    @pytest.mark.asyncio
+    async def test_caps_listed_lines(self, seeded_session: AsyncSession, digest_mode, monkeypatch):
+        monkeypatch.setattr(settings, "EVAL_DIGEST_MAX_LINES", 2)
+        await _alerts(seeded_session, {"frost": 0.30, "rain": 0.30})
+
+        await evaluate_alerts(seeded_session)
+
+        digest = (await seeded_session.scalars(select(NotificationDigest))).one()
+        assert digest.notification_count == 3
+        assert digest.message.count("• ") == 2
+        assert digest.message.endswith("… y 1 más.")
+
+    @pytest.mark.asyncio
+    async def test_one_digest_across_tiers(
+        self, seeded_session: AsyncSession, digest_mode, monkeypatch
+    ):
+        # Today's events are urgent, tomorrow's frost is far: two scope commits
+        monkeypatch.setattr(settings, "EVAL_URGENT_INTERVAL_MINUTES", 5)
+        monkeypatch.setattr(settings, "EVAL_URGENT_HORIZON_DAYS", 0)
+        await _alerts(seeded_session, {"frost": 0.30, "rain": 0.30})
+
+        result = await evaluate_alerts(seeded_session)
+
+        assert result["digests_created"] == 1
+        digest = (await seeded_session.scalars(select(NotificationDigest))).one()
+        assert digest.notification_count == 3
+
+    @pytest.mark.asyncio
+    async def test_one_digest_across_shards(
+        self, seeded_session: AsyncSession, digest_mode, monkeypatch
+    ):
+        # FIELD_ID and FIELD_2_ID fall in different shards
+        monkeypatch.setattr(settings, "EVAL_SHARD_COUNT", 2)
+        seeded_session.add(
+            WeatherData(
+                id=uuid.uuid5(uuid.NAMESPACE_DNS, f"{FIELD_2_ID}-{date.today()}-frost"),
+                field_id=FIELD_2_ID,
+                event_date=date.today(),
+                event_type="frost",
+                probability=0.90,
+            )
+        )
+        seeded_session.add(AlertConfig(field_id=FIELD_2_ID, event_type="frost", threshold=0.70))
+        await _alerts(seeded_session, {"frost": 0.70})
+
+        result = await evaluate_alerts(seeded_session)
+
+        assert result["notifications_created"] == 2
+        assert result["digests_created"] == 1
+        digest = (await seeded_session.scalars(select(NotificationDigest))).one()
+        assert digest.notification_count == 2
+
+    @pytest.mark.asyncio
+    async def test_waits_for_shards_running_elsewhere(
+        self, seeded_session: AsyncSession, digest_mode, monkeypatch
+    ):
+        # FIELD_ID is in shard 1; shard 0 is held by another node at first
+        monkeypatch.setattr(settings, "EVAL_SHARD_COUNT", 2)
+        take_lock = alert_evaluator._try_acquire_advisory_lock
+
+        async def shard_0_busy(session, shard=None, tier=None):
+            return shard != 0 and await take_lock(session, shard, tier)
+
+        monkeypatch.setattr(alert_evaluator, "_try_acquire_advisory_lock", shard_0_busy)
+        await _alerts(seeded_session, {"frost": 0.30, "rain": 0.30})
+
+        first = await evaluate_alerts(seeded_session)
+
+        assert (first["notifications_created"], first["digests_created"]) == (3, 0)
+        statuses = await seeded_session.scalars(select(Notification.status))
+        assert set(statuses) == {"digested"}
+
+        # Shard 0 completes: the run is whole and gets a single digest
+        monkeypatch.setattr(alert_evaluator, "_try_acquire_advisory_lock", take_lock)
+        second = await evaluate_alerts(seeded_session)
+
+        assert second["digests_created"] == 1
+        digest = (await seeded_session.scalars(select(NotificationDigest))).one()
+        assert digest.notification_count == 3
+
+    @pytest.mark.asyncio
+    async def test_skips_rows_of_checkpointed_run_in_progress(
+        self, seeded_session: AsyncSession, digest_mode
+    ):
+        # Another scope's checkpointed run started before ours and is still going
+        seeded_session.add(
+            EvaluationState(
+                scope="far/all",
+                run_started_at=datetime.now(UTC) - timedelta(minutes=5),
+                checkpoint_alert_config_id=uuid.uuid4(),
+                checkpoint_weather_data_id=uuid.uuid4(),
+            )
+        )
+        await _alerts(seeded_session, {"frost": 0.30, "rain": 0.30})
+
+        result = await evaluate_alerts(seeded_session)
+
+        assert result["digests_created"] == 0
+        statuses = await seeded_session.scalars(select(Notification.status))
+        assert set(statuses) == {"digested"}
+
+    @pytest.mark.asyncio
+    async def test_single_notification_is_sent_as_is(
+        self, seeded_session: AsyncSession, digest_mode
+    ):
+        await _alerts(seeded_session, {"frost": 0.70})
+
+        result = await evaluate_alerts(seeded_session)
+
+        assert result["digests_created"] == 0
+        notification = (await seeded_session.scalars(select(Notification))).one()
+        assert (notification.status, notification.digest_id) == ("pending", None)
+
+    @pytest.mark.asyncio
+    async def test_off_by_default(self, seeded_session: AsyncSession):
+        await _alerts(seeded_session, {"frost": 0.30, "rain": 0.30})
+
+        result = await evaluate_alerts(seeded_session)
+
+        assert "digests_created" not in result
+        statuses = await seeded_session.scalars(select(Notification.status))
+        assert set(statuses) == {"pending"}
+
+
+class TestDigestDispatch:
+    @pytest.mark.asyncio
+    async def test_sends_digest_and_marks_members(self, seeded_session: AsyncSession, digest_mode):
+        await _alerts(seeded_session, {"frost": 0.30, "rain": 0.30})
+        await evaluate_alerts(seeded_session)
+        sender = FakeSender()
+        dispatcher = NotificationDispatcher(
+            session_factory, sender, batch_size=10, concurrency=4, send_timeout=1.0
+        )
+
+        counts = await dispatcher.dispatch_batch()
+
+        assert counts == {"delivered": 1, "failed": 0}
+        digest = (await seeded_session.scalars(select(NotificationDigest))).one()
+        assert [n.id for n in sender.sent] == [digest.id]
+        seeded_session.expire_all()
+        rows = await seeded_session.execute(select(Notification.status, Notification.delivered_at))
+        assert {status for status, _ in rows} == {"delivered"}
+        assert await dispatcher.dispatch_batch() == {}
+
+    @pytest.mark.asyncio
+    async def test_failed_digest_fails_members(self, seeded_session: AsyncSession, digest_mode):
+        await _alerts(seeded_session, {"frost": 0.30, "rain": 0.30})
+        await evaluate_alerts(seeded_session)
+        digest_id = await seeded_session.scalar(select(NotificationDigest.id))
+        dispatcher = NotificationDispatcher(
+            session_factory,
+            FakeSender(failing={digest_id}),
+            batch_size=10,
+            concurrency=4,
+            send_timeout=1.0,
+        )
+
+        assert await dispatcher.dispatch_batch() == {"delivered": 0, "failed": 1}
+        seeded_session.expire_all()
+        assert set(await seeded_session.scalars(select(Notification.status))) == {"failed"}
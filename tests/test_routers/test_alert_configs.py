@@ -2,7 +2,9 @@ import uuid
 
 import pytest
 
-from tests.conftest import FIELD_ID
+from app.models.field import Field
+from app.models.weather_data import ClimateEventType
+from tests.conftest import ASYNCPG_MAX_BIND_PARAMS, FIELD_2_ID, FIELD_ID, USER_ID
 
 
 @pytest.mark.asyncio
@@ -80,6 +82,27 @@ async def test_update_alert(client):
     assert data["is_active"] is False
 
 
+@pytest.mark.asyncio
+async def test_list_alerts_cache_is_invalidated_by_writes(client):
+    from app.services.alert_config_cache import alert_config_cache
+
+    create_resp = await client.post(
+        f"/api/v1/fields/{FIELD_ID}/alerts",
+        json={"event_type": "frost", "threshold": 0.7},
+    )
+    alert_id = create_resp.json()["id"]
+
+    await client.get(f"/api/v1/fields/{FIELD_ID}/alerts")
+    hits = alert_config_cache.hits
+    resp = await client.get(f"/api/v1/fields/{FIELD_ID}/alerts")
+    assert alert_config_cache.hits == hits + 1
+    assert resp.json()[0]["threshold"] == 0.7
+
+    await client.patch(f"/api/v1/alerts/{alert_id}", json={"threshold": 0.5})
+    resp = await client.get(f"/api/v1/fields/{FIELD_ID}/alerts")
+    assert resp.json()[0]["threshold"] == 0.5
+
+
 @pytest.mark.asyncio
 async def test_delete_alert(client):
     create_resp = await client.post(
@@ -102,3 +125,101 @@ async def test_validation_threshold_out_of_range(client):
         json={"event_type": "frost", "threshold": 1.5},
     )
     assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_alerts(client):
+    await client.post(
+        f"/api/v1/fields/{FIELD_ID}/alerts",
+        json={"event_type": "frost", "threshold": 0.7},
+    )
+    unknown_field = str(uuid.uuid4())
+    resp = await client.post(
+        "/api/v1/alerts/bulk",
+        json={
+            "items": [
+                {"field_id": str(FIELD_ID), "event_type": "frost", "threshold": 0.6},
+                {"field_id": str(FIELD_ID), "event_type": "rain", "threshold": 0.5},
+                {"field_id": str(FIELD_2_ID), "event_type": "hail", "threshold": 0.4},
+                {"field_id": str(FIELD_2_ID), "event_type": "hail", "threshold": 0.9},
+                {"field_id": unknown_field, "event_type": "frost", "threshold": 0.5},
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert [r["status"] for r in data["results"]] == [
+        "conflict",
+        "created",
+        "created",
+        "duplicate",
+        "field_not_found",
+    ]
+    assert data["counts"] == {"conflict": 1, "created": 2, "duplicate": 1, "field_not_found": 1}
+    assert data["results"][2]["alert"]["threshold"] == 0.4
+
+    listing = (await client.get(f"/api/v1/fields/{FIELD_ID}/alerts")).json()
+    assert {a["event_type"]: a["threshold"] for a in listing} == {"frost": 0.7, "rain": 0.5}
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_alerts(client):
+    await client.post(
+        f"/api/v1/fields/{FIELD_ID}/alerts",
+        json={"event_type": "frost", "threshold": 0.7},
+    )
+    # Cached listing must be invalidated by the bulk write
+    await client.get(f"/api/v1/fields/{FIELD_ID}/alerts")
+
+    resp = await client.patch(
+        "/api/v1/alerts/bulk",
+        json={
+            "items": [
+                {"field_id": str(FIELD_ID), "event_type": "frost", "is_active": False},
+                {"field_id": str(FIELD_ID), "event_type": "rain", "threshold": 0.5},
+                {"field_id": str(FIELD_ID), "event_type": "hail"},
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [r["status"] for r in results] == ["updated", "created", "not_found"]
+    assert results[0]["alert"]["threshold"] == 0.7
+    assert results[0]["alert"]["is_active"] is False
+
+    listing = (await client.get(f"/api/v1/fields/{FIELD_ID}/alerts")).json()
+    assert {a["event_type"]: a["is_active"] for a in listing} == {"frost": False, "rain": True}
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_above_bind_param_limit(client, seeded_session, max_bind_params):
+    # 3,000 fields x 6 event types: 18,000 (field, event type) keys, 36,000
+    # parameters if looked up in a single statement
+    fields = [
+        Field(user_id=USER_ID, name=f"Lote {i}", latitude=-34.0, longitude=-60.0)
+        for i in range(3000)
+    ]
+    seeded_session.add_all(fields)
+    await seeded_session.commit()
+    items = [
+        {"field_id": str(field.id), "event_type": event_type.value, "threshold": 0.5}
+        for field in fields
+        for event_type in ClimateEventType
+    ]
+    assert len(items) > 16384
+
+    resp = await client.patch("/api/v1/alerts/bulk", json={"items": items})
+    assert resp.status_code == 200
+    assert resp.json()["counts"] == {"created": len(items)}
+
+    for item in items[::2]:
+        item["threshold"] = 0.8
+    resp = await client.patch("/api/v1/alerts/bulk", json={"items": items[::2]})
+    assert resp.json()["counts"] == {"updated": len(items) // 2}
+    assert max_bind_params() < ASYNCPG_MAX_BIND_PARAMS
+
+
+@pytest.mark.asyncio
+async def test_bulk_rejects_empty_batch(client):
+    resp = await client.post("/api/v1/alerts/bulk", json={"items": []})
+    assert resp.status_code == 422
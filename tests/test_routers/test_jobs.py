@@ -1,11 +1,14 @@
 from datetime import UTC, datetime
 
 import pytest
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.alert_config import AlertConfig
 from app.models.notification import Notification
-from tests.conftest import FIELD_ID
+from app.services.notification_counters import stats_query
+from tests.conftest import FIELD_ID, USER_ID
 
 
 async def _create_notification(
@@ -36,6 +39,8 @@ async def _create_notification(
     notification = Notification(
         alert_config_id=alert.id,
         weather_data_id=weather.id,
+        field_id=FIELD_ID,
+        user_id=USER_ID,
         notification_type="risk_increased",
         probability_at_notification=0.85,
         status=status,
@@ -61,7 +66,20 @@ async def test_stats_empty(client):
 
 @pytest.mark.asyncio
 async def test_stats_with_notifications(client, seeded_session):
+    # Written behind the counters' back: only reconciliation picks it up
     await _create_notification(seeded_session, status="pending")
+    assert (await client.get("/api/v1/jobs/stats")).json()["total_notifications"] == 0
+
+    resp = await client.post("/api/v1/jobs/reconcile-stats")
+    assert resp.status_code == 200
+    assert resp.json()["drift"] == {
+        "total": 1,
+        "pending": 1,
+        "delivered": 0,
+        "failed": 0,
+        "digested": 0,
+    }
+
     resp = await client.get("/api/v1/jobs/stats")
     assert resp.status_code == 200
     data = resp.json()
@@ -69,3 +87,69 @@ async def test_stats_with_notifications(client, seeded_session):
     assert data["pending"] == 1
     assert data["delivered"] == 0
     assert data["last_triggered"] is not None
+    assert data["reconciled_at"] is not None
+
+
+async def _recounted(db: AsyncSession) -> dict:
+    row = (await db.execute(stats_query())).one()
+    return {
+        "total_notifications": row.total,
+        "pending": row.pending,
+        "delivered": row.delivered,
+        "failed": row.failed,
+    }
+
+
+async def _counted(client) -> dict:
+    data = (await client.get("/api/v1/jobs/stats")).json()
+    return {name: data[name] for name in ("total_notifications", "pending", "delivered", "failed")}
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_evaluation_and_delivery(client, seeded_session):
+    seeded_session.add_all(
+        [
+            AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.3),
+            AlertConfig(field_id=FIELD_ID, event_type="rain", threshold=0.3),
+        ]
+    )
+    await seeded_session.commit()
+    await client.post("/api/v1/jobs/evaluate-alerts")
+
+    counted = await _counted(client)
+    assert counted == {"total_notifications": 3, "pending": 3, "delivered": 0, "failed": 0}
+    assert counted == await _recounted(seeded_session)
+
+    ids = list(await seeded_session.scalars(select(Notification.id)))
+    await client.patch(f"/api/v1/notifications/{ids[0]}/deliver")
+    await client.post(
+        "/api/v1/notifications/deliver",
+        json={"items": [{"id": str(ids[1])}, {"id": str(ids[2]), "status": "failed"}]},
+    )
+
+    counted = await _counted(client)
+    assert counted == {"total_notifications": 3, "pending": 0, "delivered": 2, "failed": 1}
+    assert counted == await _recounted(seeded_session)
+    assert (await client.post("/api/v1/jobs/reconcile-stats")).json()["drift"] == dict.fromkeys(
+        ("total", "pending", "delivered", "failed", "digested"), 0
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("thresholds", "pending"),
+    [({"frost": 0.70}, 1), ({"frost": 0.30, "rain": 0.30}, 0)],
+    ids=["single", "digest"],
+)
+async def test_counters_follow_digests(client, seeded_session, monkeypatch, thresholds, pending):
+    monkeypatch.setattr(settings, "EVAL_DIGEST", True)
+    seeded_session.add_all(
+        AlertConfig(field_id=FIELD_ID, event_type=event_type, threshold=threshold)
+        for event_type, threshold in thresholds.items()
+    )
+    await seeded_session.commit()
+    await client.post("/api/v1/jobs/evaluate-alerts")
+
+    assert (await _counted(client))["pending"] == pending
+    drift = (await client.post("/api/v1/jobs/reconcile-stats")).json()["drift"]
+    assert drift == dict.fromkeys(("total", "pending", "delivered", "failed", "digested"), 0)
@@ -0,0 +1,24 @@
+import pytest
+from httpx import AsyncClient
+
+from app.models.alert_config import AlertConfig
+from tests.conftest import FIELD_ID
+
+
+@pytest.mark.asyncio
+async def test_metrics_exposes_evaluation_and_http_series(client: AsyncClient, seeded_session):
+    seeded_session.add(AlertConfig(field_id=FIELD_ID, event_type="frost", threshold=0.70))
+    await seeded_session.commit()
+    await client.post("/api/v1/jobs/evaluate-alerts")
+    await client.get(f"/api/v1/fields/{FIELD_ID}/alerts")
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'agrobot_evaluation_phase_seconds_count{phase="query"}' in body
+    assert 'agrobot_evaluation_rows_total{action="risk_increased"}' in body
+    # Path parameters are reported as the route template
+    assert 'route="/api/v1/fields/{field_id}/alerts"' in body
+    assert 'agrobot_alert_config_cache_requests_total{result="miss"}' in body
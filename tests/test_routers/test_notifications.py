@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 import uuid
 from datetime import UTC, datetime
 
@@ -40,6 +43,8 @@ async def _create_alert_and_notification(
     notification = Notification(
         alert_config_id=alert.id,
         weather_data_id=weather.id,
+        field_id=FIELD_ID,
+        user_id=USER_ID,
         notification_type=notification_type,
         probability_at_notification=probability,
         status="pending",
@@ -126,3 +131,134 @@ async def test_deliver_notification_not_found(client):
     resp = await client.patch(f"/api/v1/notifications/{fake_id}/deliver")
     assert resp.status_code == 404
     assert resp.json()["detail"] == "Notification not found"
+
+
+@pytest.mark.asyncio
+async def test_list_notifications_cursor_pagination(client, seeded_session):
+    await _create_alert_and_notification(seeded_session)
+    await _create_alert_and_notification(
+        seeded_session,
+        event_type="rain",
+        notification_type="risk_ended",
+        probability=0.30,
+    )
+
+    resp = await client.get(f"/api/v1/users/{USER_ID}/notifications?limit=1")
+    assert resp.status_code == 200
+    assert len(resp.json()) == 1
+    cursor = resp.headers["X-Next-Cursor"]
+
+    resp2 = await client.get(f"/api/v1/users/{USER_ID}/notifications?limit=1&cursor={cursor}")
+    assert resp2.status_code == 200
+    assert len(resp2.json()) == 1
+    assert resp2.json()[0]["id"] != resp.json()[0]["id"]
+    # Last page: no further cursor
+    assert "X-Next-Cursor" not in resp2.headers
+
+
+@pytest.mark.asyncio
+async def test_list_notifications_invalid_cursor(client, seeded_session):
+    resp = await client.get(f"/api/v1/users/{USER_ID}/notifications?cursor=not-a-cursor")
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.asyncio
+async def test_list_notifications_cursor_and_offset(client, seeded_session):
+    resp = await client.get(f"/api/v1/users/{USER_ID}/notifications?cursor=abc&offset=1")
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_list_notifications_survives_alert_deletion(client, seeded_session):
+    alert, notification = await _create_alert_and_notification(seeded_session)
+
+    resp = await client.delete(f"/api/v1/alerts/{alert.id}")
+    assert resp.status_code == 204
+
+    resp = await client.get(f"/api/v1/users/{USER_ID}/notifications")
+    assert resp.status_code == 200
+    assert [n["id"] for n in resp.json()] == [str(notification.id)]
+
+
+@pytest.mark.asyncio
+async def test_export_notifications_ndjson(client, seeded_session, monkeypatch):
+    from app.config import settings
+
+    # One cursor fetch per row
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 1)
+    for event_type in ("frost", "rain"):
+        await _create_alert_and_notification(seeded_session, event_type=event_type)
+
+    resp = await client.get(f"/api/v1/users/{USER_ID}/notifications/export")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(rows) == 2
+    # Oldest first
+    assert [r["triggered_at"] for r in rows] == sorted(r["triggered_at"] for r in rows)
+    assert rows[0]["field_id"] == str(FIELD_ID)
+    assert rows[0]["probability_at_notification"] == 0.85
+
+
+@pytest.mark.asyncio
+async def test_export_notifications_csv_filtered(client, seeded_session):
+    await _create_alert_and_notification(seeded_session)
+    await _create_alert_and_notification(
+        seeded_session, event_type="rain", notification_type="risk_ended", probability=0.30
+    )
+
+    resp = await client.get(
+        f"/api/v1/users/{USER_ID}/notifications/export?format=csv&type=risk_ended"
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert len(rows) == 1
+    assert rows[0]["notification_type"] == "risk_ended"
+    assert rows[0]["delivered_at"] == ""
+
+
+@pytest.mark.asyncio
+async def test_export_notifications_user_not_found(client):
+    resp = await client.get(f"/api/v1/users/{uuid.uuid4()}/notifications/export")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_deliver_notifications_batch(client, seeded_session):
+    _, delivered = await _create_alert_and_notification(seeded_session)
+    _, failed = await _create_alert_and_notification(
+        seeded_session, event_type="rain", notification_type="risk_ended", probability=0.30
+    )
+    unknown = uuid.uuid4()
+
+    resp = await client.post(
+        "/api/v1/notifications/deliver",
+        json={
+            "items": [
+                {"id": str(delivered.id)},
+                {"id": str(failed.id), "status": "failed"},
+                {"id": str(unknown)},
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    assert resp.json() == {"delivered": 1, "failed": 1, "unknown_ids": [str(unknown)]}
+
+    listing = await client.get(f"/api/v1/users/{USER_ID}/notifications")
+    by_id = {n["id"]: n for n in listing.json()}
+    assert by_id[str(delivered.id)]["status"] == "delivered"
+    assert by_id[str(delivered.id)]["delivered_at"] is not None
+    assert by_id[str(failed.id)]["status"] == "failed"
+    assert by_id[str(failed.id)]["delivered_at"] is None
+
+
+@pytest.mark.asyncio
+async def test_deliver_notifications_batch_rejects_pending_status(client, seeded_session):
+    _, notification = await _create_alert_and_notification(seeded_session)
+    resp = await client.post(
+        "/api/v1/notifications/deliver",
+        json={"items": [{"id": str(notification.id), "status": "pending"}]},
+    )
+    assert resp.status_code == 422
@@ -0,0 +1,138 @@
+import json
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.weather_data import WeatherData
+from tests.conftest import FIELD_2_ID, FIELD_ID
+
+NDJSON = {"content-type": "application/x-ndjson"}
+
+
+def _ndjson(*records: dict) -> str:
+    return "".join(json.dumps(record) + "\n" for record in records)
+
+
+def _record(field_id=FIELD_ID, days=0, event_type="frost", probability=0.5) -> dict:
+    return {
+        "field_id": str(field_id),
+        "event_date": (date.today() + timedelta(days=days)).isoformat(),
+        "event_type": event_type,
+        "probability": probability,
+    }
+
+
+async def _probability(db: AsyncSession, field_id, days: int, event_type: str):
+    db.expire_all()
+    result = await db.execute(
+        select(WeatherData.probability).where(
+            WeatherData.field_id == field_id,
+            WeatherData.event_date == date.today() + timedelta(days=days),
+            WeatherData.event_type == event_type,
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+@pytest.mark.asyncio
+async def test_batch_ndjson_inserts_and_updates(client, seeded_session):
+    body = _ndjson(
+        _record(days=0, probability=0.95),  # existing frost forecast
+        _record(field_id=FIELD_2_ID, days=3, event_type="hail", probability=0.3),
+    )
+    resp = await client.post("/api/v1/weather/batch", content=body, headers=NDJSON)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["status"] == "merged"
+    assert data["received"] == 2
+    assert data["merged"] == 2
+    assert data["rejected"] == 0
+
+    assert await _probability(seeded_session, FIELD_ID, 0, "frost") == Decimal("0.95")
+    assert await _probability(seeded_session, FIELD_2_ID, 3, "hail") == Decimal("0.30")
+
+
+@pytest.mark.asyncio
+async def test_batch_last_duplicate_wins(client, seeded_session):
+    body = _ndjson(_record(days=5, probability=0.2), _record(days=5, probability=0.7))
+    resp = await client.post("/api/v1/weather/batch", content=body, headers=NDJSON)
+    assert resp.status_code == 200
+    assert resp.json()["merged"] == 1
+    assert await _probability(seeded_session, FIELD_ID, 5, "frost") == Decimal("0.70")
+
+
+@pytest.mark.asyncio
+async def test_batch_repeated_values_are_not_merged(client):
+    body = _ndjson(_record(days=0, probability=0.85), _record(days=4, probability=0.3))
+    resp = await client.post("/api/v1/weather/batch", content=body, headers=NDJSON)
+    assert resp.json()["merged"] == 1  # today's frost is already 0.85
+
+    resp = await client.post("/api/v1/weather/batch", content=body, headers=NDJSON)
+    assert resp.json()["staged"] == 2
+    assert resp.json()["merged"] == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_invalid_lines(client, seeded_session):
+    body = (
+        _ndjson(_record(days=6, probability=0.4))
+        + "not json\n"
+        + _ndjson(
+            _record(event_type="tornado"),
+            _record(probability=1.5),
+            {"field_id": str(FIELD_ID)},
+        )
+    )
+    resp = await client.post("/api/v1/weather/batch", content=body, headers=NDJSON)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["received"] == 5
+    assert data["rejected"] == 4
+    assert data["merged"] == 1
+    assert [error["line"] for error in data["errors"]] == [2, 3, 4, 5]
+    assert "tornado" in data["errors"][1]["error"]
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_unknown_fields(client):
+    unknown = uuid.uuid4()
+    body = "not json\n" + _ndjson(_record(field_id=unknown), _record(days=7))
+    resp = await client.post("/api/v1/weather/batch", content=body, headers=NDJSON)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["staged"] == 2
+    assert data["merged"] == 1
+    assert data["rejected"] == 2
+    assert data["errors"][1] == {"line": 2, "error": f"unknown field_id {unknown}"}
+
+
+@pytest.mark.asyncio
+async def test_batch_csv(client, seeded_session):
+    day = (date.today() + timedelta(days=2)).isoformat()
+    body = f"event_type,field_id,event_date,probability\r\nrain,{FIELD_ID},{day},0.61\r\n"
+    resp = await client.post(
+        "/api/v1/weather/batch", content=body, headers={"content-type": "text/csv"}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["merged"] == 1
+    assert await _probability(seeded_session, FIELD_ID, 2, "rain") == Decimal("0.61")
+
+
+@pytest.mark.asyncio
+async def test_batch_csv_missing_columns(client):
+    resp = await client.post(
+        "/api/v1/weather/batch",
+        content="field_id,event_date\n",
+        headers={"content-type": "text/csv"},
+    )
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_batch_unsupported_content_type(client):
+    resp = await client.post("/api/v1/weather/batch", json=[_record()])
+    assert resp.status_code == 415
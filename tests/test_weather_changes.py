@@ -0,0 +1,133 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.alert_config import AlertConfig
+from app.models.notification import Notification
+from app.models.weather_change import WeatherChange
+from app.models.weather_data import WeatherData
+from app.services.weather_changes import drain_changed_fields, upsert_weather
+from app.sql_functions import upsert
+from tests.conftest import FIELD_2_ID, FIELD_ID
+from tests.conftest import test_session_factory as session_factory
+
+
+def _forecast(field_id, days: int, event_type: str, probability: float) -> dict:
+    return {
+        "field_id": field_id,
+        "event_date": date.today() + timedelta(days=days),
+        "event_type": event_type,
+        "probability": probability,
+    }
+
+
+async def _upsert(db: AsyncSession, *rows: dict) -> int:
+    changed = await upsert_weather(db, upsert(db, WeatherData).values(list(rows)))
+    await db.commit()
+    return changed
+
+
+async def _feed(db: AsyncSession) -> set[tuple]:
+    result = await db.execute(
+        select(WeatherChange.field_id, WeatherChange.event_date, WeatherChange.event_type)
+    )
+    return {tuple(row) for row in result}
+
+
+@pytest.mark.asyncio
+async def test_unchanged_probability_is_not_rewritten(seeded_session: AsyncSession):
+    db = seeded_session
+    frost = await db.scalar(
+        select(WeatherData).where(
+            WeatherData.field_id == FIELD_ID,
+            WeatherData.event_date == date.today(),
+            WeatherData.event_type == "frost",
+        )
+    )
+    updated_at = frost.updated_at
+
+    assert await _upsert(db, _forecast(FIELD_ID, 0, "frost", 0.85)) == 0
+    assert await _feed(db) == set()
+    await db.refresh(frost)
+    assert frost.updated_at == updated_at
+
+
+@pytest.mark.asyncio
+async def test_changes_and_inserts_are_recorded_once(seeded_session: AsyncSession):
+    db = seeded_session
+    changed = await _upsert(
+        db,
+        _forecast(FIELD_ID, 0, "frost", 0.90),  # re-priced
+        _forecast(FIELD_ID, 0, "rain", 0.50),  # unchanged
+        _forecast(FIELD_2_ID, 2, "hail", 0.30),  # new
+    )
+    assert changed == 2
+    # A later change to the same key collapses into the existing feed row
+    assert await _upsert(db, _forecast(FIELD_ID, 0, "frost", 0.95)) == 1
+
+    today = date.today()
+    assert await _feed(db) == {
+        (FIELD_ID, today, "frost"),
+        (FIELD_2_ID, today + timedelta(days=2), "hail"),
+    }
+
+
+@pytest.mark.asyncio
+async def test_drain_returns_fields_and_empties_feed(seeded_session: AsyncSession):
+    db = seeded_session
+    await _upsert(db, _forecast(FIELD_ID, 0, "frost", 0.10), _forecast(FIELD_2_ID, 1, "hail", 0.2))
+
+    assert await drain_changed_fields(db, 10) == {FIELD_ID, FIELD_2_ID}
+    await db.rollback()
+    assert len(await _feed(db)) == 2  # rolled back: nothing consumed
+
+    assert await drain_changed_fields(db, 10) == {FIELD_ID, FIELD_2_ID}
+    await db.commit()
+    assert await db.scalar(select(func.count()).select_from(WeatherChange)) == 0
+
+
+@pytest.mark.asyncio
+async def test_drain_is_bounded_by_field(seeded_session: AsyncSession):
+    db = seeded_session
+    await _upsert(db, _forecast(FIELD_ID, 0, "frost", 0.10), _forecast(FIELD_ID, 1, "hail", 0.2))
+    await _upsert(db, _forecast(FIELD_2_ID, 1, "hail", 0.2))
+
+    # Every feed row of the drained field goes; the other field waits
+    assert await drain_changed_fields(db, 1) == {FIELD_ID}
+    await db.commit()
+    assert {row[0] for row in await _feed(db)} == {FIELD_2_ID}
+    assert await drain_changed_fields(db, 1) == {FIELD_2_ID}
+    assert await drain_changed_fields(db, 1) == set()
+
+
+@pytest.mark.asyncio
+async def test_change_feed_job_evaluates_batch_by_batch(seeded_session: AsyncSession, monkeypatch):
+    from app import main
+
+    db = seeded_session
+    db.add_all(
+        AlertConfig(field_id=field_id, event_type="hail", threshold=0.5)
+        for field_id in (FIELD_ID, FIELD_2_ID)
+    )
+    await db.commit()
+    await _upsert(db, _forecast(FIELD_ID, 1, "hail", 0.8), _forecast(FIELD_2_ID, 1, "hail", 0.9))
+    monkeypatch.setattr(main, "async_session_factory", session_factory)
+    monkeypatch.setattr(settings, "EVAL_CHANGE_FEED_BATCH_FIELDS", 1)
+    evaluated = []
+    evaluate = main.evaluate_alerts
+
+    async def recording_evaluate(session, field_ids=None, tier=None):
+        evaluated.append(set(field_ids))
+        return await evaluate(session, field_ids=field_ids, tier=tier)
+
+    monkeypatch.setattr(main, "evaluate_alerts", recording_evaluate)
+
+    await main.run_change_feed_evaluation()
+
+    assert evaluated == [{FIELD_ID}, {FIELD_2_ID}]
+    assert await _feed(db) == set()
+    notified = await db.scalars(select(Notification.field_id))
+    assert set(notified) == {FIELD_ID, FIELD_2_ID}
@@ -0,0 +1,85 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.database import asyncpg_dsn
+from app.services.weather_listener import FieldDebouncer, WeatherUpdateListener
+from tests.conftest import FIELD_2_ID, FIELD_ID
+
+DELAY = 0.01
+
+
+class RecordingEvaluator:
+    def __init__(self, results: list[dict] | None = None):
+        self.calls: list[set[uuid.UUID]] = []
+        self._results = results or []
+
+    async def __call__(self, field_ids: set[uuid.UUID]) -> dict:
+        self.calls.append(set(field_ids))
+        return self._results.pop(0) if self._results else {"evaluated": len(field_ids)}
+
+
+async def settle(rounds: int = 1) -> None:
+    await asyncio.sleep(DELAY * 5 * rounds)
+
+
+class TestFieldDebouncer:
+    @pytest.mark.asyncio
+    async def test_burst_is_evaluated_once(self):
+        evaluate = RecordingEvaluator()
+        debouncer = FieldDebouncer(evaluate, DELAY)
+
+        debouncer.add([FIELD_ID])
+        debouncer.add([FIELD_ID, FIELD_2_ID])
+        await settle()
+
+        assert evaluate.calls == [{FIELD_ID, FIELD_2_ID}]
+        assert debouncer.pending == frozenset()
+
+    @pytest.mark.asyncio
+    async def test_locked_batch_is_retried(self):
+        evaluate = RecordingEvaluator([{"locked": True}])
+        debouncer = FieldDebouncer(evaluate, DELAY)
+
+        debouncer.add([FIELD_ID])
+        await settle(2)
+
+        assert evaluate.calls == [{FIELD_ID}, {FIELD_ID}]
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_does_not_stop_later_ones(self):
+        calls: list[set[uuid.UUID]] = []
+
+        async def evaluate(field_ids: set[uuid.UUID]) -> dict:
+            calls.append(field_ids)
+            if len(calls) == 1:
+                raise RuntimeError("db down")
+            return {}
+
+        debouncer = FieldDebouncer(evaluate, DELAY)
+        debouncer.add([FIELD_ID])
+        await settle()
+        debouncer.add([FIELD_2_ID])
+        await settle()
+
+        assert calls == [{FIELD_ID}, {FIELD_2_ID}]
+
+
+class TestWeatherUpdateListener:
+    @pytest.mark.asyncio
+    async def test_payloads_feed_the_debouncer(self):
+        evaluate = RecordingEvaluator()
+        listener = WeatherUpdateListener("postgresql://unused", evaluate, DELAY)
+
+        listener.handle_payload(str(FIELD_ID))
+        listener.handle_payload("not-a-uuid")
+        await settle()
+        await listener.stop()
+
+        assert evaluate.calls == [{FIELD_ID}]
+
+
+def test_asyncpg_dsn_drops_driver():
+    dsn = asyncpg_dsn("postgresql+asyncpg://agrobot:secret@db:5432/agrobot")
+    assert dsn == "postgresql://agrobot:secret@db:5432/agrobot"